@@ -0,0 +1,239 @@
+import numpy as np
+
+from timestamps import parse_timestamps
+from trace_format import TRANSMITTER_HIGH, is_trace_file, read_trace, trace_time_us
+
+
+def parse_accurate_values_from_file(file_content):
+    accurate_values = []
+    for line in file_content:
+        if "Low" in line:
+            accurate_values.append(0)
+        elif "High" in line:
+            accurate_values.append(1)
+    return accurate_values
+
+
+def load_accurate_values(transmitter_file, skip_lines=0):
+    """Load the transmitted bits (Low 0, High 1) of a transmitter log or binary trace, skipping the first skip_lines bits."""
+    # Binary traces store the transmitted bit as the record type
+    if is_trace_file(transmitter_file):
+        return (read_trace(transmitter_file)['type'][skip_lines:] == TRANSMITTER_HIGH).astype(int).tolist()
+
+    with open(transmitter_file, 'r') as t_file:
+        return parse_accurate_values_from_file(t_file.readlines()[skip_lines:])
+
+
+def load_symbol_times(transmitter_file):
+    """Load the times (microseconds since midnight) of the transmitted bits of a transmitter log or binary trace."""
+    if is_trace_file(transmitter_file):
+        return trace_time_us(read_trace(transmitter_file)['time'])
+
+    with open(transmitter_file, 'r') as t_file:
+        return parse_timestamps([line.split()[1] for line in t_file if line.startswith(('High', 'Low'))])
+
+
+def load_merged_bandwidths(merged_file):
+    """Load the per-bit bandwidths of a merged log ('time, bandwidth unit' lines, the last line is not a bit)."""
+    with open(merged_file, 'r') as file:
+        lines = file.readlines()
+
+    bandwidths = []
+    for line in lines[:len(lines)-1]:
+        # Split by comma to separate time from bandwidth
+        parts = line.split(',')
+        # Extract the bandwidth part and convert to float
+        bandwidths.append(float(parts[1].split()[0]))
+
+    return bandwidths, len(lines)
+
+
+def percentage_changes(bandwidths):
+    """
+    Relative change of every bandwidth from the previous one (100 after a zero bandwidth), which is
+    one element shorter than bandwidths. A negative bandwidth repeats the change before it.
+    """
+    bandwidths = np.asarray(bandwidths, dtype=np.float64)
+    previous, current = bandwidths[:-1], bandwidths[1:]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = np.where(previous > 0, (current - previous) / previous, 100.0)
+
+    negative = previous < 0
+    if negative.any():
+        # Forward fill from the last change after a non-negative bandwidth (NaN if there is none)
+        source = np.maximum.accumulate(np.where(negative, -1, np.arange(len(changes))))
+        changes = np.where(source >= 0, changes[source], np.nan)
+
+    return changes
+
+
+def hysteresis_states(changes, first_state, thresholds):
+    """
+    Resolve the High/Low state machine for every threshold at once (one row of states per threshold).
+
+    From Low a change of at least threshold switches to High, from High a change of at most
+    -threshold switches to Low. A change that is both (threshold <= 0) toggles the state and a change
+    that is neither keeps it. Every state is therefore the value of the last set/reset before it,
+    flipped once per toggle since then, which is resolved with cumulative maxima and sums.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64).reshape(-1, 1)
+    rising = changes >= thresholds
+    falling = changes <= -thresholds
+
+    # Position of the last set/reset up to every state (the first state acts as one at position 0)
+    count, length = len(thresholds), changes.shape[-1] + 1
+    last_event = np.zeros((count, length), dtype=np.int32)
+    last_event[:, 1:] = np.where(rising ^ falling, np.arange(1, length, dtype=np.int32), 0)
+    np.maximum.accumulate(last_event, axis=1, out=last_event)
+
+    values = np.empty((count, length), dtype=np.int8)
+    values[:, 0] = first_state
+    values[:, 1:] = rising & ~falling
+    states = np.take_along_axis(values, last_event, axis=1)
+
+    # Flip the states once per toggle since the last set/reset
+    toggle = rising & falling
+    if toggle.any():
+        toggles = np.zeros((count, length), dtype=np.int64)
+        np.cumsum(toggle, axis=1, out=toggles[:, 1:])
+        states ^= ((toggles - np.take_along_axis(toggles, last_event, axis=1)) & 1).astype(np.int8)
+
+    return states
+
+
+def calculate_threshold_accuracy(bandwidths, accurate_values, threshold):
+    """
+    Decode the bits from the relative bandwidth change between consecutive bits (a rise of at least
+    threshold switches to High, a drop of at least threshold switches back to Low) and compare them
+    with the transmitted bits. Returns the accuracy, the mispredicted indexes and the predicted bits.
+    """
+    if len(accurate_values) < len(bandwidths):
+        raise IndexError(f"{len(bandwidths)} bandwidths but only {len(accurate_values)} transmitted bits")
+
+    # Initialize with the first value from the accurate values
+    predicted_values = hysteresis_states(percentage_changes(bandwidths), accurate_values[0], [threshold])[0]
+
+    # Compare the predicted values with the accurate values (the first one is not a prediction)
+    incorrect = predicted_values[1:] != np.asarray(accurate_values[1:len(bandwidths)])
+    incorrect_indexes = (np.flatnonzero(incorrect) + 1).tolist()
+
+    total_predictions = len(bandwidths)-1
+    accuracy = ((total_predictions - len(incorrect_indexes)) / total_predictions) * 100
+
+    return accuracy, incorrect_indexes, predicted_values.tolist()
+
+
+def calculate_threshold_accuracies(bandwidths, accurate_values, thresholds, block_elements=1 << 22):
+    """
+    Accuracy (in percent) of calculate_threshold_accuracy for every threshold in thresholds, decoded
+    together (in blocks of thresholds of about block_elements states to bound the memory).
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64).reshape(-1)
+    if len(accurate_values) < len(bandwidths):
+        raise IndexError(f"{len(bandwidths)} bandwidths but only {len(accurate_values)} transmitted bits")
+
+    changes = percentage_changes(bandwidths)
+    expected = np.asarray(accurate_values[1:len(bandwidths)])
+    block = max(1, block_elements // max(len(bandwidths), 1))
+
+    correct = np.concatenate([
+        np.count_nonzero(hysteresis_states(changes, accurate_values[0], thresholds[start:start + block])[:, 1:] == expected, axis=1)
+        for start in range(0, len(thresholds), block)
+    ] or [np.zeros(0, dtype=np.int64)])
+
+    return correct / (len(bandwidths)-1) * 100
+
+
+def optimize_threshold(bandwidths, accurate_values):
+    """
+    Find the (positive) threshold with the highest calculate_threshold_accuracy. Returns the
+    threshold and its accuracy.
+
+    The decoded bits only change when the threshold crosses the magnitude of a percentage change, so
+    the thresholds are swept exactly over the sorted magnitudes. Raising the threshold past a change
+    removes its set/reset, and the bits up to the next remaining set/reset take the state of the one
+    before it, which updates the number of correct bits in constant time (with prefix sums of the
+    transmitted bits). The reported threshold is the middle of the best interval between magnitudes.
+    """
+    if len(accurate_values) < len(bandwidths):
+        raise IndexError(f"{len(bandwidths)} bandwidths but only {len(accurate_values)} transmitted bits")
+
+    changes = percentage_changes(bandwidths)
+    expected = np.asarray(accurate_values[:len(bandwidths)], dtype=np.int64)
+    length = len(bandwidths)
+
+    # Sets/resets ordered by magnitude (zero and NaN changes never switch the state of a positive threshold)
+    magnitudes = np.abs(changes)
+    event_indexes = np.flatnonzero(magnitudes > 0)
+    order = np.argsort(magnitudes[event_indexes], kind='stable')
+    sorted_magnitudes = magnitudes[event_indexes][order].tolist()
+
+    # Linked list of the remaining sets/resets by position (node 0 is the first state, the last node the end)
+    positions = np.concatenate([[0], event_indexes + 1, [length]]).tolist()
+    values = [int(accurate_values[0])] + (changes[event_indexes] > 0).astype(int).tolist() + [None]
+    previous_event = list(range(-1, len(positions) - 1))
+    next_event = list(range(1, len(positions) + 1))
+    nodes = (order + 1).tolist()
+
+    ones = np.concatenate([[0], np.cumsum(expected)]).tolist()
+
+    # Correct bits with every set/reset in place (any threshold up to the smallest magnitude)
+    smallest = sorted_magnitudes[0] if sorted_magnitudes else 1.0
+    states = hysteresis_states(changes, accurate_values[0], [smallest])[0]
+    correct = int(np.count_nonzero(states[1:] == expected[1:]))
+
+    best_correct, best_lower, best_upper = correct, 0.0, smallest
+    for index, node in enumerate(nodes):
+        # Remove the set/reset (its bits now keep the state of the previous one)
+        before, after = previous_event[node], next_event[node]
+        if values[before] != values[node]:
+            start, end = positions[node], positions[after]
+            high = ones[end] - ones[start]
+            change = 2 * high - (end - start)
+            correct += change if values[before] == 1 else -change
+        next_event[before], previous_event[after] = after, before
+
+        # Thresholds up to the next larger magnitude (or any larger threshold after the last one)
+        magnitude = sorted_magnitudes[index]
+        if index + 1 < len(nodes) and sorted_magnitudes[index + 1] == magnitude:
+            continue
+        upper = sorted_magnitudes[index + 1] if index + 1 < len(nodes) else magnitude * 2
+        if correct > best_correct:
+            best_correct, best_lower, best_upper = correct, magnitude, upper
+
+    # The middle of the interval (lower, upper] is furthest away from the neighbouring magnitudes
+    threshold = (best_lower + best_upper) / 2
+    if not best_lower < threshold <= best_upper:
+        threshold = best_upper
+
+    total_predictions = len(bandwidths)-1
+    return threshold, (best_correct / total_predictions) * 100
+
+
+def calculate_time_difference(merged_file):
+    """Time between the first and last line of a merged log and per line (both in milliseconds)."""
+    with open(merged_file, 'r') as file:
+        # The average line at the end of the millisecond merged logs has no timestamp
+        file_content = [line for line in file if not line.startswith('Average')]
+
+    if len(file_content) < 1:
+        return 0, 0
+
+    # Parse the first and last timestamps together so a midnight rollover is accounted for
+    first_time, last_time = parse_timestamps([line.split(', ')[0] for line in (file_content[0], file_content[-1])])
+
+    # Calculate the difference in time (microseconds)
+    time_difference = int(last_time - first_time)
+
+    # Convert time difference to milliseconds
+    return time_difference / 1000, time_difference / 1000 / len(file_content)
+
+
+def merged_time_difference(merged):
+    """calculate_time_difference of a merge result (log_merge.MERGED_DTYPE) instead of a merged log."""
+    if len(merged) < 1:
+        return 0, 0
+
+    time_difference = int(merged['time'][-1] - merged['time'][0])
+    return time_difference / 1000, time_difference / 1000 / len(merged)
@@ -1,29 +1,4 @@
-from datetime import datetime
-
-def parse_timestamp(timestamp_str):
-    # Split the string by space and get the time part after "Low" or "High"
-    _, timestamp = timestamp_str.split(' ')
-    
-    # Extract hours, minutes, seconds, milliseconds, and microseconds manually
-    hours = timestamp[:2]
-    minutes = timestamp[3:5]
-    seconds = timestamp[6:8]
-    milliseconds = timestamp[9:12]
-    microseconds = timestamp[13:]
-    
-    # Ensure microseconds are exactly 3 digits
-    if len(microseconds) > 3:
-        microseconds = microseconds[:3]  # Truncate if longer
-    microseconds = microseconds.ljust(3, '0')  # Pad to ensure it's 3 digits
-    
-    # Combine milliseconds and microseconds into a 6-digit number
-    full_microseconds = milliseconds + microseconds
-    
-    # Combine into a string that the datetime parser can understand
-    reformatted_timestamp = f"{hours}:{minutes}:{seconds}.{full_microseconds}"
-    
-    # Parse the reformatted timestamp into a datetime object
-    return datetime.strptime(reformatted_timestamp, "%H:%M:%S.%f")
+from timestamps import parse_timestamps
 
 def calculate_time_difference(merged_file):
     with open(merged_file, 'r') as file:
@@ -37,15 +12,14 @@ def calculate_time_difference(merged_file):
         # print(first_value)
         # print(last_value)
         
-        # Parse both timestamps
-        first_time = parse_timestamp(first_value)
-        last_time = parse_timestamp(last_value)
+        # Parse both timestamps (the time part after "Low" or "High") together so a midnight rollover is accounted for
+        first_time, last_time = parse_timestamps([first_value.split(' ')[1], last_value.split(' ')[1]])
         
-        # Calculate the difference in time
-        time_difference = last_time - first_time
+        # Calculate the difference in time (microseconds)
+        time_difference = int(last_time - first_time)
     
     # Convert time difference to milliseconds
-    time_diff_ms = time_difference.total_seconds() * 1000
+    time_diff_ms = time_difference / 1000
     # print("time diff: ", time_diff_ms)
     # print("len(file_content) * 2 / 3", len(file_content) * 2 / 3)
     avg_transmit_time = len(file_content) * 2 / 3 / time_diff_ms * 1000
@@ -1,13 +1,16 @@
-from datetime import datetime, timedelta
-import re
 import argparse
 
+from accuracy import calculate_threshold_accuracy as decode_threshold_accuracy, calculate_time_difference, load_accurate_values, load_merged_bandwidths, optimize_threshold
+from log_merge import merge_microsecond_files_with_transmitterTiming_and_receiverBW as merge_files_with_transmitterTiming_and_receiverBW
+from merge_cache import cached_merge, is_stale
+
 # Set up command-line argument parsing
 parser = argparse.ArgumentParser(description="Run transmitter and receiver with dynamic log directory.")
 parser.add_argument("--log_dir", type=str, required=True, help="Directory to store the log files for transmitter and receiver.")
 parser.add_argument("--mergeFile", type=lambda x: (str(x).lower() == 'true'), default=True, help="Set to True or False. Default is True.")
+parser.add_argument("--mergeCache", type=lambda x: (str(x).lower() == 'true'), default=True, help="Reuse merged logs whose transmitter and receiver logs did not change (cached in <log_dir>/.merge_cache). Default is True.")
 # parser.add_argument("--iteration_count", type=int, required=True, help="Number of iterations for how many bits are transmitted.")
-parser.add_argument("--calculateAccuracy", type=str, required=True, help="Mode for calculating accuracy (e.g., Average, History, etc.).")
+parser.add_argument("--calculateAccuracy", type=str, required=True, help="Mode for calculating accuracy (e.g., Average, History, Optimize for the threshold with the highest History accuracy).")
 parser.add_argument("--threshold", type=float, default=0.30, help="Threshold for percentage increase or decrease.")
 
 
@@ -15,126 +18,6 @@ parser.add_argument("--threshold", type=float, default=0.30, help="Threshold for
 # Parse the command-line arguments
 args = parser.parse_args()
 
-def parse_time(time_str):
-    """Parse time string formatted as 'HH:MM:SS:xxx:yyy' (milliseconds and microseconds)."""
-    time_parts = time_str.split(':')
-
-    if len(time_parts) != 5:
-        raise ValueError(f"Time string '{time_str}' is not in the expected format 'HH:MM:SS:xxx:yyy'")
-
-    # Extract hours, minutes, seconds, milliseconds, microseconds
-    hours = time_parts[0]
-    minutes = time_parts[1]
-    seconds = time_parts[2]
-    milliseconds = time_parts[3]
-    microseconds = time_parts[4]
-
-    # Combine milliseconds and microseconds into a single microsecond value
-    combined_microseconds = int(milliseconds) * 1000 + int(microseconds)
-
-    # Create a datetime object with the combined time information
-    return datetime.strptime(f"{hours}:{minutes}:{seconds}", '%H:%M:%S') + timedelta(microseconds=combined_microseconds)
-
-
-def merge_files_with_transmitterTiming_and_receiverBW(transmitter_file, receiver_file, output_file):
-    with open(transmitter_file, 'r') as t_file, open(receiver_file, 'r') as r_file, open(output_file, 'w') as out_file:
-        transmitter_lines = t_file.readlines()
-        receiver_lines = r_file.readlines()
-
-        # Ignore the first 32 warmup lines in receiver
-        receiver_lines = receiver_lines[34:]
-
-        r_index = 0
-
-        for t_index in range(0, len(transmitter_lines) - 1):
-            if "Transmitter runs" in transmitter_lines[t_index]:
-                continue
-            # Process both "Low" and "High" transmitter lines
-            t_type, t_time_str = transmitter_lines[t_index].strip().split()
-
-            # Get the next transmitter line (whether Low or High) to mark the range
-            t_next_type, t_next_time_str = transmitter_lines[t_index + 1].strip().split()
-
-            t_start_time = parse_time(t_time_str)
-            t_end_time = parse_time(t_next_time_str)
-
-            # Collect all receiver bandwidth values between the current and next transmitter times
-            bandwidth_sum = 0
-            receiver_count = 0
-
-            
-
-            while r_index < len(receiver_lines):
-                if "Device to Device" in receiver_lines[r_index]:
-                    return
-                  
-                r_line = receiver_lines[r_index].strip()
-                r_time_str, _, r_bw_str = r_line.split()  # Split by spaces
-                r_time = parse_time(r_time_str)
-
-                # Check if receiver time is within the transmitter time range
-                if t_start_time <= r_time <= t_end_time:
-                    r_bw = float(r_bw_str)  # Convert bandwidth string to float
-                    bandwidth_sum += r_bw
-                    receiver_count += 1
-                elif r_time > t_end_time:
-                    break
-
-                r_index += 1
-
-            if receiver_count > 0:
-                # Calculate the average bandwidth
-                average_bandwidth = bandwidth_sum / receiver_count
-
-                # Write the result to the output file in GB/s
-                # out_file.write(f"{t_type} {t_time_str} to {t_next_type} {t_next_time_str}: Average Bandwidth = {average_bandwidth:.6f} GB/s\n")
-
-                # Write the result to the output file in GB/s
-                out_file.write(f"{t_time_str}, {average_bandwidth:.6f} ms\n")
-
-
-        
-
-
-
-def parse_timestamp(timestamp_str):
-    # Split the timestamp string to separate the time and the throughput value
-    timestamp, _ = timestamp_str.split(', ')
-    
-    # Reformat the timestamp string to separate milliseconds and microseconds
-    # '21:51:39:871:009' becomes '21:51:39.871009'
-    reformatted_timestamp = timestamp[:8] + '.' + timestamp[9:12] + timestamp[13:]
-    
-    # Parse the reformatted timestamp into a datetime object with microseconds
-    return datetime.strptime(reformatted_timestamp, "%H:%M:%S.%f")
-
-def calculate_time_difference(merged_file):
-
-
-    with open(merged_file, 'r') as file:
-        
-        file_content = file.readlines()
-        
-        if len(file_content) < 1:
-            return 0,0
-
-        # Read the content of the file
-        first_value=file_content[0]
-
-        last_value=file_content[-1]
-        first_time = parse_timestamp(first_value)
-        last_time = parse_timestamp(last_value)
-        
-        # Calculate the difference in time
-        time_difference = last_time - first_time
-    
-    # Convert time difference to milliseconds
-    return time_difference.total_seconds() * 1000,time_difference.total_seconds() * 1000/len(file_content)
-
-
-
-
-
 def calculate_accuracy_based_on_average(transmitter_values, receiver_values,time_switch_values):
 
     for transmitter_size in transmitter_values:
@@ -175,74 +58,28 @@ def calculate_accuracy_based_on_average(transmitter_values, receiver_values,time
                     
 
 
-def parse_accurate_values_from_file(file_content):
-    accurate_values = []
-    for line in file_content:
-        if "Low" in line:
-            accurate_values.append(0)
-        elif "High" in line:
-            accurate_values.append(1)
-    return accurate_values
+def calculate_threshold_accuracy(transmitter_size, receiver_size, output_file, time_switch, threshold):
 
+    #Merged file
+    bandwidths, line_count = load_merged_bandwidths(output_file)
 
-def calculate_threshold_accuracy(transmitter_size, receiver_size, output_file, time_switch, threshold):
+    #transmitter file accurate values (Transmitted message as baseline)
+    accurate_values = load_accurate_values(transmitter_file, skip_lines=1)
 
-   
-    with open(output_file, 'r') as file, open(transmitter_file, 'r') as t_file:
-        
-        #Merged file
-        lines = file.readlines()
-        # Parse bandwidth values and the average
-        bandwidths = []
-        
-        #transmitter file accurate values (Transmitted message as baseline)
-        transmitter_file_content = t_file.readlines()
-        accurate_values = parse_accurate_values_from_file(transmitter_file_content[1:])
-
-        for line in lines[:len(lines)-1]:
-            # print("line: ", line)
-            # Split by comma to separate time from bandwidth
-            parts = line.split(',')
-            # Extract the bandwidth part and convert to float
-            bandwidth = float(parts[1].split()[0])  # Extract the first part and convert to float
-            bandwidths.append(bandwidth)
-
-        predicted_values = []
-        correct_predictions = 0
-        incorrect_indexes = []
-        # Initialize with the first value from the accurate values
-        predicted_values.append(accurate_values[0])
-        
-        for i in range(1, len(bandwidths)):
-            previous_predicted = predicted_values[-1]
-            # print("bandwidths[i - 1]: ", bandwidths[i - 1])
-            if bandwidths[i - 1] > 0:
-                percentage_change = (bandwidths[i] - bandwidths[i - 1]) / bandwidths[i - 1]
-            elif bandwidths[i - 1] == 0:
-                percentage_change = 100
-            if previous_predicted == 0:
-                if percentage_change >= threshold:
-                    predicted_values.append(1)  # Mark as high
-                else:
-                    predicted_values.append(0)  # Stay low
-            # If the previous prediction was 1 (high)
-            else:
-                if percentage_change <= -threshold:
-                    predicted_values.append(0)  # Mark as low
-                else:
-                    predicted_values.append(1)  # Stay high
-            
-            # Compare the predicted value with the accurate value
-            if predicted_values[-1] == accurate_values[i]:
-                correct_predictions += 1
-            else:
-                incorrect_indexes.append(i)
-                # print("incorrect i: ", i)
-        
-        total_predictions = len(bandwidths)-1
-        accuracy = (correct_predictions / total_predictions) * 100
-        
-        return accuracy, incorrect_indexes, predicted_values, len(lines)
+    accuracy, incorrect_indexes, predicted_values = decode_threshold_accuracy(bandwidths, accurate_values, threshold)
+
+    return accuracy, incorrect_indexes, predicted_values, line_count
+
+
+def find_optimal_threshold(transmitter_size, receiver_size, output_file, time_switch):
+
+    #Merged file
+    bandwidths, _ = load_merged_bandwidths(output_file)
+
+    #transmitter file accurate values (Transmitted message as baseline)
+    accurate_values = load_accurate_values(transmitter_file, skip_lines=1)
+
+    return optimize_threshold(bandwidths, accurate_values)
 
 
 
@@ -287,7 +124,12 @@ for transmitter_size in transmitter_values:
 
                 if args.mergeFile:
                     print(output_file)
-                    merge_files_with_transmitterTiming_and_receiverBW(transmitter_file, receiver_file, output_file)
+                    if args.mergeCache:
+                        cached_merge(merge_files_with_transmitterTiming_and_receiverBW, transmitter_file, receiver_file, output_file)
+                    else:
+                        merge_files_with_transmitterTiming_and_receiverBW(transmitter_file, receiver_file, output_file)
+                elif is_stale(output_file, [transmitter_file, receiver_file]):
+                    print(f"Warning: {output_file} is missing or older than its logs (run with --mergeFile=True)")
 
                 # Process files
                 if args.calculateAccuracy == "Average":
@@ -307,5 +149,12 @@ for transmitter_size in transmitter_values:
                     #Comment out to print Mispredicted indexes
                     print(f"Mispredicted Indexes: {mispredicted_indexes}")
                     # print(f"Predicted Values: {predicted_values}")
+
+                if args.calculateAccuracy == "Optimize":
+
+                    # Search the threshold with the highest History accuracy for this configuration
+                    optimal_threshold, optimal_accuracy = find_optimal_threshold(transmitter_size, receiver_size, output_file, time_switch)
+
+                    print(f"{time_switch} {transmitter_size} {receiver_size} threshold: {optimal_threshold:.4f} accuracy: {optimal_accuracy:.2f}%")
                     # exit()
                 # exit()
\ No newline at end of file
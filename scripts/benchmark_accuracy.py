@@ -0,0 +1,104 @@
+import argparse
+import random
+import time
+
+import numpy as np
+
+from accuracy import calculate_threshold_accuracies, calculate_threshold_accuracy, optimize_threshold, percentage_changes
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Benchmark the vectorized History decoder against the original per-bit loop.")
+parser.add_argument("--bits", type=int, default=1000000, help="Number of transmitted bits.")
+parser.add_argument("--thresholds", type=int, default=100, help="Number of thresholds scored by the batched decoder.")
+parser.add_argument("--check_runs", type=int, default=200, help="Number of small random inputs the decoders are compared on.")
+
+
+def legacy_threshold_accuracy(bandwidths, accurate_values, threshold):
+    """Original analysis.py decoder loop, kept as the reference for the benchmark."""
+    predicted_values = []
+    correct_predictions = 0
+    incorrect_indexes = []
+    predicted_values.append(accurate_values[0])
+
+    for i in range(1, len(bandwidths)):
+        previous_predicted = predicted_values[-1]
+        if bandwidths[i - 1] > 0:
+            percentage_change = (bandwidths[i] - bandwidths[i - 1]) / bandwidths[i - 1]
+        elif bandwidths[i - 1] == 0:
+            percentage_change = 100
+        if previous_predicted == 0:
+            if percentage_change >= threshold:
+                predicted_values.append(1)
+            else:
+                predicted_values.append(0)
+        else:
+            if percentage_change <= -threshold:
+                predicted_values.append(0)
+            else:
+                predicted_values.append(1)
+
+        if predicted_values[-1] == accurate_values[i]:
+            correct_predictions += 1
+        else:
+            incorrect_indexes.append(i)
+
+    total_predictions = len(bandwidths)-1
+    accuracy = (correct_predictions / total_predictions) * 100
+
+    return accuracy, incorrect_indexes, predicted_values
+
+
+def synthetic_channel(rng, bits):
+    """Random transmitted bits and noisy per-bit bandwidths (lower while the transmitter is High)."""
+    accurate_values = [rng.randint(0, 1) for _ in range(bits)]
+    bandwidths = [round(max(0.0, (40.0 if bit else 60.0) + rng.gauss(0, 8)), 3) for bit in accurate_values]
+    return bandwidths, accurate_values
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    # Identical results on small inputs, including zero bandwidths and zero or negative thresholds
+    identical = True
+    for _ in range(args.check_runs):
+        bandwidths, accurate_values = synthetic_channel(rng, rng.randint(2, 50))
+        bandwidths = [0.0 if rng.random() < 0.1 else bandwidth for bandwidth in bandwidths]
+        thresholds = [rng.choice([0.0, -0.1, 0.05, 0.3, 1.0, 100.0, rng.uniform(-1, 1)]) for _ in range(5)]
+        for threshold in thresholds:
+            identical &= legacy_threshold_accuracy(bandwidths, accurate_values, threshold) == calculate_threshold_accuracy(bandwidths, accurate_values, threshold)
+        batched = calculate_threshold_accuracies(bandwidths, accurate_values, thresholds)
+        identical &= batched.tolist() == [legacy_threshold_accuracy(bandwidths, accurate_values, threshold)[0] for threshold in thresholds]
+
+        # The optimizer finds the best accuracy of all positive thresholds (every magnitude and just above it)
+        optimal_threshold, optimal_accuracy = optimize_threshold(bandwidths, accurate_values)
+        magnitudes = np.unique(np.abs(percentage_changes(bandwidths)))
+        candidates = np.concatenate([magnitudes, np.nextafter(magnitudes, np.inf), [1e-9]])
+        best_accuracy = calculate_threshold_accuracies(bandwidths, accurate_values, candidates[candidates > 0]).max()
+        identical &= optimal_accuracy == best_accuracy == legacy_threshold_accuracy(bandwidths, accurate_values, optimal_threshold)[0]
+
+    bandwidths, accurate_values = synthetic_channel(rng, args.bits)
+    thresholds = np.linspace(0.0, 1.0, args.thresholds)
+
+    start = time.perf_counter()
+    legacy = legacy_threshold_accuracy(bandwidths, accurate_values, 0.3)
+    legacy_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized = calculate_threshold_accuracy(bandwidths, accurate_values, 0.3)
+    vectorized_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    calculate_threshold_accuracies(bandwidths, accurate_values, thresholds)
+    batched_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    optimize_threshold(bandwidths, accurate_values)
+    optimize_elapsed = time.perf_counter() - start
+
+    print(f"bits: {args.bits}")
+    print(f"loop:       {legacy_elapsed:.3f} s")
+    print(f"vectorized: {vectorized_elapsed:.3f} s ({legacy_elapsed / vectorized_elapsed:.1f}x)")
+    print(f"batched:    {batched_elapsed:.3f} s for {args.thresholds} thresholds ({legacy_elapsed * args.thresholds / batched_elapsed:.1f}x over {args.thresholds} loop runs)")
+    print(f"optimizer:  {optimize_elapsed:.3f} s (exact search over all thresholds)")
+    print(f"identical: {identical and legacy == vectorized}")
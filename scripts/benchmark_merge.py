@@ -0,0 +1,155 @@
+from datetime import datetime
+import argparse
+import os
+import random
+import re
+import tempfile
+import time
+
+from log_merge import merge_files_with_transmitterTiming_and_receiverBW, merge_records, write_merged_log
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Benchmark the transmitter/receiver log merge on synthetic logs.")
+parser.add_argument("--sizes", type=str, default="1000,10000,100000,1000000,10000000", help="Comma separated receiver sample counts.")
+parser.add_argument("--samples_per_symbol", type=int, default=10, help="Receiver samples per transmitter symbol.")
+parser.add_argument("--legacy_max", type=int, default=10000, help="Largest size that is also merged with the original quadratic implementation.")
+
+
+def legacy_parse_time(time_str):
+    """Original analysis.py parser, kept as the reference for the benchmark."""
+    format_str = '%H:%M:%S:%f'
+    if len(time_str.split(':')) > 4:
+        format_str += ':%f'
+    try:
+        return datetime.strptime(time_str, format_str)
+    except ValueError as e:
+        print(f"Failed to convert time_str={time_str} with error: {e}")
+        return None
+
+
+def legacy_merge(transmitter_file, receiver_file, output_file):
+    """Original analysis.py merge, kept as the reference for the benchmark."""
+    with open(transmitter_file, 'r') as t_file, open(receiver_file, 'r') as r_file, open(output_file, 'w') as out_file:
+        transmitter_lines = t_file.readlines()
+        receiver_lines = r_file.readlines()
+        receiver_lines = receiver_lines[32:]
+
+        r_index = 0
+        total_average_bandwidth = 0
+        average_bandwidth_count = 0
+
+        for t_line in transmitter_lines:
+            t_type, t_time_str = t_line.strip().split()
+            t_time = legacy_parse_time(t_time_str)
+
+            while r_index < len(receiver_lines):
+                r_line = receiver_lines[r_index].strip()
+                match = re.match(r'(\d{2}:\d{2}:\d{2}:\d{3})\s+&\s+(\d+(\.\d+)?)', r_line)
+                if match:
+                    r_time = legacy_parse_time(match.groups()[0])
+                    if r_time >= t_time:
+                        break
+                r_index += 1
+
+            if r_index < len(receiver_lines):
+                start_index = r_index
+
+                next_t_time = None
+                if transmitter_lines.index(t_line) + 1 < len(transmitter_lines):
+                    next_t_line = transmitter_lines[transmitter_lines.index(t_line) + 1]
+                    next_t_time = legacy_parse_time(next_t_line.split()[1])
+
+                end_index = start_index
+                while end_index < len(receiver_lines):
+                    r_line = receiver_lines[end_index].strip()
+                    match = re.match(r'(\d{2}:\d{2}:\d{2}:\d{3})\s+&\s+(\d+(\.\d+)?)', r_line)
+                    if match:
+                        r_time = legacy_parse_time(match.groups()[0])
+                        if next_t_time and r_time > next_t_time:
+                            break
+                    end_index += 1
+
+                total_bandwidth = 0
+                count = 0
+                for r_bw_line in receiver_lines[start_index:end_index]:
+                    match_bw = re.match(r'(\d{2}:\d{2}:\d{2}:\d{3})\s+&\s+(\d+(\.\d+)?)', r_bw_line.strip())
+                    if match_bw:
+                        total_bandwidth += float(match_bw.groups()[1])
+                        count += 1
+
+                average_bandwidth = total_bandwidth / count if count > 0 else 0
+                total_average_bandwidth += average_bandwidth if average_bandwidth > 0 else 0
+                average_bandwidth_count += 1 if average_bandwidth > 0 else 0
+
+                out_file.write(f'{t_time_str}, {average_bandwidth:.3f} GB/s\n')
+
+        if average_bandwidth_count > 0:
+            average_bandwidth_after_experiment = total_average_bandwidth / average_bandwidth_count
+        else:
+            average_bandwidth_after_experiment = 0
+
+        out_file.write(f'Average: {average_bandwidth_after_experiment:.3f} GB/s\n')
+
+
+def format_time(ms):
+    """Format milliseconds since midnight as 'HH:MM:SS:ms'."""
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}:{ms % 1000:03d}"
+
+
+def same_merged_logs(path, other_path):
+    """Whether two merged logs are byte-identical."""
+    with open(path, 'rb') as merged, open(other_path, 'rb') as other:
+        return merged.read() == other.read()
+
+
+def write_synthetic_logs(transmitter_file, receiver_file, receiver_samples, samples_per_symbol):
+    """Write an alternating 'U' message transmitter log and a 1 kHz receiver log that covers it."""
+    rng = random.Random(0)
+    start_ms = 3600000
+
+    with open(receiver_file, 'w') as r_file:
+        for _ in range(32):
+            r_file.write("warmup\n")
+        for index in range(receiver_samples):
+            high = (index // samples_per_symbol) % 2
+            r_file.write(f"{format_time(start_ms + index)}    &   {rng.uniform(60, 70) - 20 * high:.4f}\n")
+
+    with open(transmitter_file, 'w') as t_file:
+        for symbol in range(receiver_samples // samples_per_symbol):
+            t_file.write(f"{'High' if symbol % 2 else 'Low'} {format_time(start_ms + symbol * samples_per_symbol)}\n")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    print(f"{'samples':>10} {'merge (s)':>10} {'ns/sample':>10} {'stream (s)':>11} {'legacy (s)':>11} {'identical':>10}")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        transmitter_file = os.path.join(tmp_dir, "transmitter.log")
+        receiver_file = os.path.join(tmp_dir, "receiver.log")
+        output_file = os.path.join(tmp_dir, "merged.log")
+        streamed_output_file = os.path.join(tmp_dir, "merged_streamed.log")
+        legacy_output_file = os.path.join(tmp_dir, "merged_legacy.log")
+
+        for size in [int(value) for value in args.sizes.split(',')]:
+            write_synthetic_logs(transmitter_file, receiver_file, size, args.samples_per_symbol)
+
+            start = time.perf_counter()
+            merge_files_with_transmitterTiming_and_receiverBW(transmitter_file, receiver_file, output_file)
+            elapsed = time.perf_counter() - start
+
+            # The streaming merge (one cursor per log) that the vectorized merge replaces
+            start = time.perf_counter()
+            write_merged_log(list(merge_records(transmitter_file, receiver_file)), streamed_output_file, footer=True)
+            streamed_elapsed = time.perf_counter() - start
+            identical = str(same_merged_logs(output_file, streamed_output_file))
+
+            legacy_elapsed = "-"
+            if size <= args.legacy_max:
+                start = time.perf_counter()
+                legacy_merge(transmitter_file, receiver_file, legacy_output_file)
+                legacy_elapsed = f"{time.perf_counter() - start:.3f}"
+
+                identical = str(identical == 'True' and same_merged_logs(output_file, legacy_output_file))
+
+            print(f"{size:>10} {elapsed:>10.3f} {elapsed / size * 1e9:>10.0f} {streamed_elapsed:>11.3f} {legacy_elapsed:>11} {identical:>10}")
@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+import argparse
+import random
+import time
+
+import numpy as np
+
+from timestamps import DAY_US, parse_timestamps
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Benchmark the vectorized timestamp parser against strptime.")
+parser.add_argument("--count", type=int, default=1000000, help="Number of timestamps to parse.")
+
+
+def strptime_parse(time_str):
+    """Previous per-line parser ('21:51:39:871:009' becomes '21:51:39.871009')."""
+    return datetime.strptime(time_str[:8] + '.' + time_str[9:12] + time_str[13:], "%H:%M:%S.%f")
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    # Increasing receiver-like timestamps that cross midnight
+    rng = random.Random(0)
+    times_us = np.cumsum([rng.randint(1, 5000) for _ in range(args.count)]) + DAY_US - 1000000
+    time_strs = [
+        f"{t // 3600000000 % 24:02d}:{t // 60000000 % 60:02d}:{t // 1000000 % 60:02d}:{t // 1000 % 1000:03d}:{t % 1000:03d}"
+        for t in times_us.tolist()
+    ]
+
+    start = time.perf_counter()
+    strptime_times = [strptime_parse(time_str) for time_str in time_strs]
+    strptime_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vectorized_times = parse_timestamps(time_strs)
+    vectorized_elapsed = time.perf_counter() - start
+
+    # strptime has no notion of days, so only the vectorized path keeps increasing past midnight
+    midnight = datetime(1900, 1, 1)
+    strptime_us = np.array([(t - midnight) // timedelta(microseconds=1) for t in strptime_times])
+    matches = np.array_equal(strptime_us, vectorized_times % DAY_US)
+
+    print(f"timestamps: {args.count}")
+    print(f"strptime:   {strptime_elapsed:.3f} s ({strptime_elapsed / args.count * 1e9:.0f} ns/timestamp)")
+    print(f"vectorized: {vectorized_elapsed:.3f} s ({vectorized_elapsed / args.count * 1e9:.0f} ns/timestamp)")
+    print(f"speedup:    {strptime_elapsed / vectorized_elapsed:.1f}x")
+    print(f"identical (modulo one day): {matches}")
+    print(f"monotonic across midnight:  {bool(np.all(np.diff(vectorized_times) > 0))}")
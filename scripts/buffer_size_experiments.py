@@ -1,26 +1,26 @@
-import os
-import time
-from threading import Thread
 import argparse
 
+from orchestrator import run_experiment
+
 # Lists of values for transmitter and receiver
 transmitter_values = [134217728]#, 536870912, 268435456, 134217728, 67108864, 33554432, 16777216]
 receiver_values = [104857600, 52428800, 26214400, 13107200, 6553600, 3276800, 1638400]#, 1433600, 1228800, 1024000, 819200, 716800, 614400, 512000, 409600, 204800]
 
-# Function to run receiver
-def run_receiver(receiver_size, receiver_iterations, receiver_buffer_size, log_dir, transmitter_size):
-    command = f"taskset -c 0-3 ./build/receiver copy 0 {receiver_iterations} {receiver_buffer_size} {receiver_size} > {log_dir}/receiver{receiver_size}_transmitter{transmitter_size}.log"
-    os.system(command)
+# Receiver command
+def receiver_command(receiver_size, receiver_iterations, receiver_buffer_size):
+    return f"taskset -c 0-3 ./build/receiver copy 0 {receiver_iterations} {receiver_buffer_size} {receiver_size}"
 
-# Function to run transmitter
-def run_transmitter(transmitter_size, log_dir, receiver_size):
-    command = f"taskset -c 4-7 ./build/transmitter copy 0 0 {transmitter_size} 'UUUU' 500 0 > {log_dir}/transmitter{transmitter_size}_receiver{receiver_size}.log"
-    os.system(command)
+# Transmitter command
+def transmitter_command(transmitter_size):
+    return f"taskset -c 4-7 ./build/transmitter copy 0 0 {transmitter_size} 'UUUU' 500 0"
 
 if __name__ == "__main__":
     # Set up command-line argument parsing
     parser = argparse.ArgumentParser(description="Run transmitter and receiver with dynamic log directory.")
     parser.add_argument("--log_dir", type=str, required=True, help="Directory to store the log files for both transmitter and receiver, generally logs/.")
+    parser.add_argument("--live", type=lambda x: (str(x).lower() == 'true'), default=False, help="Merge the receiver output while it runs (through a pipe) and only write the transmitter and merged logs. Default is False.")
+    parser.add_argument("--ready_timeout", type=float, default=60, help="Seconds the receiver may take for its warmup before the configuration is killed.")
+    parser.add_argument("--timeout", type=float, default=0, help="Seconds after which a configuration is killed (0 for no limit).")
     
     # Parse the command-line arguments
     args = parser.parse_args()
@@ -38,18 +38,21 @@ if __name__ == "__main__":
             # Calculate the buffer size for the receiver
             buffer_size = 450 * (1073741824 // receiver_size) * (transmitter_size/134217728)
 
-            # Start the receiver in a separate thread
-            receiver_thread = Thread(target=run_receiver, args=(receiver_size, 32, buffer_size, args.log_dir, transmitter_size))
-            receiver_thread.start()
-
-            # Wait for 1 second before starting the transmitter
-            time.sleep(1)
-
-            # Start the transmitter
-            run_transmitter(transmitter_size, args.log_dir, receiver_size)
-
-            # Wait for the receiver thread to finish before moving to the next iteration
-            receiver_thread.join()
+            transmitter_file = f"{args.log_dir}/transmitter{transmitter_size}_receiver{receiver_size}.log"
+            receiver_file = f"{args.log_dir}/receiver{receiver_size}_transmitter{transmitter_size}.log"
+            merged_file = f"{args.log_dir}/merged_transmitter{transmitter_size}_receiver{receiver_size}.log"
+
+            # Run the receiver and start the transmitter once the receiver is done with its warmup (with --live, the receiver output is merged instead of logged)
+            run = run_experiment(
+                receiver_command(receiver_size, 32, buffer_size),
+                transmitter_command(transmitter_size),
+                transmitter_file,
+                receiver_file=None if args.live else receiver_file,
+                merged_file=merged_file if args.live else None,
+                ready_timeout=args.ready_timeout,
+                timeout=args.timeout or None,
+            )
+            print(f"{run['status']}: {transmitter_file}")
 
             # Test for one iteration
             # exit()
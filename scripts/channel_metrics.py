@@ -0,0 +1,145 @@
+from statistics import NormalDist
+import argparse
+import csv
+
+import numpy as np
+
+# Columns the metrics add to a sweep table (rates in bits per second)
+METRIC_COLUMNS = ['bit_rate', 'ber', 'ber_low', 'ber_high', 'capacity', 'capacity_low', 'capacity_high']
+
+
+def symbol_span(symbol_times):
+    """Number of symbols and seconds between the first and the last symbol of a transmitter (from its symbol times in microseconds)."""
+    symbol_times = np.asarray(symbol_times, dtype=np.int64)
+    if len(symbol_times) < 2:
+        return len(symbol_times), 0.0
+    return len(symbol_times), float(symbol_times[-1] - symbol_times[0]) / 1e6
+
+
+def binary_entropy(p):
+    """Binary entropy H(p) in bits (0 at p = 0 and p = 1)."""
+    p = np.clip(np.asarray(p, dtype=np.float64), 0, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        entropy = -p * np.log2(p) - (1 - p) * np.log2(1 - p)
+    return np.nan_to_num(entropy, nan=0.0)
+
+
+def wilson_interval(errors, trials, confidence=0.95):
+    """Wilson score interval of error rates (errors out of trials), NaN where there are no trials."""
+    errors = np.asarray(errors, dtype=np.float64)
+    trials = np.asarray(trials, dtype=np.float64)
+    z = NormalDist().inv_cdf(1 - (1 - confidence) / 2)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p = errors / trials
+        denominator = 1 + z ** 2 / trials
+        center = (p + z ** 2 / (2 * trials)) / denominator
+        half_width = z / denominator * np.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2))
+
+    return np.clip(center - half_width, 0, 1), np.clip(center + half_width, 0, 1)
+
+
+def bsc_capacity(rate, ber):
+    """Capacity (bits per second) of a binary symmetric channel with a raw rate and bit error rate: rate * (1 - H(ber))."""
+    return np.asarray(rate, dtype=np.float64) * (1 - binary_entropy(ber))
+
+
+def channel_metrics(errors, trials, symbols, duration_s, confidence=0.95):
+    """
+    Raw bit rate, bit error rate and binary symmetric channel capacity of every configuration of a sweep
+    at once, with confidence intervals. The bit rate is the number of symbol intervals per second of the
+    transmitter's symbol times, the bit error rate has a Wilson score interval and the capacity interval
+    is the range of the capacity over the bit error rate interval (1 - H is smallest closest to 0.5).
+    Returns a dict of arrays (METRIC_COLUMNS).
+    """
+    errors = np.asarray(errors, dtype=np.float64)
+    trials = np.asarray(trials, dtype=np.float64)
+    symbols = np.asarray(symbols, dtype=np.float64)
+    duration_s = np.asarray(duration_s, dtype=np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bit_rate = np.where(duration_s > 0, (symbols - 1) / duration_s, np.nan)
+        ber = errors / trials
+    ber_low, ber_high = wilson_interval(errors, trials, confidence)
+
+    # The bit error rates of the interval that are closest to and farthest from 0.5
+    worst = np.where((ber_low <= 0.5) & (ber_high >= 0.5), 0.5, np.where(ber_high < 0.5, ber_high, ber_low))
+    best = np.where(np.abs(ber_low - 0.5) >= np.abs(ber_high - 0.5), ber_low, ber_high)
+
+    return {
+        'bit_rate': bit_rate,
+        'ber': ber,
+        'ber_low': ber_low,
+        'ber_high': ber_high,
+        'capacity': bsc_capacity(bit_rate, ber),
+        'capacity_low': bsc_capacity(bit_rate, worst),
+        'capacity_high': bsc_capacity(bit_rate, best),
+    }
+
+
+def add_channel_metrics(rows, confidence=0.95):
+    """
+    Add the channel metrics to the rows of a sweep table (sweep_analysis.py) in one pass. A row needs its
+    mispredicted and bits (the first bit is not a prediction), symbols and duration_s; rows without them
+    (e.g. failed configurations) get empty metrics.
+    """
+    complete = [row for row in rows if all(row.get(column, '') != '' for column in ('mispredicted', 'bits', 'symbols', 'duration_s'))]
+    for row in rows:
+        row.update({column: '' for column in METRIC_COLUMNS})
+
+    if not complete:
+        return rows
+
+    bits = np.array([float(row['bits']) for row in complete])
+    metrics = channel_metrics(
+        [float(row['mispredicted']) for row in complete],
+        bits - 1,
+        [float(row['symbols']) for row in complete],
+        [float(row['duration_s']) for row in complete],
+        confidence,
+    )
+
+    for column, values in metrics.items():
+        digits = 6 if column.startswith('ber') else 3
+        for row, value in zip(complete, values.tolist()):
+            row[column] = round(value, digits) if np.isfinite(value) else ''
+
+    return rows
+
+
+def rank_rows(rows, column):
+    """Sort the rows of a sweep table by a column, largest first (rows without a value last)."""
+    return sorted(rows, key=lambda row: (row.get(column, '') == '', -float(row[column]) if row.get(column, '') != '' else 0))
+
+
+if __name__ == "__main__":
+    from sweep_analysis import print_table
+
+    # Set up command-line argument parsing
+    parser = argparse.ArgumentParser(description="Calculate the bit rate, bit error rate and channel capacity of every configuration of a sweep table (the CSV of sweep_analysis.py) and rank them.")
+    parser.add_argument("input", type=str, help="Sweep table (CSV with mispredicted, bits, symbols and duration_s columns).")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals.")
+    parser.add_argument("--rankBy", type=str, default="capacity", help="Column to rank the configurations by (largest first), or an empty string for the table order.")
+    parser.add_argument("--output", type=str, default=None, help="Optional CSV file for the ranked table.")
+
+    # Parse the command-line arguments
+    args = parser.parse_args()
+
+    with open(args.input, 'r', newline='') as in_file:
+        reader = csv.DictReader(in_file)
+        columns = reader.fieldnames + [column for column in METRIC_COLUMNS if column not in reader.fieldnames]
+        rows = list(reader)
+
+    rows = add_channel_metrics(rows, args.confidence)
+    if args.rankBy:
+        rows = rank_rows(rows, args.rankBy)
+
+    # Configuration columns (everything before the results), the accuracy and the metrics
+    config_columns = columns[:columns.index('accuracy')] if 'accuracy' in columns else columns[:1]
+    print_table(rows, config_columns + [column for column in ('accuracy', 'bits') if column in columns] + METRIC_COLUMNS)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as out_file:
+            writer = csv.DictWriter(out_file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
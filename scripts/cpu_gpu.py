@@ -1,8 +1,6 @@
-import os
-import time
-from threading import Thread
 import argparse
 
+from orchestrator import run_experiment
 
 #Buffer size of transmitter
 transmitter_values = [16777216] #536870912, 268435456, 134217728, 67108864, 33554432, 16777216, 8388608, 4194304,2097152, 
@@ -16,17 +14,13 @@ time_switch_list = [50] # time_switch_list = [1000,500,250,125,100,50,25,16,8,4,
 #This value can stay as 0. This is early finish while creating contention (sleep ratio)
 sleep_time_values = [0]
 
-# Function to run receiver. We assign only first core to GPU execution 
-def run_receiver(receiver_size, receiver_iterations, log_dir, transmitter_size, time_switch, sleep_time):
-    command = f"taskset -c 0 ~/cuda_samples/1_Utilities/bandwidthTest/bandwidthTest --start={receiver_size} --end={receiver_size} --increment={receiver_size} --mode=range --iteration=100000 > {log_dir}/time_switch{time_switch}_receiver{receiver_size}_transmitter{transmitter_size}.log"
-    print(command)
-    os.system(command)
+# Receiver command. We assign only first core to GPU execution
+def receiver_command(receiver_size, receiver_iterations):
+    return f"taskset -c 0 ~/cuda_samples/1_Utilities/bandwidthTest/bandwidthTest --start={receiver_size} --end={receiver_size} --increment={receiver_size} --mode=range --iteration=100000"
 
-# Function to run transmitter. We assign the rest of the cores to CPU execution (1-11). 'U' data represent bit 01010101. So, for each U letter transmitter, we transmit switching 0s and 1s repetitively. Transmitter message can be updated to any message. Note that the analysis script might need an update if the conveyed message is modified.
-def run_transmitter(transmitter_size, log_dir, receiver_size, time_switch, sleep_time):
-    command = f"taskset -c 1-11 ./build/transmitter copy 0 512 {transmitter_size} 'UUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUU' {time_switch} {sleep_time}  > {log_dir}/time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}.log"
-    print(command)
-    os.system(command)
+# Transmitter command. We assign the rest of the cores to CPU execution (1-11). 'U' data represent bit 01010101. So, for each U letter transmitter, we transmit switching 0s and 1s repetitively. Transmitter message can be updated to any message. Note that the analysis script might need an update if the conveyed message is modified.
+def transmitter_command(transmitter_size, time_switch, sleep_time):
+    return f"taskset -c 1-11 ./build/transmitter copy 0 512 {transmitter_size} 'UUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUU' {time_switch} {sleep_time}"
 
 
 
@@ -34,6 +28,9 @@ if __name__ == "__main__":
     # Set up command-line argument parsing
     parser = argparse.ArgumentParser(description="Run transmitter and receiver with dynamic log directory.")
     parser.add_argument("--log_dir", type=str, required=True, help="Directory to store the log files for both transmitter and receiver, generally logs/.")
+    parser.add_argument("--live", type=lambda x: (str(x).lower() == 'true'), default=False, help="Merge the receiver output while it runs (through a pipe) and only write the transmitter and merged logs. Default is False.")
+    parser.add_argument("--ready_timeout", type=float, default=60, help="Seconds the receiver may take for its warmup before the configuration is killed.")
+    parser.add_argument("--timeout", type=float, default=0, help="Seconds after which a configuration is killed (0 for no limit).")
     
     # Parse the command-line arguments
     args = parser.parse_args()
@@ -50,16 +47,21 @@ if __name__ == "__main__":
                     # Calculate the buffer size for the receiver
                     iteration = 80*390000 / 200 * time_switch / 2097152 * transmitter_size
 
-                    # Start the receiver in a separate thread
-                    receiver_thread = Thread(target=run_receiver, args=(receiver_size, iteration, args.log_dir, transmitter_size, time_switch, sleep_time))
-                    receiver_thread.start()
-
-
-                    # Start the transmitter
-                    run_transmitter(transmitter_size, args.log_dir, receiver_size, time_switch, sleep_time)
-
-                    # Wait for the receiver thread to finish before moving to the next iteration
-                    receiver_thread.join()
+                    transmitter_file = f"{args.log_dir}/time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}.log"
+                    receiver_file = f"{args.log_dir}/time_switch{time_switch}_receiver{receiver_size}_transmitter{transmitter_size}.log"
+                    merged_file = f"{args.log_dir}/merged_time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}.log"
+
+                    # Run the receiver and start the transmitter once the receiver is done with its warmup (with --live, the receiver output is merged instead of logged)
+                    run = run_experiment(
+                        receiver_command(receiver_size, iteration),
+                        transmitter_command(transmitter_size, time_switch, sleep_time),
+                        transmitter_file,
+                        receiver_file=None if args.live else receiver_file,
+                        merged_file=merged_file if args.live else None,
+                        ready_timeout=args.ready_timeout,
+                        timeout=args.timeout or None,
+                    )
+                    print(f"{run['status']}: {transmitter_file}")
 
                     # Test for one iteration
                     # exit()
@@ -0,0 +1,128 @@
+import glob
+import os
+
+# Root of the sysfs tree the topology is read from
+SYS_ROOT = '/sys'
+
+
+def parse_cpu_list(text):
+    """Parse a sysfs CPU list (e.g. '0-3,8-11') into a sorted list of CPU numbers."""
+    cpus = set()
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last if last else first) + 1))
+    return sorted(cpus)
+
+
+def format_cpu_list(cpus):
+    """Format CPU numbers as a taskset CPU list, with ranges for consecutive CPUs (e.g. '0-3,8')."""
+    ranges = []
+    for cpu in sorted(cpus):
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ','.join(f"{first}-{last}" if last > first else f"{first}" for first, last in ranges)
+
+
+def read_text(path):
+    """Read a small sysfs file (None if it does not exist)."""
+    try:
+        with open(path, 'r') as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def online_cpus(sys_root=SYS_ROOT):
+    """The online CPUs (all CPUs visible to this process if sysfs does not list them)."""
+    text = read_text(os.path.join(sys_root, 'devices/system/cpu/online'))
+    return parse_cpu_list(text) if text else sorted(os.sched_getaffinity(0))
+
+
+def numa_domains(sys_root=SYS_ROOT):
+    """The online CPUs of every NUMA node that has any."""
+    online = set(online_cpus(sys_root))
+    domains = []
+    for path in sorted(glob.glob(os.path.join(sys_root, 'devices/system/node/node[0-9]*/cpulist')), key=lambda path: int(path.split('/node')[-1].split('/')[0])):
+        cpus = [cpu for cpu in parse_cpu_list(read_text(path) or '') if cpu in online]
+        if cpus:
+            domains.append(cpus)
+    return domains
+
+
+def llc_domains(sys_root=SYS_ROOT):
+    """The online CPUs sharing each last level cache (the highest cache level of every CPU)."""
+    online = online_cpus(sys_root)
+    domains = {}
+    for cpu in online:
+        caches = []
+        for index in glob.glob(os.path.join(sys_root, f'devices/system/cpu/cpu{cpu}/cache/index[0-9]*')):
+            level = read_text(os.path.join(index, 'level'))
+            shared = read_text(os.path.join(index, 'shared_cpu_list'))
+            if level and shared and read_text(os.path.join(index, 'type')) != 'Instruction':
+                caches.append((int(level), shared))
+        if caches:
+            shared = max(caches)[1]
+            domains.setdefault(shared, [other for other in parse_cpu_list(shared) if other in online])
+    return sorted((cpus for cpus in domains.values() if cpus), key=lambda cpus: cpus[0])
+
+
+def cpu_domains(kind='numa', sys_root=SYS_ROOT):
+    """
+    Split the online CPUs into isolated domains: NUMA nodes ('numa', separate memory controllers) or
+    last level caches ('llc'). Falls back to the other kind and then to one domain of all online CPUs
+    if sysfs does not describe the requested kind.
+    """
+    readers = [numa_domains, llc_domains] if kind == 'numa' else [llc_domains, numa_domains]
+    for reader in readers:
+        domains = reader(sys_root)
+        if domains:
+            return domains
+    return [online_cpus(sys_root)]
+
+
+def physical_cores(cpus, sys_root=SYS_ROOT):
+    """Group CPUs into physical cores (hyperthread siblings together), ordered by their first CPU."""
+    cores = {}
+    for cpu in cpus:
+        topology = os.path.join(sys_root, f'devices/system/cpu/cpu{cpu}/topology')
+        key = (read_text(os.path.join(topology, 'physical_package_id')), read_text(os.path.join(topology, 'core_id')))
+        cores.setdefault(key if key[1] is not None else ('cpu', cpu), []).append(cpu)
+    return sorted(cores.values(), key=lambda core: core[0])
+
+
+def pair_slots(kind='numa', receiver_cores=0, max_pairs=0, sys_root=SYS_ROOT):
+    """
+    Place one transmitter/receiver pair in every domain: the receiver gets the first receiver_cores
+    physical cores of the domain (0 for half of them) and the transmitter the rest. Domains with fewer
+    than two physical cores are left out. Returns the placements (domain kind and index, receiver and
+    transmitter CPU lists) of at most max_pairs pairs (0 for no limit).
+    """
+    slots = []
+    for index, cpus in enumerate(cpu_domains(kind, sys_root)):
+        cores = physical_cores(cpus, sys_root)
+        if len(cores) < 2:
+            continue
+
+        split = min(max(receiver_cores if receiver_cores > 0 else len(cores) // 2, 1), len(cores) - 1)
+        slots.append({
+            'domain': f"{kind}{index}",
+            'receiver_cores': format_cpu_list([cpu for core in cores[:split] for cpu in core]),
+            'transmitter_cores': format_cpu_list([cpu for core in cores[split:] for cpu in core]),
+        })
+
+        if max_pairs > 0 and len(slots) >= max_pairs:
+            break
+
+    return slots
+
+
+if __name__ == "__main__":
+    # Print the domains and pair placements of this machine
+    for kind in ('numa', 'llc'):
+        print(f"{kind}: {' '.join(format_cpu_list(cpus) for cpus in cpu_domains(kind))}")
+        for slot in pair_slots(kind):
+            print(f"  {slot['domain']}: receiver {slot['receiver_cores']}, transmitter {slot['transmitter_cores']}")
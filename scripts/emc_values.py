@@ -1,86 +1,124 @@
-from datetime import datetime
+import re
 
-def parse_transmitter_times(transmitter_file):
+import numpy as np
+
+from timestamps import parse_timestamps
+
+# Utilization fields of a tegrastats line (e.g. 'EMC_FREQ 3%@1600', 'GR3D_FREQ 0%@[305]' or 'GR3D_FREQ 0%')
+TEGRASTATS_FIELD_PATTERN = re.compile(r'(\w+_FREQ) (\d+)%(?:@\[?(\d+))?')
+
+# Per core CPU load and frequency of a tegrastats line (e.g. 'CPU [5%@1510,off,3%@1510]', the frequency
+# is missing for cores without cpufreq in the procfs fallback of telemetry.py)
+TEGRASTATS_CPU_PATTERN = re.compile(r'CPU \[([^\]]*)\]')
+CPU_CORE_PATTERN = re.compile(r'(\d+)%(?:@(\d+))?')
+
+def parse_transmitter_times(transmitter_file, reference_us=None):
     with open(transmitter_file, 'r') as file:
-        lines = file.readlines()
-        
-        # Extract start and end times (ignoring milliseconds)
-        start_time_str = lines[0].split()[1].rsplit(':', 1)[0]  # Remove milliseconds
-        end_time_str = lines[-1].split()[1].rsplit(':', 1)[0]  # Remove milliseconds
-        
-        start_time = datetime.strptime(start_time_str, '%H:%M:%S')
-        end_time = datetime.strptime(end_time_str, '%H:%M:%S')
-        
-        return start_time, end_time
+        lines = [line for line in file if line.startswith(('High', 'Low'))]
 
-def find_max_emc_value(emc_file, start_time, end_time):
-    max_emc_value = 0
-    
+    # Extract start and end times in microseconds (on the tegrastats time base when a reference is given)
+    start_time, end_time = parse_timestamps([lines[0].split()[1], lines[-1].split()[1]], reference_us=reference_us)
+    return start_time, end_time
+
+def load_tegrastats(emc_file, reference_us=None):
+    """
+    Parse a tegrastats log once into the sample times (microseconds since the first midnight, or since
+    the midnight before reference_us) and an array of every field per sample, NaN where a line lacks it.
+    The fields are the utilizations (e.g. EMC_FREQ, GR3D_FREQ) with their frequencies (EMC_FREQ_MHZ,
+    GR3D_FREQ_MHZ) and the mean load and frequency of the online CPU cores (CPU, CPU_MHZ).
+    """
     with open(emc_file, 'r') as file:
-        for line in file:
-            # Extract the time part of the line
-            line_time_str = line.split()[1]
-            line_time = datetime.strptime(line_time_str, '%H:%M:%S')
-            
-            # Check if the time is within the start and end time
-            if start_time <= line_time <= end_time:
-                # Extract the EMC_FREQ value
-                if "EMC_FREQ" in line:
-                    emc_freq_str = line.split("EMC_FREQ")[1].split('%')[0].split()[-1]
-                    emc_value = int(emc_freq_str)
-                    max_emc_value = max(max_emc_value, emc_value)
-    
-    return max_emc_value
+        lines = [line for line in file if line.strip()]
+
+    times = parse_timestamps([line.split()[1] for line in lines], reference_us=reference_us)
+
+    fields = {}
+
+    def store(name, index, value):
+        if name not in fields:
+            fields[name] = np.full(len(lines), np.nan)
+        fields[name][index] = value
+
+    for index, line in enumerate(lines):
+        for name, value, frequency in TEGRASTATS_FIELD_PATTERN.findall(line):
+            store(name, index, int(value))
+            if frequency:
+                store(f"{name}_MHZ", index, int(frequency))
+
+        cpus = TEGRASTATS_CPU_PATTERN.search(line)
+        cores = CPU_CORE_PATTERN.findall(cpus.group(1)) if cpus else []
+        if cores:
+            store("CPU", index, sum(int(load) for load, _ in cores) / len(cores))
+        frequencies = [int(frequency) for _, frequency in cores if frequency]
+        if frequencies:
+            store("CPU_MHZ", index, sum(frequencies) / len(frequencies))
+
+    # Samples in time order (the windows are found with a binary search)
+    order = np.argsort(times, kind='stable')
+    return times[order], {name: values[order] for name, values in fields.items()}
+
+def window_stats(times, values, start_times, end_times):
+    """
+    Mean, maximum and number of the samples within every [start, end] window (0 for windows without
+    samples). The windows are located with a binary search on the sorted sample times, the means come
+    from prefix sums and the maxima from one reduction over the window bounds.
+    """
+    start_times = np.asarray(start_times, dtype=np.int64)
+    end_times = np.asarray(end_times, dtype=np.int64)
+
+    # Only the samples that have the field
+    valid = ~np.isnan(values)
+    times, values = times[valid], values[valid]
+
+    starts = np.searchsorted(times, start_times, side='left')
+    ends = np.maximum(np.searchsorted(times, end_times, side='right'), starts)
+    counts = ends - starts
+
+    prefix = np.concatenate([[0.0], np.cumsum(values)])
+    sums = prefix[ends] - prefix[starts]
+    means = np.divide(sums, counts, out=np.zeros(len(counts)), where=counts > 0)
+
+    # Maxima of the non-empty windows with one reduction over their (start, end) bounds (the sentinel makes an end past the last sample valid)
+    maxima = np.zeros(len(counts))
+    filled = counts > 0
+    if filled.any():
+        bounds = np.stack([starts[filled], ends[filled]], axis=1).reshape(-1)
+        maxima[filled] = np.maximum.reduceat(np.append(values, -np.inf), bounds)[0::2]
+
+    return means, maxima, counts
+
+def find_max_emc_value(emc_file, start_time, end_time):
+    times, fields = load_tegrastats(emc_file)
+    if "EMC_FREQ" not in fields:
+        return 0
+    return window_stats(times, fields["EMC_FREQ"], [start_time], [end_time])[1][0]
 
 def find_average_emc_value(emc_file, start_time, end_time):
-    sum_emc_value = 0
-    count = 0
-    
-    with open(emc_file, 'r') as file:
-        for line in file:
-            # Extract the time part of the line
-            line_time_str = line.split()[1]
-            line_time = datetime.strptime(line_time_str, '%H:%M:%S')
-            
-            # Check if the time is within the start and end time
-            if start_time <= line_time <= end_time:
-                # Extract the EMC_FREQ value
-                if "EMC_FREQ" in line:
-                    emc_freq_str = line.split("EMC_FREQ")[1].split('%')[0].split()[-1]
-                    emc_value = int(emc_freq_str)
-                    sum_emc_value += emc_value
-                    count += 1
-    
-    # Calculate the average
-    if count > 0:
-        average_emc_value = sum_emc_value / count
-    else:
-        average_emc_value = 0  # Handle the case where no values were found
-
-    return average_emc_value
+    times, fields = load_tegrastats(emc_file)
+    if "EMC_FREQ" not in fields:
+        return 0
+    return window_stats(times, fields["EMC_FREQ"], [start_time], [end_time])[0][0]
 
 def main():
     # Specify file names
     transmitter_values = [1073741824, 536870912, 268435456, 134217728, 67108864, 33554432, 16777216]
     receiver_values = [104857600, 52428800, 26214400, 13107200, 6553600, 3276800, 1638400, 1433600, 1228800, 1024000, 819200, 716800, 614400, 512000, 409600, 204800]
+    emc_file = 'logs/buffer_size_experiments_tegrastats.log'
+
+    # Parse the tegrastats log once (its first sample is the reference for midnight rollovers)
+    emc_times, emc_fields = load_tegrastats(emc_file)
+    emc_reference_time = emc_times[0] if len(emc_times) > 0 else None
 
-    for transmitter_size in transmitter_values:
-	    for receiver_size in receiver_values:
-		    transmitter_file = f'logs/transmitter{transmitter_size}_receiver{receiver_size}.log'
-		    emc_file = 'logs/buffer_size_experiments_tegrastats.log'
-		    
-		    # Parse transmitter times
-		    start_time, end_time = parse_transmitter_times(transmitter_file)
-		    
-		    # # Find the maximum EMC value within the time range
-		    # max_emc_value = find_max_emc_value(emc_file, start_time, end_time)
+    # Parse the transmitter times (in microseconds) of every configuration
+    configurations = [(transmitter_size, receiver_size) for transmitter_size in transmitter_values for receiver_size in receiver_values]
+    windows = [parse_transmitter_times(f'logs/transmitter{transmitter_size}_receiver{receiver_size}.log', emc_reference_time) for transmitter_size, receiver_size in configurations]
+    start_times, end_times = zip(*windows)
 
-		    # Find the maximum EMC value within the time range
-		    average_emc_value = find_average_emc_value(emc_file, start_time, end_time)
+    # Find the average and maximum EMC values within every time range at once
+    average_emc_values, max_emc_values, _ = window_stats(emc_times, emc_fields.get("EMC_FREQ", np.full(len(emc_times), np.nan)), start_times, end_times)
 
-		    # print(transmitter_file)
-		    print(f"Average EMC Value between {transmitter_size} and {receiver_size}: {average_emc_value}%") # This can be modified with max_emc_value or average_emc_value
-		    # exit()
+    for (transmitter_size, receiver_size), average_emc_value, max_emc_value in zip(configurations, average_emc_values, max_emc_values):
+        print(f"Average EMC Value between {transmitter_size} and {receiver_size}: {average_emc_value}% (max: {max_emc_value:g}%)")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,53 +1,143 @@
 import numpy as np
 import re
 import argparse
+import csv
+import zlib
+
+from accuracy import calculate_threshold_accuracy, load_accurate_values, optimize_threshold
+from log_merge import merge_microsecond_logs
+from sweep_analysis import parse_values, print_table
+from timestamps import parse_timestamps
+from trace_format import format_time_us
+
+# One line of a merged log ('HH:MM:SS:ms:us, bandwidth ms')
+MERGED_LINE_PATTERN = re.compile(r"(.*?), ([\d.]+) ms")
+
+# Columns of the noise robustness table
+CONFIG_COLUMNS = ['transmitter_size', 'receiver_size', 'time_switch', 'noise_percentage']
+RESULT_COLUMNS = ['accuracy', 'mispredicted', 'bits', 'optimal_threshold', 'optimal_accuracy']
+
 
 # Function to add Gaussian noise to data
-def add_gaussian_noise(data, noise_percentage):
-    noise_std = (noise_percentage / 100) * np.mean(data)
-    noise = np.random.normal(0, noise_std, data.shape)
-    return data + noise
+def add_gaussian_noise(data, noise_percentages, rng=None):
+    """
+    Add Gaussian noise with a standard deviation of noise_percentage percent of the mean of data. With
+    a list of percentages the noise of all of them is drawn at once and the noisy copies are returned as
+    one array with a row per percentage.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    data = np.asarray(data, dtype=np.float64)
+    noise_std = np.asarray(noise_percentages, dtype=np.float64) / 100 * np.mean(data)
+    return data + rng.standard_normal(noise_std.shape + data.shape) * noise_std[..., np.newaxis]
+
+
+def load_merged_trace(merged_file):
+    """Load the time strings and bandwidths of every line of a merged log (read once)."""
+    with open(merged_file, "r") as file:
+        matches = MERGED_LINE_PATTERN.findall(file.read())
+    time_strs = [time_str for time_str, _ in matches]
+    return time_strs, np.array([float(value) for _, value in matches])
+
+
+def config_rng(seed, transmitter_size, receiver_size, time_switch):
+    """Random generator of one configuration (the same noise for a seed, whichever configurations are swept)."""
+    key = zlib.crc32(f"{transmitter_size}_{receiver_size}_{time_switch}".encode())
+    return np.random.default_rng([seed, key])
 
 
-parser = argparse.ArgumentParser(description="Run transmitter and receiver with dynamic log directory.")
+def score_noisy(noisy_values, accurate_values, threshold, optimize=False):
+    """History accuracy of every noisy copy of the bandwidths (one row each). Returns one result row per copy."""
+    rows = []
+    for bandwidths in noisy_values:
+        accuracy, incorrect_indexes, _ = calculate_threshold_accuracy(bandwidths, accurate_values, threshold)
+        row = {'accuracy': round(accuracy, 2), 'mispredicted': len(incorrect_indexes), 'bits': len(bandwidths), 'optimal_threshold': '', 'optimal_accuracy': ''}
+        if optimize:
+            optimal_threshold, optimal_accuracy = optimize_threshold(bandwidths, accurate_values)
+            row['optimal_threshold'] = round(optimal_threshold, 6)
+            row['optimal_accuracy'] = round(optimal_accuracy, 2)
+        rows.append(row)
+    return rows
+
+
+def write_noisy_logs(time_strs, noisy_values, output_files):
+    """Write every noisy copy as a merged log ('time, bandwidth ms' lines)."""
+    for values, output_file in zip(noisy_values, output_files):
+        with open(output_file, "w") as file:
+            file.write("\n".join(f"{time_str}, {noisy_value:.6f} ms" for time_str, noisy_value in zip(time_strs, values)))
+        print(f"Noisy data written to {output_file}")
+
+
+def save_noisy_trace(output_file, time_strs, noise_percentages, noisy_values, seed):
+    """Store the noisy copies of a merged log compactly (.npz: times in us, percentages and float32 bandwidths)."""
+    np.savez_compressed(
+        output_file,
+        times_us=parse_timestamps(time_strs),
+        noise_percentages=np.asarray(noise_percentages, dtype=np.float64),
+        bandwidths=np.asarray(noisy_values, dtype=np.float32),
+        seed=seed,
+    )
+
+
+parser = argparse.ArgumentParser(description="Score the merged logs of a time switch sweep with Gaussian noise of several strengths.")
 parser.add_argument("--log_dir", type=str, required=True, help="Directory to store the log files for both transmitter and receiver, generally logs/.")
+parser.add_argument("--transmitter_values", type=parse_values, default=[16777216], help="Comma separated transmitter buffer sizes.")
+parser.add_argument("--receiver_values", type=parse_values, default=[32000000, 16000000], help="Comma separated receiver buffer sizes.")
+parser.add_argument("--time_switch_values", type=parse_values, default=[8, 4, 2, 1, 0.5, 0.25], help="Comma separated time switch values.")
+parser.add_argument("--noise_values", type=parse_values, default=[1, 2, 4, 5, 8, 10, 15, 20, 25, 30, 40, 50], help="Comma separated noise percentages (standard deviation in percent of the mean bandwidth).")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the noise (every configuration gets its own stream of it).")
+parser.add_argument("--threshold", type=float, default=0.30, help="Threshold for percentage increase or decrease.")
+parser.add_argument("--optimizeThreshold", type=lambda x: (str(x).lower() == 'true'), default=False, help="Also search the threshold with the highest accuracy for every noise percentage. Default is False.")
+parser.add_argument("--fromLogs", type=lambda x: (str(x).lower() == 'true'), default=False, help="Merge the transmitter and receiver logs in memory instead of reading the merged logs. Default is False.")
+parser.add_argument("--writeLogs", type=lambda x: (str(x).lower() == 'true'), default=False, help="Also write every noisy copy as a merged log (..._noise<percentage>.log). Default is False.")
+parser.add_argument("--saveTrace", type=lambda x: (str(x).lower() == 'true'), default=False, help="Also store the noisy copies of every configuration as ..._noise.npz. Default is False.")
+parser.add_argument("--output", type=str, default=None, help="Optional CSV file for the result table.")
 
-# Parse the command-line arguments
-args = parser.parse_args()
 
-transmitter_values = [16777216]#, 536870912, 268435456, 134217728, 67108864, 33554432, 16777216]
-receiver_values = [32000000, 16000000]
-time_switch_list = [8,4,2,1,0.5,0.25]
-noise_percentage_values = [1,2,4,5,8,10,15,20,25,30,40,50]
+if __name__ == "__main__":
+    # Parse the command-line arguments
+    args = parser.parse_args()
 
-for transmitter_size in transmitter_values:
-    for receiver_size in receiver_values:
-        for time_switch in time_switch_list:
-            for noise_percentage in noise_percentage_values:
+    rows = []
+    for transmitter_size in args.transmitter_values:
+        for receiver_size in args.receiver_values:
+            for time_switch in args.time_switch_values:
 
                 # File paths
+                transmitter_file = f"{args.log_dir}/time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}.log"
+                receiver_file = f"{args.log_dir}/time_switch{time_switch}_receiver{receiver_size}_transmitter{transmitter_size}.log"
                 input_file = f"{args.log_dir}/merged_time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}.log"
-                output_file = f"{args.log_dir}/merged_time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}_noise{noise_percentage}.log"
 
-                # Read and process data from input file
-                with open(input_file, "r") as file:
-                    content = file.read()
+                if args.fromLogs:
+                    # Merge in memory (every bit is scored against the bit transmitted during it)
+                    merged = merge_microsecond_logs(transmitter_file, receiver_file)
+                    time_strs, values, accurate_values = [format_time_us(time) for time in merged['time'].tolist()], merged['bandwidth'], merged['bit'].tolist()
+                    bits = len(values)
+                else:
+                    # Read the merged log once (like analysis_microsecond.py, its last line is not scored)
+                    time_strs, values = load_merged_trace(input_file)
+                    accurate_values = load_accurate_values(transmitter_file, skip_lines=1)
+                    bits = len(values) - 1
+
+                # Draw the noise of every percentage together
+                rng = config_rng(args.seed, transmitter_size, receiver_size, time_switch)
+                values_noisy = add_gaussian_noise(values, args.noise_values, rng)
 
-                # Extract values from the file content using regex to match the pattern
-                values = np.array([float(x) for x in re.findall(r", ([\d.]+) ms", content)])
+                # Score the noise free bandwidths and every noisy copy in memory
+                results = score_noisy(np.vstack([values, values_noisy])[:, :bits], accurate_values, args.threshold, args.optimizeThreshold)
+                for noise_percentage, result in zip([0] + args.noise_values, results):
+                    rows.append(dict(zip(CONFIG_COLUMNS, (transmitter_size, receiver_size, time_switch, noise_percentage)), **result))
 
-                # Add Gaussian noise to the extracted values
-                values_noisy = add_gaussian_noise(values, noise_percentage)
+                if args.writeLogs:
+                    output_files = [f"{args.log_dir}/merged_time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}_noise{noise_percentage}.log" for noise_percentage in args.noise_values]
+                    write_noisy_logs(time_strs, values_noisy, output_files)
 
-                # Prepare new content with noisy values
-                lines = re.findall(r"(.*?, [\d.]+ ms)", content)  # capture entire line format
-                noisy_content = "\n".join(
-                    f"{line.split(',')[0]}, {noisy_value:.6f} ms"
-                    for line, noisy_value in zip(lines, values_noisy)
-                )
+                if args.saveTrace:
+                    save_noisy_trace(f"{args.log_dir}/merged_time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}_noise.npz", time_strs, args.noise_values, values_noisy, args.seed)
 
-                # Write the noisy data to the output file
-                with open(output_file, "w") as file:
-                    file.write(noisy_content)
+    print_table(rows, CONFIG_COLUMNS + RESULT_COLUMNS)
 
-                print(f"Noisy data written to {output_file}")
+    if args.output:
+        with open(args.output, 'w', newline='') as out_file:
+            writer = csv.DictWriter(out_file, fieldnames=CONFIG_COLUMNS + RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
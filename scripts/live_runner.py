@@ -0,0 +1,139 @@
+from collections import deque
+
+from timestamps import MidnightUnwrapper, parse_timestamp
+
+
+class LiveMerger:
+    """
+    Average the receiver bandwidth between consecutive transmitter bits while both programs are running.
+
+    Produces the same merged log as the streaming merge of the complete logs (log_merge.microsecond_merge_records,
+    'HH:MM:SS:ms:us, bandwidth ms' per bit). A bit is written as soon as a receiver
+    sample after its end has arrived, so only the samples of the current bit (and the transmitter times
+    that are not merged yet) are kept in memory.
+    """
+
+    def __init__(self, out_file, warmup_lines=34):
+        self.out_file = out_file
+        self.warmup_lines = warmup_lines
+
+        self.receiver_lines = 0
+        self.receiver_unwrap = None
+        self.receiver_done = False
+        self.summary = False
+        self.samples = deque()
+
+        # Transmitter times wait for the first receiver sample (their time base) before they are converted
+        self.raw_symbols = []
+        self.transmitter_unwrap = None
+        self.transmitter_done = False
+        self.symbols = deque()
+
+        # Current bit
+        self.bandwidth_sum = 0
+        self.receiver_count = 0
+        self.bit_count = 0
+
+    def add_receiver_line(self, r_line):
+        """Add one line of the receiver output (the warmup lines, the bandwidthTest summary and lines that are not samples are skipped)."""
+        self.receiver_lines += 1
+        if self.receiver_lines <= self.warmup_lines or self.receiver_done:
+            return
+
+        # Stop at the bandwidthTest summary
+        if "Device to Device" in r_line:
+            self.summary = True
+            self.receiver_done = True
+            self.samples.clear()
+            return
+
+        # Skip the lines that are not 'HH:MM:SS:ms:us & bandwidth' samples (e.g. blank lines)
+        fields = r_line.split()
+        try:
+            r_time, bandwidth = parse_timestamp(fields[0]), float(fields[2])
+        except (IndexError, ValueError):
+            return
+
+        if self.receiver_unwrap is None:
+            self.receiver_unwrap = MidnightUnwrapper(r_time)
+            self._convert_symbols(r_time)
+        self.samples.append((self.receiver_unwrap(r_time), bandwidth))
+        self._merge()
+
+    def add_transmitter_line(self, t_line):
+        """Add one line of the transmitter output ('Low|High HH:MM:SS:ms:us')."""
+        if "Transmitter runs" in t_line:
+            return
+
+        # Skip the lines that are not bits (e.g. blank lines)
+        fields = t_line.split()
+        try:
+            t_time_str = fields[1]
+            t_time = parse_timestamp(t_time_str)
+        except (IndexError, ValueError):
+            return
+
+        self.raw_symbols.append((t_time_str, t_time))
+        if self.receiver_unwrap is not None:
+            self._convert_symbols()
+        self._merge()
+
+    def end_receiver(self):
+        """Mark the end of the receiver output."""
+        self.receiver_done = True
+        self._convert_symbols()
+        self._merge()
+
+    def end_transmitter(self):
+        """Mark the end of the transmitter output."""
+        self.transmitter_done = True
+        self._merge()
+
+    def finish(self):
+        """Write the last bit once both outputs ended (returns the number of merged bits)."""
+        self.end_receiver()
+        self.end_transmitter()
+
+        # The samples ran out during the current bit (unless the receiver stopped at the bandwidthTest summary)
+        if not self.summary and len(self.symbols) >= 2:
+            self._write_bit()
+
+        return self.bit_count
+
+    def _convert_symbols(self, reference_us=None):
+        """Put the buffered transmitter times on the receiver's time base (across midnight)."""
+        for t_time_str, t_time in self.raw_symbols:
+            if self.transmitter_unwrap is None:
+                self.transmitter_unwrap = MidnightUnwrapper(reference_us if reference_us is not None else t_time)
+            self.symbols.append((t_time_str, self.transmitter_unwrap(t_time)))
+        self.raw_symbols = []
+
+    def _write_bit(self):
+        """Write the average bandwidth of the current bit (if it has samples) and move to the next bit."""
+        if self.receiver_count > 0:
+            self.out_file.write(f"{self.symbols[0][0]}, {self.bandwidth_sum / self.receiver_count:.6f} ms\n")
+            self.bit_count += 1
+        self.bandwidth_sum = 0
+        self.receiver_count = 0
+        self.symbols.popleft()
+
+    def _merge(self):
+        """Merge the samples as far as the times that arrived so far allow."""
+        while len(self.symbols) >= 2 and self.samples:
+            t_start_time = self.symbols[0][1]
+            t_end_time = self.symbols[1][1]
+            r_time, r_bw = self.samples[0]
+
+            # Check if receiver time is within the transmitter time range
+            if t_start_time <= r_time <= t_end_time:
+                self.bandwidth_sum += r_bw
+                self.receiver_count += 1
+                self.samples.popleft()
+            elif r_time > t_end_time:
+                self._write_bit()
+            else:
+                self.samples.popleft()
+
+        # Samples after the last transmitter bit are never merged
+        if self.transmitter_done and len(self.symbols) < 2:
+            self.samples.clear()
@@ -0,0 +1,576 @@
+from collections import deque
+from itertools import chain, islice, pairwise
+import re
+
+import numpy as np
+
+from timestamps import parse_timestamp_chunks, unwrap_midnight
+from trace_format import RECEIVER_RUN, TRANSMITTER_HIGH, format_time_us, is_trace_file, read_trace, trace_time_us
+
+# Receiver sample line (e.g. '21:51:39:871    &   65.535')
+RECEIVER_LINE_PATTERN = re.compile(r'(\d{2}:\d{2}:\d{2}:\d{3})\s+&\s+(\d+(\.\d+)?)')
+
+# Number of lines (or trace records) that are read and parsed at a time
+CHUNK_LINES = 65536
+
+# Marks the end of the samples in a bandwidthTest log (the summary that follows is not part of the trace)
+BANDWIDTH_TEST_SUMMARY = object()
+
+# One merged bit: start time of its window (microseconds on the receiver's time base), average
+# receiver bandwidth over the window, the transmitted bit and the number, minimum, maximum and median
+# of the receiver samples in the window
+MERGED_DTYPE = np.dtype([('time', '<i8'), ('bandwidth', '<f8'), ('bit', 'i1'), ('count', '<i8'), ('min', '<f8'), ('max', '<f8'), ('median', '<f8')])
+
+
+def read_line_chunks(lines, chunk_lines=CHUNK_LINES):
+    """Yield lists of at most chunk_lines lines from an iterable of lines (e.g. an open file)."""
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_lines))
+        if not chunk:
+            return
+        yield chunk
+
+
+def receiver_sample_chunks(r_file, warmup_lines=32, chunk_lines=CHUNK_LINES):
+    """Yield the (times, bandwidths) of an 'HH:MM:SS:ms & bandwidth' receiver log, chunk by chunk."""
+    def columns():
+        # Ignore the warmup lines and anything that is not a sample
+        for lines in read_line_chunks(islice(r_file, warmup_lines, None), chunk_lines):
+            matches = [match for match in (RECEIVER_LINE_PATTERN.match(r_line.strip()) for r_line in lines) if match]
+            yield [match.group(1) for match in matches], [float(match.group(2)) for match in matches]
+
+    yield from parse_timestamp_chunks(columns())
+
+
+def receiver_samples(r_file, warmup_lines=32, chunk_lines=CHUNK_LINES):
+    """Yield the (time, bandwidth) samples of an 'HH:MM:SS:ms & bandwidth' receiver log, chunk by chunk."""
+    for times, bandwidths in receiver_sample_chunks(r_file, warmup_lines, chunk_lines):
+        yield from zip(times.tolist(), bandwidths)
+
+
+class ReceiverBuffer:
+    """
+    Receiver samples of a merge, read chunk by chunk: only the samples from the start of the first window
+    that is still open to the last chunk read are kept. Samples are addressed by their index in the
+    whole log (base is the index of the first kept sample).
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.times = np.zeros(0, dtype=np.int64)
+        self.values = np.zeros(0)
+        self.base = 0
+        self.done = False
+        self.summary = False
+        self.backwards = False
+
+    @property
+    def end(self):
+        """Index after the last sample read."""
+        return self.base + len(self.times)
+
+    def read(self):
+        """Read the next chunk (False once the log ended, at its end or at the bandwidthTest summary)."""
+        chunk = next(self.chunks, None)
+        if chunk is None or chunk is BANDWIDTH_TEST_SUMMARY:
+            self.done = True
+            self.summary = chunk is BANDWIDTH_TEST_SUMMARY
+            return False
+
+        times = np.asarray(chunk[0], dtype=np.int64)
+        if len(times) > 0:
+            # The binary search needs the receiver times in order
+            self.backwards |= bool(np.any(times[1:] < times[:-1])) or (len(self.times) > 0 and times[0] < self.times[-1])
+            self.times = np.concatenate([self.times, times])
+            self.values = np.concatenate([self.values, np.asarray(chunk[1], dtype=np.float64)])
+        return True
+
+    def search(self, times, side):
+        """Index of the first sample at or after (left) or after (right) every time, among the kept samples."""
+        return self.base + np.searchsorted(self.times, times, side=side)
+
+    def drop_before(self, index):
+        """Forget the samples before an index (no later window starts before it)."""
+        if index > self.base:
+            self.times = self.times[index - self.base:]
+            self.values = self.values[index - self.base:]
+            self.base = index
+
+    def statistics(self, starts, ends):
+        """window_statistics of the kept samples for windows given by their indexes in the whole log."""
+        return window_statistics(self.values, starts - self.base, ends - self.base)
+
+
+def sequential_sums(values, starts, counts, dense_windows=64):
+    """
+    Sum values[start:start + count] of every window in order (0 + v0 + v1 + ...), like the streaming
+    merges, so the averages are identical to theirs to the last bit. All windows are advanced by one
+    value at a time (longest first, so the windows that still have values are a prefix); once fewer than
+    dense_windows remain, each of them is finished with one accumulation.
+    """
+    sums = np.zeros(len(counts))
+    order = np.argsort(-counts, kind='stable')
+    descending = -counts[order]
+
+    position = 0
+    while True:
+        # Windows with more than position values
+        active = int(np.searchsorted(descending, -position, side='left'))
+        if active == 0:
+            break
+        if active < dense_windows:
+            for window in order[:active].tolist():
+                tail = values[starts[window] + position:starts[window] + counts[window]]
+                sums[window] = np.add.accumulate(np.concatenate([[sums[window]], tail]))[-1]
+            break
+
+        windows = order[:active]
+        sums[windows] += values[starts[windows] + position]
+        position += 1
+
+    return sums
+
+
+def window_statistics(values, starts, ends):
+    """
+    Sum, number, minimum, maximum and median of values[start:end] for every pair of bounds (the windows
+    may overlap, empty windows get zeros). The sums are added in order (see sequential_sums), the
+    minima and maxima are one reduction over the bounds of all windows and the medians come from
+    sorting the values of all windows by window and value at once.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.maximum(np.asarray(ends, dtype=np.int64), starts)
+    counts = ends - starts
+
+    sums, minima, maxima, medians = (np.zeros(len(counts)) for _ in range(4))
+    filled = counts > 0
+    if filled.any():
+        # (start, end) bounds of the non-empty windows (the padding makes an end past the last value valid)
+        bounds = np.stack([starts[filled], ends[filled]], axis=1).reshape(-1)
+        padded = np.append(np.asarray(values, dtype=np.float64), 0.0)
+        sums[filled] = sequential_sums(padded, starts[filled], counts[filled])
+        minima[filled] = np.minimum.reduceat(padded, bounds)[0::2]
+        maxima[filled] = np.maximum.reduceat(padded, bounds)[0::2]
+
+        # The values of every window one after the other, sorted within their window
+        window_counts = counts[filled]
+        offsets = np.concatenate([[0], np.cumsum(window_counts)[:-1]])
+        members = padded[np.arange(offsets[-1] + window_counts[-1]) + np.repeat(starts[filled] - offsets, window_counts)]
+        windows = np.repeat(np.arange(len(window_counts)), window_counts)
+        members = members[np.lexsort((members, windows))]
+        medians[filled] = (members[offsets + (window_counts - 1) // 2] + members[offsets + window_counts // 2]) / 2
+
+    return sums, counts, minima, maxima, medians
+
+
+def transmitter_symbols(t_file, reference_us=None, chunk_lines=CHUNK_LINES):
+    """
+    Yield (time string, time, next time, bit) for every line of a 'Low|High HH:MM:SS:ms' transmitter log.
+
+    The next time is the time the symbol window ends at (None for the last line). A line repeating an
+    earlier line with the same timestamp always ended at its own time, which is kept for identical
+    output (only the lines sharing the current timestamp are remembered for this).
+    """
+    def lines_with_times():
+        chunks = (([t_line.strip().split()[1] for t_line in lines], lines) for lines in read_line_chunks(t_file, chunk_lines))
+        for times, lines in parse_timestamp_chunks(chunks, reference_us=reference_us):
+            for t_line, t_time in zip(lines, times.tolist()):
+                t_type, t_time_str = t_line.strip().split()
+                yield t_line, t_time_str, t_time, int(t_type == 'High')
+
+    group_time_str = None
+    group_lines = set()
+    current = None
+    for following in chain(lines_with_times(), [None]):
+        if current is not None:
+            t_line, t_time_str, t_time, bit = current
+
+            # Lines already seen at this timestamp
+            if t_time_str != group_time_str:
+                group_time_str = t_time_str
+                group_lines = set()
+
+            if t_line in group_lines:
+                yield t_time_str, t_time, t_time, bit
+            else:
+                yield t_time_str, t_time, following[2] if following is not None else None, bit
+
+            group_lines.add(t_line)
+        current = following
+
+
+def merge_records(transmitter_file, receiver_file, warmup_lines=32, chunk_lines=CHUNK_LINES):
+    """
+    Average the receiver bandwidth over every transmitter symbol window and yield (time string, time,
+    average bandwidth, bit) per symbol.
+
+    Both logs are streamed in chunks of chunk_lines lines and walked with a single cursor each, so the
+    merge is linear in the size of the logs and only keeps the current symbol window in memory.
+    """
+    with open(transmitter_file, 'r') as t_file, open(receiver_file, 'r') as r_file:
+        samples = receiver_samples(r_file, warmup_lines, chunk_lines)
+
+        # The transmitter times are put on the receiver's time base (across midnight)
+        first_sample = next(samples, None)
+        samples = chain([first_sample], samples) if first_sample is not None else iter(())
+        symbols = transmitter_symbols(t_file, first_sample[0] if first_sample is not None else None, chunk_lines)
+
+        # Receiver samples from the current start index on (just enough to cover the current window)
+        window = deque()
+
+        def fill(index):
+            """Read receiver samples until window[index] exists (False once the log is exhausted)."""
+            while len(window) <= index:
+                sample = next(samples, None)
+                if sample is None:
+                    return False
+                window.append(sample)
+            return True
+
+        end_offset = 0
+        previous_next_t_time = None
+
+        for t_time_str, t_time, next_t_time, bit in symbols:
+            # Find the closest receiver time that is after the current transmitter time
+            while fill(0) and window[0][0] < t_time:
+                window.popleft()
+                end_offset = max(end_offset - 1, 0)
+
+            if not window:
+                break
+
+            # Calculate the average bandwidth (summed in order to keep the exact floating point result)
+            total_bandwidth = 0
+            count = 0
+
+            if next_t_time is not None:
+                # The previous end is only a valid starting point while the window ends keep increasing
+                if previous_next_t_time is not None and next_t_time < previous_next_t_time:
+                    end_offset = 0
+
+                # Find the end of the window (first sample after the next transmitter time)
+                while fill(end_offset) and window[end_offset][0] <= next_t_time:
+                    end_offset += 1
+
+                previous_next_t_time = next_t_time
+
+                for _, r_bandwidth in islice(window, 0, end_offset):
+                    total_bandwidth += r_bandwidth
+                    count += 1
+            else:
+                # The last window extends to the end of the receiver log
+                for _, r_bandwidth in chain(window, samples):
+                    total_bandwidth += r_bandwidth
+                    count += 1
+
+            yield t_time_str, t_time, total_bandwidth / count if count > 0 else 0, bit
+
+
+def merge_logs(transmitter_file, receiver_file, output_file=None, warmup_lines=32, chunk_lines=CHUNK_LINES):
+    """
+    Merge a transmitter and receiver log into an array of MERGED_DTYPE with one entry per symbol (the
+    windows of merge_records). With output_file the merged log is written as well ('time, bandwidth GB/s'
+    per symbol and the average of the non-zero bandwidths at the end).
+
+    Both logs are read in chunks of chunk_lines lines. The windows of the symbols whose bounds are
+    within the receiver samples read so far are joined with them by a binary search and their
+    statistics are reduced at once (see window_statistics); the samples before the open windows are
+    dropped. Receiver logs whose times go backwards are merged with merge_records instead.
+    """
+    with open(transmitter_file, 'r') as t_file, open(receiver_file, 'r') as r_file:
+        receiver = ReceiverBuffer(receiver_sample_chunks(r_file, warmup_lines, chunk_lines))
+        while len(receiver.times) == 0 and receiver.read():
+            pass
+
+        # The transmitter times are put on the receiver's time base (across midnight)
+        symbols = transmitter_symbols(t_file, int(receiver.times[0]) if len(receiver.times) > 0 else None, chunk_lines)
+
+        columns = []
+        previous_start = 0
+        for batch in read_line_chunks(symbols, chunk_lines):
+            t_time_strs, t_times, next_t_times, bits = zip(*batch)
+            last = np.array([next_t_time is None for next_t_time in next_t_times])
+            t_times = np.array(t_times, dtype=np.int64)
+            next_t_times = np.array([next_t_time if next_t_time is not None else 0 for next_t_time in next_t_times], dtype=np.int64)
+            bits = np.array(bits, dtype=np.int8)
+
+            index = 0
+            while index < len(batch):
+                if receiver.backwards:
+                    return write_merged_log(list(merge_records(transmitter_file, receiver_file, warmup_lines, chunk_lines)), output_file, footer=True)
+
+                # Symbols whose window bounds are among the samples read so far (all of them at the end of the log)
+                count = len(batch) - index
+                if not receiver.done:
+                    last_time = receiver.times[-1] if len(receiver.times) > 0 else np.iinfo(np.int64).min
+                    bounded = ~last[index:] & (next_t_times[index:] < last_time) & (t_times[index:] <= last_time)
+                    count = int(np.argmin(bounded)) if not bounded.all() else count
+                    if count == 0:
+                        receiver.read()
+                        continue
+                window = slice(index, index + count)
+
+                # A window starts at the first sample at or after its symbol (never before the start of the previous
+                # window) and ends after the last sample up to the next symbol (the last window at the end of the log)
+                starts = np.maximum.accumulate(np.maximum(receiver.search(t_times[window], 'left'), previous_start))
+                ends = np.where(last[window], receiver.end, receiver.search(next_t_times[window], 'right'))
+
+                # The merge stops at the first symbol after the last sample
+                merged_count = int(np.searchsorted(starts, receiver.end, side='left'))
+                sums, counts, minima, maxima, medians = receiver.statistics(starts[:merged_count], ends[:merged_count])
+                averages = np.divide(sums, counts, out=np.zeros(merged_count), where=counts > 0)
+                columns.append((list(t_time_strs[window])[:merged_count], t_times[window][:merged_count], averages, bits[window][:merged_count], counts, minima, maxima, medians))
+
+                if merged_count < count:
+                    return write_merged_log(concatenate_columns(columns), output_file, footer=True, columns=True)
+
+                previous_start = int(starts[-1])
+                receiver.drop_before(previous_start)
+                index += count
+
+    return write_merged_log(concatenate_columns(columns), output_file, footer=True, columns=True)
+
+
+def concatenate_columns(columns):
+    """Join the (time strings, times, averages, bits, counts, minima, maxima, medians) columns of the windows merged chunk by chunk."""
+    if not columns:
+        return [], np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0), np.zeros(0)
+    return [t_time_str for chunk in columns for t_time_str in chunk[0]], *(np.concatenate([chunk[field] for chunk in columns]) for field in range(1, 8))
+
+
+def merge_files_with_transmitterTiming_and_receiverBW(transmitter_file, receiver_file, output_file, warmup_lines=32, chunk_lines=CHUNK_LINES):
+    """
+    Average the receiver bandwidth over every transmitter symbol window and write the merged log
+    (see merge_logs). The output is identical to the original line-by-line implementation (including
+    the average line at the end of the file).
+    """
+    merge_logs(transmitter_file, receiver_file, output_file, warmup_lines, chunk_lines)
+
+
+def write_merged_log(records, output_file=None, footer=False, columns=False):
+    """
+    Build the MERGED_DTYPE array of a merge from its (time string, time, average bandwidth, bit)
+    records, or from the columns (time strings, times, averages, bits, counts, minima, maxima,
+    medians) of a vectorized merge, and write the merged log to output_file (if any). The millisecond
+    logs ('time, bandwidth GB/s' per symbol) end with the average of the non-zero bandwidths (footer),
+    the microsecond logs ('time, bandwidth ms' per bit) have no footer.
+    """
+    if not columns:
+        records = list(zip(*records)) if records else [[], [], [], []]
+    t_time_strs, times, bandwidths, bits = records[:4]
+
+    merged = np.zeros(len(t_time_strs), dtype=MERGED_DTYPE)
+    merged['time'] = times
+    merged['bandwidth'] = bandwidths
+    merged['bit'] = bits
+    if columns:
+        merged['count'], merged['min'], merged['max'], merged['median'] = records[4:]
+
+    if output_file:
+        bandwidth_list = merged['bandwidth'].tolist()
+        with open(output_file, 'w') as out_file:
+            if footer:
+                out_file.writelines(f'{t_time_str}, {average_bandwidth:.3f} GB/s\n' for t_time_str, average_bandwidth in zip(t_time_strs, bandwidth_list))
+
+                # Average of the bits that have a bandwidth (summed in order, like the original)
+                measured = merged['bandwidth'][merged['bandwidth'] > 0]
+                total = np.add.accumulate(np.concatenate([[0.0], measured]))[-1]
+                out_file.write(f'Average: {total / len(measured) if len(measured) > 0 else 0:.3f} GB/s\n')
+            else:
+                out_file.writelines(f"{t_time_str}, {average_bandwidth:.6f} ms\n" for t_time_str, average_bandwidth in zip(t_time_strs, bandwidth_list))
+
+    return merged
+
+
+def microsecond_receiver_chunks(receiver_file, warmup_lines=34, chunk_lines=CHUNK_LINES):
+    """
+    Yield the (times, bandwidths) of an 'HH:MM:SS:ms:us & bandwidth' receiver log or a binary receiver
+    trace, chunk by chunk. BANDWIDTH_TEST_SUMMARY is yielded if the log ends with the bandwidthTest
+    summary.
+    """
+    # Binary traces mark the warmup samples explicitly
+    if is_trace_file(receiver_file):
+        records = read_trace(receiver_file)
+        for start in range(0, len(records), chunk_lines):
+            chunk = records[start:start + chunk_lines]
+            run = chunk[chunk['type'] == RECEIVER_RUN]
+            yield trace_time_us(run['time'], reference_ns=int(records['time'][0])), run['bandwidth'].tolist()
+        return
+
+    with open(receiver_file, 'r') as r_file:
+        summary = []
+
+        def columns():
+            # Ignore the first 32 warmup lines in receiver and stop at the bandwidthTest summary
+            for lines in read_line_chunks(islice(r_file, warmup_lines, None), chunk_lines):
+                for r_index, r_line in enumerate(lines):
+                    if "Device to Device" in r_line:
+                        summary.append(r_index)
+                        lines = lines[:r_index]
+                        break
+
+                receiver_fields = [r_line.split() for r_line in lines]
+                yield [fields[0] for fields in receiver_fields], [float(fields[2]) for fields in receiver_fields]
+
+                if summary:
+                    return
+
+        yield from parse_timestamp_chunks(columns())
+
+        if summary:
+            yield BANDWIDTH_TEST_SUMMARY
+
+
+def microsecond_receiver_samples(receiver_file, warmup_lines=34, chunk_lines=CHUNK_LINES):
+    """
+    Yield the (time, bandwidth) samples of an 'HH:MM:SS:ms:us & bandwidth' receiver log or a binary
+    receiver trace, chunk by chunk. BANDWIDTH_TEST_SUMMARY is yielded if the log ends with the
+    bandwidthTest summary.
+    """
+    for chunk in microsecond_receiver_chunks(receiver_file, warmup_lines, chunk_lines):
+        if chunk is BANDWIDTH_TEST_SUMMARY:
+            yield chunk
+        else:
+            yield from zip(chunk[0].tolist(), chunk[1])
+
+
+def microsecond_transmitter_times(transmitter_file, reference_us=None, chunk_lines=CHUNK_LINES):
+    """Yield (time string, time, bit) for every bit of an 'Low|High HH:MM:SS:ms:us' transmitter log or a binary transmitter trace."""
+    if is_trace_file(transmitter_file):
+        records = read_trace(transmitter_file)
+        shift = None
+        for start in range(0, len(records), chunk_lines):
+            t_times = trace_time_us(records['time'][start:start + chunk_lines], reference_ns=int(records['time'][0]))
+
+            # Put the whole trace on the reference's time base (across midnight)
+            if shift is None:
+                shift = unwrap_midnight(t_times[:1], reference_us)[0] - t_times[0]
+            t_times = t_times + shift
+
+            t_bits = (records['type'][start:start + chunk_lines] == TRANSMITTER_HIGH).astype(int).tolist()
+            yield from ((format_time_us(t_time), t_time, bit) for t_time, bit in zip(t_times.tolist(), t_bits))
+        return
+
+    with open(transmitter_file, 'r') as t_file:
+        # Process both "Low" and "High" transmitter lines
+        t_lines = (t_line for t_line in t_file if "Transmitter runs" not in t_line)
+        t_field_chunks = ([t_line.strip().split() for t_line in lines] for lines in read_line_chunks(t_lines, chunk_lines))
+
+        # Convert the transmitter times chunk by chunk (on the receiver's time base, across midnight)
+        chunks = (([fields[1] for fields in t_fields], t_fields) for t_fields in t_field_chunks)
+        for t_times, t_fields in parse_timestamp_chunks(chunks, reference_us=reference_us):
+            yield from ((fields[1], t_time, int("High" in fields[0])) for fields, t_time in zip(t_fields, t_times.tolist()))
+
+
+def microsecond_merge_records(transmitter_file, receiver_file, warmup_lines=34, chunk_lines=CHUNK_LINES):
+    """
+    Average the receiver bandwidth between consecutive transmitter bits and yield (time string, time,
+    average bandwidth, bit) for every pair of bits with receiver samples in between. The microsecond
+    transmitter logs time the end of every bit, so the bit of a window is the one that ends it. Both
+    logs are streamed in chunks of chunk_lines lines.
+    """
+    samples = microsecond_receiver_samples(receiver_file, warmup_lines, chunk_lines)
+
+    # The transmitter times are put on the receiver's time base (across midnight)
+    sample = next(samples, None)
+    reference_us = sample[0] if sample is not None and sample is not BANDWIDTH_TEST_SUMMARY else None
+    symbols = microsecond_transmitter_times(transmitter_file, reference_us, chunk_lines)
+
+    for (t_time_str, t_start_time, _), (_, t_end_time, bit) in pairwise(symbols):
+        # Collect all receiver bandwidth values between the current and next transmitter times
+        bandwidth_sum = 0
+        receiver_count = 0
+
+        while sample is not None:
+            # Stop at the bandwidthTest summary
+            if sample is BANDWIDTH_TEST_SUMMARY:
+                return
+
+            r_time, r_bw = sample
+
+            # Check if receiver time is within the transmitter time range
+            if t_start_time <= r_time <= t_end_time:
+                bandwidth_sum += r_bw
+                receiver_count += 1
+            elif r_time > t_end_time:
+                break
+
+            sample = next(samples, None)
+
+        if receiver_count > 0:
+            # Calculate the average bandwidth
+            yield t_time_str, t_start_time, bandwidth_sum / receiver_count, bit
+
+
+def merge_microsecond_logs(transmitter_file, receiver_file, output_file=None, warmup_lines=34, chunk_lines=CHUNK_LINES):
+    """
+    Merge a microsecond transmitter and receiver log into an array of MERGED_DTYPE with one entry per
+    bit (the windows of microsecond_merge_records). With output_file the merged log is written as well
+    ('HH:MM:SS:ms:us, bandwidth ms' per bit).
+
+    Both logs are read in chunks of chunk_lines lines. The windows of the bits whose end is within the
+    receiver samples read so far are joined with them by a binary search and their statistics are
+    reduced at once (see window_statistics); the samples that earlier windows used are dropped.
+    Receiver logs whose times go backwards are merged with microsecond_merge_records instead.
+    """
+    receiver = ReceiverBuffer(microsecond_receiver_chunks(receiver_file, warmup_lines, chunk_lines))
+    while len(receiver.times) == 0 and receiver.read():
+        pass
+
+    # The transmitter times are put on the receiver's time base (across midnight)
+    symbols = microsecond_transmitter_times(transmitter_file, int(receiver.times[0]) if len(receiver.times) > 0 else None, chunk_lines)
+
+    columns = []
+    previous_end = 0
+    for batch in read_line_chunks(pairwise(symbols), chunk_lines):
+        t_time_strs = [start_symbol[0] for start_symbol, _ in batch]
+        t_start_times = np.array([start_symbol[1] for start_symbol, _ in batch], dtype=np.int64)
+        t_end_times = np.array([end_symbol[1] for _, end_symbol in batch], dtype=np.int64)
+        bits = np.array([end_symbol[2] for _, end_symbol in batch], dtype=np.int8)
+
+        index = 0
+        while index < len(batch):
+            if receiver.backwards:
+                return write_merged_log(list(microsecond_merge_records(transmitter_file, receiver_file, warmup_lines, chunk_lines)), output_file)
+
+            # Bits whose window ends before the last sample read so far (all of them at the end of the log)
+            count = len(batch) - index
+            if not receiver.done:
+                last_time = receiver.times[-1] if len(receiver.times) > 0 else np.iinfo(np.int64).min
+                bounded = t_end_times[index:] < last_time
+                count = int(np.argmin(bounded)) if not bounded.all() else count
+                if count == 0:
+                    receiver.read()
+                    continue
+            window = slice(index, index + count)
+
+            # Every sample belongs to at most one window: a window takes the samples up to its end time that
+            # the previous windows left, skipping those before its start time
+            ends = np.maximum.accumulate(np.maximum(receiver.search(t_end_times[window], 'right'), previous_end))
+            starts = np.minimum(np.maximum(np.concatenate([[previous_end], ends[:-1]]), receiver.search(t_start_times[window], 'left')), ends)
+
+            # The merge stops at the bandwidthTest summary once a window used up the samples
+            merged_count = int(np.searchsorted(ends, receiver.end, side='left')) if receiver.summary else count
+            sums, counts, minima, maxima, medians = receiver.statistics(starts[:merged_count], ends[:merged_count])
+
+            # Only the windows with samples are merged bits
+            kept = np.flatnonzero(counts > 0)
+            columns.append(([t_time_strs[index + kept_index] for kept_index in kept.tolist()], t_start_times[window][kept], sums[kept] / counts[kept], bits[window][kept], counts[kept], minima[kept], maxima[kept], medians[kept]))
+
+            if merged_count < count:
+                return write_merged_log(concatenate_columns(columns), output_file, columns=True)
+
+            previous_end = int(ends[-1])
+            receiver.drop_before(previous_end)
+            index += count
+
+    return write_merged_log(concatenate_columns(columns), output_file, columns=True)
+
+
+def merge_microsecond_files_with_transmitterTiming_and_receiverBW(transmitter_file, receiver_file, output_file, warmup_lines=34, chunk_lines=CHUNK_LINES):
+    """
+    Average the receiver bandwidth between consecutive transmitter bits and write the merged log
+    ('HH:MM:SS:ms:us, bandwidth ms' per bit). Both logs are streamed in chunks of chunk_lines lines.
+    """
+    merge_microsecond_logs(transmitter_file, receiver_file, output_file, warmup_lines, chunk_lines)
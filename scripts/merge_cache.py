@@ -0,0 +1,164 @@
+import contextlib
+import filecmp
+import hashlib
+import inspect
+import json
+import os
+import shutil
+
+import numpy as np
+
+# Bump when the merged output of the merge functions changes, which invalidates every cached result
+MERGE_CACHE_VERSION = 1
+
+# Directory (inside the log directory) that holds the cached merged logs
+MERGE_CACHE_DIR = '.merge_cache'
+
+# Merge parameters that do not change the merged output (left out of the cache key)
+OUTPUT_NEUTRAL_PARAMS = {'chunk_lines'}
+
+
+def file_hash(path, block_size=1 << 20):
+    """SHA-256 of a file's contents (read in blocks)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while block := file.read(block_size):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def replace_atomic(path, fill):
+    """Call fill(temporary path) on a temporary file next to path and move it into place, so concurrent readers never see a partial file."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        fill(temp_path)
+        os.replace(temp_path, path)
+    except BaseException:
+        # fill may have failed before creating the temporary file
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(temp_path)
+        raise
+
+
+def file_fingerprint(path, cache_dir):
+    """
+    Fingerprint (size, mtime and content hash) of an input log. The hash is remembered per path in
+    cache_dir and only recomputed when the size or mtime of the file change.
+    """
+    stat = os.stat(path)
+    record_file = os.path.join(cache_dir, 'fingerprints', hashlib.sha256(os.path.abspath(path).encode()).hexdigest() + '.json')
+
+    try:
+        with open(record_file, 'r') as file:
+            record = json.load(file)
+        if record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+            return record
+    except (OSError, ValueError, KeyError):
+        pass
+
+    record = {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': file_hash(path)}
+
+    def write_record(temp_path):
+        with open(temp_path, 'w') as file:
+            json.dump(record, file)
+
+    os.makedirs(os.path.dirname(record_file), exist_ok=True)
+    replace_atomic(record_file, write_record)
+
+    return record
+
+
+def merge_cache_key(merge, input_files, params, cache_dir):
+    """Key of a merged result: the merge function and its parameters plus the size and content of every input log."""
+    # Default parameters (e.g. the warmup lines) are part of the key as well
+    arguments = inspect.signature(merge).bind(*input_files, None, **params)
+    arguments.apply_defaults()
+    params = {name: value for name, value in list(arguments.arguments.items())[len(input_files) + 1:] if name not in OUTPUT_NEUTRAL_PARAMS}
+
+    fingerprints = [file_fingerprint(path, cache_dir) for path in input_files]
+    key = {
+        'version': MERGE_CACHE_VERSION,
+        'merge': f"{merge.__module__}.{merge.__name__}",
+        'params': params,
+        # The contents identify the inputs (a touched or renamed but unchanged log is still a hit)
+        'inputs': [(fingerprint['size'], fingerprint['sha256']) for fingerprint in fingerprints],
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def cached_merge(merge, transmitter_file, receiver_file, output_file, cache_dir=None, **params):
+    """
+    Run merge(transmitter_file, receiver_file, output_file, **params) unless the same inputs were
+    already merged with the same parameters, in which case the cached result is copied to
+    output_file (nothing is written if output_file is already up to date). Returns True on a cache hit.
+
+    The cache lives in MERGE_CACHE_DIR next to output_file by default.
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(output_file)), MERGE_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    key = merge_cache_key(merge, [transmitter_file, receiver_file], params, cache_dir)
+    cached_file = os.path.join(cache_dir, key + '.log')
+
+    if os.path.exists(cached_file):
+        if not (os.path.exists(output_file) and filecmp.cmp(cached_file, output_file, shallow=False)):
+            shutil.copyfile(cached_file, output_file)
+        return True
+
+    merge(transmitter_file, receiver_file, output_file, **params)
+
+    # Store a copy of the result under its key
+    replace_atomic(cached_file, lambda temp_path: shutil.copyfile(output_file, temp_path))
+
+    return False
+
+
+def cached_merge_logs(merge_logs, transmitter_file, receiver_file, output_file=None, cache_dir=None, **params):
+    """
+    Run merge_logs(transmitter_file, receiver_file, output_file, **params) (a merge to a MERGED_DTYPE
+    array, e.g. log_merge.merge_logs) unless the same inputs were already merged with the same
+    parameters, in which case the cached array is loaded and the cached merged log is copied to
+    output_file (if any). Returns the merged array and whether it was a cache hit.
+
+    The array is cached together with the merged log, so the result is the same with and without the
+    cache and whether or not the merged log is written. The cache lives in MERGE_CACHE_DIR next to
+    output_file by default (cache_dir is needed without output_file).
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(output_file)), MERGE_CACHE_DIR)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    key = merge_cache_key(merge_logs, [transmitter_file, receiver_file], params, cache_dir)
+    cached_array, cached_file = (os.path.join(cache_dir, key + extension) for extension in ('.npy', '.log'))
+
+    hit = os.path.exists(cached_array) and os.path.exists(cached_file)
+    if hit:
+        merged = np.load(cached_array)
+    else:
+        # The merged log is cached even if it is not written now (the array is stored last, it marks a complete entry)
+        merged = None
+
+        def merge_to(temp_path):
+            nonlocal merged
+            merged = merge_logs(transmitter_file, receiver_file, temp_path, **params)
+
+        def save_array(temp_path):
+            with open(temp_path, 'wb') as file:
+                np.save(file, merged)
+
+        replace_atomic(cached_file, merge_to)
+        replace_atomic(cached_array, save_array)
+
+    if output_file and not (os.path.exists(output_file) and filecmp.cmp(cached_file, output_file, shallow=False)):
+        shutil.copyfile(cached_file, output_file)
+
+    return merged, hit
+
+
+def is_stale(output_file, input_files):
+    """Check whether a merged log is missing or older than one of its input logs."""
+    if not os.path.exists(output_file):
+        return True
+    output_mtime = os.stat(output_file).st_mtime_ns
+    return any(os.stat(path).st_mtime_ns > output_mtime for path in input_files if os.path.exists(path))
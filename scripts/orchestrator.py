@@ -0,0 +1,186 @@
+from queue import Empty, Queue
+from threading import Thread
+import json
+import os
+import re
+import signal
+import subprocess
+import time
+
+from live_runner import LiveMerger
+from telemetry import TelemetrySampler, summarize
+
+# First line of the receiver that is not part of the warmup: a sample ('HH:MM:SS:ms[:us] & bandwidth',
+# printed by ./build/receiver and bandwidthTest) or a 'run,<bandwidth>,<time>' CSV line
+SAMPLE_LINE_PATTERN = re.compile(r'^\s*(\d{2}:\d{2}:\d{2}:\d{3}|run,)')
+
+# Marks the end of a process's output in the line queue
+END_OF_OUTPUT = object()
+
+
+def run_file_for(transmitter_file):
+    """Run description file that is written next to the logs of an experiment ('<transmitter log>.run.json')."""
+    return f"{os.path.splitext(transmitter_file)[0]}.run.json"
+
+
+def read_lines(stream, name, lines):
+    """Put every line of a process's output on the queue (as (name, line)), followed by END_OF_OUTPUT."""
+    for line in stream:
+        lines.put((name, line))
+    lines.put((name, END_OF_OUTPUT))
+
+
+def launch(command, name, lines):
+    """Start a shell command in its own process group with its output read into the line queue."""
+    process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, text=True, errors='replace', bufsize=1, start_new_session=True)
+    Thread(target=read_lines, args=(process.stdout, name, lines), daemon=True).start()
+    return process
+
+
+def kill(process):
+    """Kill a process started by launch() and everything it started (e.g. the program behind taskset)."""
+    if process is not None and process.poll() is None:
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+
+
+def run_experiment(receiver_command, transmitter_command, transmitter_file, receiver_file=None, merged_file=None, warmup_lines=34, ready_timeout=60, timeout=None, run_file=None, details=None, telemetry_file=None, telemetry_interval_ms=100, tegrastats='tegrastats'):
+    """
+    Run one receiver/transmitter pair and write its logs.
+
+    The transmitter is started as soon as the receiver prints its first sample (the end of its warmup)
+    instead of after a fixed delay. The receiver output is written to receiver_file and, with merged_file,
+    merged with the transmitter bits while both run (see live_runner.LiveMerger). Without receiver_file
+    only the transmitter and merged logs are written.
+
+    Both processes are killed if the receiver is not ready after ready_timeout seconds or the experiment
+    takes longer than timeout seconds (None for no limit). The commands, the status ('ok', 'failed',
+    'receiver_exited', 'ready_timeout' or 'timeout'), the exit codes and the launch, ready and finish
+    times (nanoseconds since the Unix epoch) are written to run_file (default: run_file_for the transmitter
+    log) and returned, together with the entries of details (e.g. the core placement).
+
+    With telemetry_file, hardware telemetry is sampled from before the receiver starts until both ended
+    (see telemetry.TelemetrySampler) and the mean and maximum of every field while the transmitter ran
+    (e.g. EMC_FREQ, CPU_MHZ) are added to the run description.
+
+    If anything raises during the run, both processes are killed, the telemetry is stopped and the run
+    is written with the status 'failed' and the error before the exception is re-raised.
+    """
+    run = {
+        'receiver_command': receiver_command,
+        'transmitter_command': transmitter_command,
+        'status': None,
+        'receiver_launch_ns': None,
+        'receiver_ready_ns': None,
+        'transmitter_launch_ns': None,
+        'transmitter_finish_ns': None,
+        'receiver_finish_ns': None,
+        'receiver_returncode': None,
+        'transmitter_returncode': None,
+        'warmup_lines': None,
+        'merged_bits': None,
+    }
+    run.update(details or {})
+
+    lines = Queue()
+    transmitter = None
+    sampler = TelemetrySampler(telemetry_file, telemetry_interval_ms, tegrastats).start() if telemetry_file else None
+
+    receiver = None
+    try:
+        with open(transmitter_file, 'w') as t_file, \
+                open(receiver_file if receiver_file else os.devnull, 'w') as r_file, \
+                open(merged_file if merged_file else os.devnull, 'w') as out_file:
+            merger = LiveMerger(out_file, warmup_lines) if merged_file else None
+
+            run['receiver_launch_ns'] = time.time_ns()
+            receiver = launch(receiver_command, 'receiver', lines)
+            start = time.monotonic()
+            ready_deadline = start + ready_timeout
+            deadline = start + timeout if timeout else None
+
+            receiver_lines = 0
+            running = {'receiver'}
+            while running:
+                # Wait for the next line until the closest deadline
+                deadlines = [limit for limit in (ready_deadline if transmitter is None else None, deadline) if limit is not None]
+                wait = max(min(deadlines) - time.monotonic(), 0) if deadlines and run['status'] is None else None
+                try:
+                    name, line = lines.get(timeout=wait)
+                except Empty:
+                    # Kill both and keep reading until their output ends
+                    run['status'] = 'ready_timeout' if transmitter is None else 'timeout'
+                    kill(receiver)
+                    kill(transmitter)
+                    continue
+
+                if line is END_OF_OUTPUT:
+                    running.discard(name)
+                    run[f'{name}_finish_ns'] = time.time_ns()
+                    if name == 'receiver':
+                        if transmitter is None and run['status'] is None:
+                            run['status'] = 'receiver_exited'
+                        if merger:
+                            merger.end_receiver()
+                    elif merger:
+                        merger.end_transmitter()
+                    continue
+
+                if name == 'transmitter':
+                    t_file.write(line)
+                    if merger:
+                        merger.add_transmitter_line(line)
+                    continue
+
+                receiver_lines += 1
+                r_file.write(line)
+                if merger:
+                    merger.add_receiver_line(line)
+
+                # Start the transmitter when the receiver is done with its warmup
+                if transmitter is None and run['status'] is None and SAMPLE_LINE_PATTERN.match(line):
+                    run['receiver_ready_ns'] = run['transmitter_launch_ns'] = time.time_ns()
+                    run['warmup_lines'] = receiver_lines - 1
+                    transmitter = launch(transmitter_command, 'transmitter', lines)
+                    running.add('transmitter')
+
+            if merger:
+                run['merged_bits'] = merger.finish()
+    except BaseException as e:
+        # Something failed mid-run (e.g. a write error or KeyboardInterrupt, which never reaches the processes
+        # in their own sessions): stop both processes and the telemetry and record the failure
+        kill(receiver)
+        kill(transmitter)
+        if sampler:
+            sampler.stop()
+        run['status'] = 'failed'
+        run['error'] = f"{type(e).__name__}: {e}"
+        with open(run_file if run_file else run_file_for(transmitter_file), 'w') as file:
+            json.dump(run, file, indent=2)
+        raise
+
+    run['receiver_returncode'] = receiver.wait()
+    if transmitter is not None:
+        run['transmitter_returncode'] = transmitter.wait()
+
+    if sampler:
+        sampler.stop()
+        # Statistics while the transmitter ran (while the receiver ran if it never started)
+        start_ns = run['transmitter_launch_ns'] or run['receiver_launch_ns']
+        end_ns = run['transmitter_finish_ns'] or run['receiver_finish_ns']
+        run['telemetry'] = {
+            'file': telemetry_file,
+            'source': sampler.source,
+            'samples': sampler.samples,
+            'fields': summarize(telemetry_file, start_ns, end_ns, sampler.start_ns) if sampler.samples else {},
+        }
+
+    if run['status'] is None:
+        run['status'] = 'ok' if run['receiver_returncode'] == 0 and run['transmitter_returncode'] == 0 else 'failed'
+
+    with open(run_file if run_file else run_file_for(transmitter_file), 'w') as file:
+        json.dump(run, file, indent=2)
+
+    return run
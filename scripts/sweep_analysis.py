@@ -0,0 +1,187 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+import argparse
+import csv
+import os
+import sys
+
+from accuracy import calculate_threshold_accuracy, calculate_time_difference, load_accurate_values, load_merged_bandwidths, load_symbol_times, merged_time_difference, optimize_threshold
+from channel_metrics import METRIC_COLUMNS, add_channel_metrics, rank_rows, symbol_span
+from log_merge import merge_logs, merge_microsecond_logs
+from merge_cache import MERGE_CACHE_DIR, cached_merge_logs
+
+# Log formats: merge function (to an array, with the merged log as a side output), transmitted bits to skip
+# when existing merged logs are scored (the microsecond logs time the end of every bit) and the default
+# log file names (filled in with the configuration of every job)
+LOG_FORMATS = {
+    # analysis.py (History sweep)
+    'ms': {
+        'merge_logs': merge_logs,
+        'skip_lines': 0,
+        'transmitter_log': 'transmitterSleep{sleep_time}_time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}_cores0-3.log',
+        'receiver_log': 'transmitterSleep{sleep_time}_time_switch{time_switch}_receiver{receiver_size}_transmitter{transmitter_size}_cores0-3.log',
+        'merged_log': 'transmitterSleep{sleep_time}_time_switch{time_switch}_merged_transmitter{transmitter_size}_receiver{receiver_size}_cores0-3.log',
+    },
+    # analysis_microsecond.py
+    'us': {
+        'merge_logs': merge_microsecond_logs,
+        'skip_lines': 1,
+        'transmitter_log': 'time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}.log',
+        'receiver_log': 'time_switch{time_switch}_receiver{receiver_size}_transmitter{transmitter_size}.log',
+        'merged_log': 'merged_time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}.log',
+    },
+}
+
+# Columns of the result table
+CONFIG_COLUMNS = ['transmitter_size', 'receiver_size', 'time_switch', 'sleep_time']
+RESULT_COLUMNS = ['accuracy', 'mispredicted', 'bits', 'bandwidth', 'time_per_bit_ms', 'transmit_rate', 'symbols', 'duration_s'] + METRIC_COLUMNS + ['optimal_threshold', 'optimal_accuracy', 'error']
+
+
+def parse_values(text):
+    """Parse a comma separated list of numbers, keeping integers as int so file names match the sweep scripts (e.g. '1000,2.5,0.0')."""
+    return [int(value) if value.strip().lstrip('-').isdigit() else float(value) for value in text.split(',')]
+
+
+def analyze_config(config, log_dir, log_format, log_names, threshold, merge_file, merge_cache=True, optimize=False, write_merged=True):
+    """
+    Merge the logs of one configuration and calculate its History accuracy (runs in a worker process).
+    With optimize the threshold with the highest accuracy is searched as well. Any error (missing or
+    corrupt logs) is reported in the error column instead of aborting the sweep.
+
+    The merge result is analyzed in memory (the merged log is only written as a side output with
+    write_merged), so the bandwidths keep their full precision and every bit is compared with the bit
+    that was transmitted during it. The merge cache stores that result as well, so neither merge_cache
+    nor write_merged change the scores. Without merge_file the existing merged logs are scored instead
+    (like analysis.py).
+    """
+    row = dict(config)
+    row.update({column: '' for column in RESULT_COLUMNS})
+
+    transmitter_file, receiver_file, merged_file = (
+        os.path.join(log_dir, log_names[name].format(**config)) for name in ('transmitter_log', 'receiver_log', 'merged_log')
+    )
+
+    try:
+        merge_logs = LOG_FORMATS[log_format]['merge_logs']
+        if merge_file and merge_cache:
+            merged, _ = cached_merge_logs(merge_logs, transmitter_file, receiver_file, merged_file if write_merged else None, cache_dir=os.path.join(log_dir, MERGE_CACHE_DIR))
+        elif merge_file:
+            merged = merge_logs(transmitter_file, receiver_file, merged_file if write_merged else None)
+
+        if merge_file:
+            # Analyze the merge result directly
+            bandwidths, accurate_values = merged['bandwidth'].tolist(), merged['bit'].tolist()
+            _, time_per_bit = merged_time_difference(merged)
+        else:
+            bandwidths, _ = load_merged_bandwidths(merged_file)
+            accurate_values = load_accurate_values(transmitter_file, skip_lines=LOG_FORMATS[log_format]['skip_lines'])
+            _, time_per_bit = calculate_time_difference(merged_file)
+
+        accuracy, incorrect_indexes, _ = calculate_threshold_accuracy(bandwidths, accurate_values, threshold)
+
+        row['accuracy'] = round(accuracy, 2)
+        row['mispredicted'] = len(incorrect_indexes)
+        row['bits'] = len(bandwidths)
+        row['bandwidth'] = round(sum(bandwidths) / len(bandwidths), 6)
+        row['time_per_bit_ms'] = round(time_per_bit, 6)
+        row['transmit_rate'] = round(1000 / time_per_bit, 3) if time_per_bit > 0 else ''
+
+        # Symbols and duration of the transmission (the channel metrics of the sweep are calculated together)
+        symbols, duration_s = symbol_span(load_symbol_times(transmitter_file))
+        row['symbols'] = symbols
+        row['duration_s'] = round(duration_s, 6)
+
+        if optimize:
+            optimal_threshold, optimal_accuracy = optimize_threshold(bandwidths, accurate_values)
+            row['optimal_threshold'] = round(optimal_threshold, 6)
+            row['optimal_accuracy'] = round(optimal_accuracy, 2)
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+
+    return row
+
+
+def run_sweep(configs, log_dir, log_format, log_names, threshold, merge_file, jobs, merge_cache=True, optimize=False, write_merged=True):
+    """Analyze every configuration on a pool of jobs processes and return the result rows in configuration order."""
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(analyze_config, config, log_dir, log_format, log_names, threshold, merge_file, merge_cache, optimize, write_merged) for config in configs]
+
+        rows = []
+        for config, future in zip(configs, futures):
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                # A worker that died (e.g. out of memory) only loses its own configuration
+                row = dict(config)
+                row.update({column: '' for column in RESULT_COLUMNS})
+                row['error'] = f"{type(e).__name__}: {e}"
+                rows.append(row)
+
+    return rows
+
+
+def print_table(rows, columns, file=sys.stdout, first_left=False):
+    """Print the result rows as an aligned text table (numbers right aligned, the last column and with first_left the first column left aligned)."""
+    widths = [max([len(column)] + [len(str(row[column])) for row in rows]) for column in columns[:-1]]
+
+    def format_row(values):
+        cells = [str(value).rjust(width) for value, width in zip(values, widths)]
+        if first_left and cells:
+            cells[0] = str(values[0]).ljust(widths[0])
+        return '  '.join(cells + [str(values[-1])]).rstrip()
+
+    print(format_row(columns), file=file)
+    for row in rows:
+        print(format_row([row[column] for column in columns]), file=file)
+
+
+if __name__ == "__main__":
+    # Set up command-line argument parsing
+    parser = argparse.ArgumentParser(description="Merge and analyze a transmitter x receiver x time_switch x sleep_time sweep on all cores.")
+    parser.add_argument("--log_dir", type=str, required=True, help="Directory with the log files of the transmitter and receiver.")
+    parser.add_argument("--format", type=str, choices=sorted(LOG_FORMATS), default='ms', help="Log format: ms (analysis.py) or us (analysis_microsecond.py).")
+    parser.add_argument("--transmitter_values", type=parse_values, default=[134217728], help="Comma separated transmitter buffer sizes.")
+    parser.add_argument("--receiver_values", type=parse_values, default=[104857600], help="Comma separated receiver buffer sizes.")
+    parser.add_argument("--time_switch_values", type=parse_values, default=[1000, 500, 250, 200, 125, 100, 50, 25, 20, 10, 5, 2.5, 2, 1], help="Comma separated time switch values.")
+    parser.add_argument("--sleep_time_values", type=parse_values, default=[0.0, 0.15], help="Comma separated transmitter sleep times.")
+    parser.add_argument("--transmitter_log", type=str, default=None, help="Transmitter log name template (default depends on --format).")
+    parser.add_argument("--receiver_log", type=str, default=None, help="Receiver log name template (default depends on --format).")
+    parser.add_argument("--merged_log", type=str, default=None, help="Merged log name template (default depends on --format).")
+    parser.add_argument("--mergeFile", type=lambda x: (str(x).lower() == 'true'), default=True, help="Set to True or False. Default is True.")
+    parser.add_argument("--mergeCache", type=lambda x: (str(x).lower() == 'true'), default=True, help="Reuse merged logs whose transmitter and receiver logs did not change (cached in <log_dir>/.merge_cache). Default is True.")
+    parser.add_argument("--writeMerged", type=lambda x: (str(x).lower() == 'true'), default=True, help="Write the merged logs (the merge result is analyzed in memory either way). Default is True.")
+    parser.add_argument("--threshold", type=float, default=0.30, help="Threshold for percentage increase or decrease.")
+    parser.add_argument("--optimizeThreshold", type=lambda x: (str(x).lower() == 'true'), default=False, help="Also search the threshold with the highest accuracy for every configuration. Default is False.")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the bit error rate and capacity intervals.")
+    parser.add_argument("--rankBy", type=str, default="", help="Rank the configurations by a column (largest first, e.g. capacity) instead of the sweep order.")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of worker processes (default: all cores).")
+    parser.add_argument("--output", type=str, default=None, help="Optional CSV file for the result table.")
+
+    # Parse the command-line arguments
+    args = parser.parse_args()
+
+    log_names = {name: getattr(args, name) or LOG_FORMATS[args.format][name] for name in ('transmitter_log', 'receiver_log', 'merged_log')}
+
+    configs = [
+        dict(zip(CONFIG_COLUMNS, values))
+        for values in product(args.transmitter_values, args.receiver_values, args.time_switch_values, args.sleep_time_values)
+    ]
+
+    rows = run_sweep(configs, args.log_dir, args.format, log_names, args.threshold, args.mergeFile, args.jobs, args.mergeCache, args.optimizeThreshold, args.writeMerged)
+
+    # Bit rate, bit error rate and capacity of every configuration at once
+    rows = add_channel_metrics(rows, args.confidence)
+    if args.rankBy:
+        rows = rank_rows(rows, args.rankBy)
+
+    print_table(rows, CONFIG_COLUMNS + RESULT_COLUMNS)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as out_file:
+            writer = csv.DictWriter(out_file, fieldnames=CONFIG_COLUMNS + RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    failed = sum(1 for row in rows if row['error'])
+    if failed:
+        print(f"{failed} of {len(rows)} configurations failed", file=sys.stderr)
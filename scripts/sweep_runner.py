@@ -0,0 +1,282 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from queue import Queue
+from threading import Lock
+import argparse
+import hashlib
+import json
+import os
+
+from cpu_topology import pair_slots
+from orchestrator import SAMPLE_LINE_PATTERN, run_experiment, run_file_for
+from telemetry import telemetry_file_for
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Run the experiments of a sweep specification (see scripts/sweeps/), resuming where an interrupted run stopped.")
+parser.add_argument("spec", type=str, help="Sweep specification (JSON).")
+parser.add_argument("--log_dir", type=str, default=None, help="Directory to store the log files (default: log_dir of the specification).")
+parser.add_argument("--live", type=lambda x: (str(x).lower() == 'true'), default=None, help="Merge the receiver output while it runs and only write the transmitter and merged logs (default: live of the specification, else False).")
+parser.add_argument("--ready_timeout", type=float, default=60, help="Seconds the receiver may take for its warmup before the configuration is killed.")
+parser.add_argument("--timeout", type=float, default=0, help="Seconds after which a configuration is killed (0 for no limit).")
+parser.add_argument("--dry_run", type=lambda x: (str(x).lower() == 'true'), default=False, help="Only print the configurations that would be run. Default is False.")
+parser.add_argument("--parallel", type=lambda x: (str(x).lower() == 'true'), default=False, help="Run one pair per NUMA node (or last level cache) at the same time, on the cores of its domain instead of the core sets of the specification. Default is False.")
+parser.add_argument("--domain", type=str, default="numa", help="Domain every parallel pair gets for itself: numa or llc.")
+parser.add_argument("--receiver_cores", type=int, default=0, help="Physical cores of a parallel pair's domain that go to the receiver (0 for half of them, the transmitter gets the rest).")
+parser.add_argument("--max_pairs", type=int, default=0, help="Maximum number of pairs that run at the same time (0 for one per domain).")
+parser.add_argument("--telemetry", type=lambda x: (str(x).lower() == 'true'), default=False, help="Sample tegrastats (or procfs/sysfs if it is missing) during every configuration into '<transmitter log>.telemetry.log' and add its statistics to the run file. Default is False.")
+parser.add_argument("--telemetry_interval", type=int, default=100, help="Telemetry sampling interval in milliseconds.")
+parser.add_argument("--tegrastats", type=str, default="tegrastats", help="tegrastats command (e.g. a stand-in that prints tegrastats lines).")
+parser.add_argument("--restart", type=lambda x: (str(x).lower() == 'true'), default=False, help="Ignore the journal and the existing logs and run every configuration again. Default is False.")
+
+# Journal of the finished configurations (one JSON object per line, in <log_dir>)
+JOURNAL_FILE = '.sweep_journal.jsonl'
+
+# Names that the derived formulas may use besides the configuration values
+FORMULA_FUNCTIONS = {'abs': abs, 'int': int, 'float': float, 'max': max, 'min': min, 'round': round}
+
+# Core set placeholders that are left in the commands of jobs that are placed when they run
+CORE_PLACEHOLDERS = {'receiver_cores': '{receiver_cores}', 'transmitter_cores': '{transmitter_cores}'}
+
+
+def load_spec(path):
+    """
+    Load a sweep specification. Required keys: axes (name -> list of values, expanded in order with the
+    first axis outermost), receiver and transmitter (command templates) and logs (transmitter, receiver
+    and merged log name templates). Optional keys: derived (name -> formula over the values, evaluated
+    in order), cores (one {receiver, transmitter} taskset core set or a list of them, swept as the last
+    axis), constants (name -> value, e.g. the message), log_dir, live and warmup_lines.
+    """
+    with open(path, 'r') as file:
+        spec = json.load(file)
+
+    missing = [key for key in ('axes', 'receiver', 'transmitter', 'logs') if key not in spec]
+    if missing:
+        raise ValueError(f"{path} is missing {', '.join(missing)}")
+    missing = [key for key in ('transmitter', 'receiver', 'merged') if key not in spec['logs']]
+    if missing:
+        raise ValueError(f"{path} is missing the {', '.join(missing)} log name")
+
+    return spec
+
+
+def expand_jobs(spec, log_dir, placed=False):
+    """
+    Expand a specification into the list of jobs (configuration, commands and log paths), in sweep order.
+    With placed the core sets of the specification are ignored and the commands keep the {receiver_cores}
+    and {transmitter_cores} placeholders (see place_job).
+    """
+    axes = dict(spec['axes'])
+    cores = spec.get('cores')
+    if cores is not None and not placed:
+        axes['cores'] = cores if isinstance(cores, list) else [cores]
+
+    jobs = []
+    for values in product(*axes.values()):
+        config = dict(spec.get('constants', {}))
+        config.update(zip(axes.keys(), values))
+
+        # Core sets are used as {receiver_cores} and {transmitter_cores}
+        core_set = config.pop('cores', None)
+        if core_set is not None:
+            config['receiver_cores'] = core_set['receiver']
+            config['transmitter_cores'] = core_set['transmitter']
+        elif placed:
+            config.update(CORE_PLACEHOLDERS)
+
+        # Derived values (e.g. the receiver buffer size or iterations)
+        for name, formula in spec.get('derived', {}).items():
+            config[name] = eval(formula, {'__builtins__': FORMULA_FUNCTIONS}, dict(config))
+
+        job = {
+            'config': {name: value for name, value in config.items() if name not in spec.get('constants', {}) and value not in CORE_PLACEHOLDERS.values()},
+            'receiver_command': spec['receiver'].format(**config),
+            'transmitter_command': spec['transmitter'].format(**config),
+        }
+        job.update({f'{name}_file': os.path.join(log_dir, spec['logs'][name].format(**config)) for name in ('transmitter', 'receiver', 'merged')})
+        job['key'] = job_key(job)
+        jobs.append(job)
+
+    return jobs
+
+
+def place_job(job, slot):
+    """Fill the core placeholders of a job's commands with the cores of a slot (see cpu_topology.pair_slots)."""
+    placed = dict(job)
+    for name in ('receiver_command', 'transmitter_command'):
+        for core_set, placeholder in CORE_PLACEHOLDERS.items():
+            placed[name] = placed[name].replace(placeholder, slot[core_set])
+    return placed
+
+
+def job_key(job):
+    """Identify a job by its commands and logs (changing a formula or template runs the job again)."""
+    identity = json.dumps([job['receiver_command'], job['transmitter_command'], job['transmitter_file'], job['receiver_file'], job['merged_file']])
+    return hashlib.sha1(identity.encode()).hexdigest()
+
+
+def load_journal(log_dir):
+    """Keys of the jobs that finished successfully according to the journal (a partially written last line is ignored)."""
+    finished = set()
+    path = os.path.join(log_dir, JOURNAL_FILE)
+    if not os.path.exists(path):
+        return finished
+
+    with open(path, 'r') as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if entry.get('status') in ('ok', 'existing'):
+                finished.add(entry['key'])
+
+    return finished
+
+
+def append_journal(log_dir, job, status):
+    """Record a finished job in the journal (flushed to disk at once, so it survives an interruption)."""
+    with open(os.path.join(log_dir, JOURNAL_FILE), 'a') as file:
+        file.write(json.dumps({'key': job['key'], 'status': status, 'config': job['config'], 'transmitter_file': job['transmitter_file']}) + '\n')
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def count_lines(path, predicate, limit):
+    """Count the lines of a file that match predicate, stopping at limit (0 if the file is missing)."""
+    if not os.path.exists(path):
+        return 0
+    count = 0
+    with open(path, 'r', errors='replace') as file:
+        for line in file:
+            if predicate(line):
+                count += 1
+                if count >= limit:
+                    break
+    return count
+
+
+def validate_logs(job, live):
+    """
+    Check whether the logs of a job exist and look complete: the transmitter log has at least two bits,
+    the receiver log has samples (or the merged log has bits with live) and the run description, if
+    there is one, reports success.
+    """
+    run_file = run_file_for(job['transmitter_file'])
+    if os.path.exists(run_file):
+        try:
+            with open(run_file, 'r') as file:
+                if json.load(file).get('status') != 'ok':
+                    return False
+        except (OSError, ValueError):
+            return False
+
+    if count_lines(job['transmitter_file'], lambda line: line.startswith(('High', 'Low')), 2) < 2:
+        return False
+
+    if live:
+        return count_lines(job['merged_file'], lambda line: line.strip() != '', 1) > 0
+    return count_lines(job['receiver_file'], SAMPLE_LINE_PATTERN.match, 1) > 0
+
+
+def run_sweep(jobs, log_dir, live, warmup_lines=34, ready_timeout=60, timeout=None, restart=False, dry_run=False, slots=None, telemetry=None):
+    """
+    Run the jobs that are not finished yet, journaling every finished job. Returns the number of jobs per status.
+
+    With slots (see cpu_topology.pair_slots) one job runs in every slot at the same time, placed on the
+    cores of the slot, and the placement is recorded in the run file next to its logs.
+
+    With telemetry ({'interval_ms', 'tegrastats'}, see telemetry.TelemetrySampler) every job samples the
+    hardware telemetry into '<transmitter log>.telemetry.log' and its run file gets the statistics.
+    """
+    finished = set() if restart else load_journal(log_dir)
+    counts = {}
+    lock = Lock()
+
+    def report(index, job, status):
+        """Count and print the status of a job (and journal it unless it was journaled already)."""
+        with lock:
+            if status not in ('journaled', 'pending'):
+                append_journal(log_dir, job, status)
+            counts[status] = counts.get(status, 0) + 1
+            print(f"[{index}/{len(jobs)}] {job['config']}: {status}")
+
+    # Skip the jobs that finished before (journaled, or with valid logs from an earlier run)
+    pending = []
+    for index, job in enumerate(jobs, 1):
+        if not restart and job['key'] in finished:
+            report(index, job, 'journaled')
+        elif not restart and validate_logs(job, live):
+            report(index, job, 'pending' if dry_run else 'existing')
+        elif dry_run:
+            report(index, job, 'pending')
+        else:
+            pending.append((index, job))
+
+    def run(index, job, slot=None):
+        """Run one job (placed on the cores of slot, if any)."""
+        if slot is not None:
+            job = place_job(job, slot)
+        result = run_experiment(
+            job['receiver_command'],
+            job['transmitter_command'],
+            job['transmitter_file'],
+            receiver_file=None if live else job['receiver_file'],
+            merged_file=job['merged_file'] if live else None,
+            warmup_lines=warmup_lines,
+            ready_timeout=ready_timeout,
+            timeout=timeout,
+            details={'placement': slot} if slot is not None else None,
+            telemetry_file=telemetry_file_for(job['transmitter_file']) if telemetry else None,
+            telemetry_interval_ms=telemetry['interval_ms'] if telemetry else 100,
+            tegrastats=telemetry['tegrastats'] if telemetry else 'tegrastats',
+        )
+        report(index, job, result['status'])
+
+    if not slots:
+        for index, job in pending:
+            run(index, job)
+        return counts
+
+    # Every worker takes a free slot for its job and gives it back afterwards
+    free_slots = Queue()
+    for slot in slots:
+        free_slots.put(slot)
+
+    def run_in_slot(index, job):
+        slot = free_slots.get()
+        try:
+            run(index, job, slot)
+        finally:
+            free_slots.put(slot)
+
+    with ThreadPoolExecutor(max_workers=len(slots)) as executor:
+        for future in [executor.submit(run_in_slot, index, job) for index, job in pending]:
+            future.result()
+
+    return counts
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+    log_dir = args.log_dir if args.log_dir else spec.get('log_dir')
+    if not log_dir:
+        parser.error("--log_dir is required when the specification has no log_dir")
+    live = args.live if args.live is not None else spec.get('live', False)
+
+    # One pair per domain of the CPU topology
+    slots = None
+    if args.parallel:
+        slots = pair_slots(args.domain, args.receiver_cores, args.max_pairs)
+        if not slots:
+            parser.error(f"No {args.domain} domain has the two physical cores a pair needs")
+        for slot in slots:
+            print(f"{slot['domain']}: receiver {slot['receiver_cores']}, transmitter {slot['transmitter_cores']}")
+
+    os.makedirs(log_dir, exist_ok=True)
+    jobs = expand_jobs(spec, log_dir, placed=args.parallel)
+    telemetry = {'interval_ms': args.telemetry_interval, 'tegrastats': args.tegrastats} if args.telemetry else None
+    counts = run_sweep(jobs, log_dir, live, spec.get('warmup_lines', 34), args.ready_timeout, args.timeout or None, args.restart, args.dry_run, slots, telemetry)
+
+    print(', '.join(f"{status}: {count}" for status, count in counts.items()))
@@ -0,0 +1,221 @@
+from datetime import datetime
+from threading import Event, Thread
+import argparse
+import glob
+import os
+import re
+import shlex
+import shutil
+import signal
+import subprocess
+import time
+
+from emc_values import load_tegrastats, window_stats
+from trace_format import trace_time_us
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Record tegrastats (or procfs/sysfs) telemetry on the receiver's time base until interrupted.")
+parser.add_argument("output", type=str, help="Telemetry log to write.")
+parser.add_argument("--interval", type=int, default=100, help="Sampling interval in milliseconds.")
+parser.add_argument("--tegrastats", type=str, default="tegrastats", help="tegrastats command (or a stand-in); procfs/sysfs are polled if it is not found.")
+
+# Date and time that tegrastats puts in front of its lines (replaced by the time a line was read)
+TEGRASTATS_TIME_PATTERN = re.compile(r'^\s*(\d{2}-\d{2}-\d{4} \d{2}:\d{2}:\d{2}\s+)?')
+
+# Root of the procfs and sysfs trees the fallback sampler reads
+PROC_ROOT = '/proc'
+SYS_ROOT = '/sys'
+
+
+def telemetry_file_for(transmitter_file):
+    """Telemetry log that is written next to the logs of an experiment ('<transmitter log>.telemetry.log')."""
+    return f"{os.path.splitext(transmitter_file)[0]}.telemetry.log"
+
+
+def format_stamp(time_ns):
+    """Date and time of a sample like tegrastats, with the receiver's precision ('MM-DD-YYYY HH:MM:SS:ms:us')."""
+    stamp = datetime.fromtimestamp(time_ns // 1000 / 1e6)
+    return f"{stamp.strftime('%m-%d-%Y %H:%M:%S')}:{stamp.microsecond // 1000:03d}:{stamp.microsecond % 1000:03d}"
+
+
+def read_number(path):
+    """Read a number from a small sysfs file (None if it does not exist or is not a number)."""
+    try:
+        with open(path, 'r') as file:
+            return int(file.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_cpu_times(proc_root=PROC_ROOT):
+    """Busy and total jiffies of every CPU in /proc/stat ({cpu: (busy, total)})."""
+    times = {}
+    with open(os.path.join(proc_root, 'stat'), 'r') as file:
+        for line in file:
+            fields = line.split()
+            if not fields or not fields[0].startswith('cpu') or fields[0] == 'cpu':
+                continue
+            values = [int(value) for value in fields[1:]]
+            # Idle and iowait are the idle time
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+            times[int(fields[0][3:])] = (sum(values) - idle, sum(values))
+    return times
+
+
+def emc_devfreq(sys_root=SYS_ROOT):
+    """The devfreq device of the memory controller (None if the kernel has none)."""
+    for path in sorted(glob.glob(os.path.join(sys_root, 'class/devfreq/*'))):
+        names = [os.path.basename(path), os.path.basename(os.path.realpath(os.path.join(path, 'device')))]
+        if any('emc' in name.lower() or 'dmc' in name.lower() for name in names):
+            return path
+    return None
+
+
+def sample_system(previous, proc_root=PROC_ROOT, sys_root=SYS_ROOT):
+    """
+    Read one tegrastats-like sample from procfs and sysfs: the load and frequency of every CPU since
+    the previous sample ('CPU [12%@1510,off,...]') and, if the memory controller has a devfreq device,
+    its frequency as a share of its maximum ('EMC_FREQ 40%@1600'). Returns the line and the CPU times
+    for the next sample.
+    """
+    times = read_cpu_times(proc_root)
+
+    cores = []
+    for cpu in range(max(times) + 1 if times else 0):
+        if cpu not in times:
+            cores.append('off')
+            continue
+        busy, total = times[cpu]
+        previous_busy, previous_total = previous.get(cpu, (busy, total))
+        load = round(100 * (busy - previous_busy) / (total - previous_total)) if total > previous_total else 0
+        frequency = read_number(os.path.join(sys_root, f'devices/system/cpu/cpu{cpu}/cpufreq/scaling_cur_freq'))
+        # Cores without a known frequency only report their load
+        cores.append(f"{load}%@{frequency // 1000}" if frequency else f"{load}%")
+    line = f"CPU [{','.join(cores)}]"
+
+    devfreq = emc_devfreq(sys_root)
+    if devfreq:
+        frequency = read_number(os.path.join(devfreq, 'cur_freq'))
+        maximum = read_number(os.path.join(devfreq, 'max_freq'))
+        if frequency and maximum:
+            line += f" EMC_FREQ {round(100 * frequency / maximum)}%@{frequency // 1000000}"
+
+    return line, times
+
+
+class TelemetrySampler:
+    """
+    Record hardware telemetry while an experiment runs, on the receiver's time base.
+
+    Runs tegrastats (or the given stand-in command) with the sampling interval if it is available and
+    otherwise polls /proc/stat and the CPU and memory controller frequencies in sysfs. Every sample is
+    written as a tegrastats line whose time is when it was read ('MM-DD-YYYY HH:MM:SS:ms:us ...'), so
+    emc_values.load_tegrastats reads it like the receiver and transmitter logs.
+    """
+
+    def __init__(self, output_file, interval_ms=100, tegrastats='tegrastats', proc_root=PROC_ROOT, sys_root=SYS_ROOT):
+        self.output_file = output_file
+        self.interval_ms = interval_ms
+        self.command = shlex.split(tegrastats) if tegrastats else []
+        self.proc_root = proc_root
+        self.sys_root = sys_root
+
+        self.source = None
+        self.start_ns = None
+        self.samples = 0
+        self.file = None
+        self.process = None
+        self.thread = None
+        self.stopped = Event()
+
+    def start(self):
+        """Start sampling in the background."""
+        self.file = open(self.output_file, 'w')
+        self.start_ns = time.time_ns()
+
+        if self.command and shutil.which(self.command[0]):
+            self.source = 'tegrastats'
+            self.process = subprocess.Popen(self.command + ['--interval', str(self.interval_ms)], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors='replace', bufsize=1, start_new_session=True)
+            self.thread = Thread(target=self._read_tegrastats, daemon=True)
+        else:
+            self.source = 'sysfs'
+            self.thread = Thread(target=self._poll_system, daemon=True)
+
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop sampling and close the log."""
+        self.stopped.set()
+        if self.process is not None:
+            # Stop tegrastats (and whatever a stand-in started) so that its output ends
+            for sig in (signal.SIGTERM, signal.SIGKILL):
+                try:
+                    os.killpg(self.process.pid, sig)
+                    self.process.wait(timeout=5)
+                    break
+                except ProcessLookupError:
+                    break
+                except subprocess.TimeoutExpired:
+                    continue
+        if self.thread is not None:
+            self.thread.join()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _write(self, time_ns, line):
+        self.file.write(f"{format_stamp(time_ns)} {line}\n")
+        self.file.flush()
+        self.samples += 1
+
+    def _read_tegrastats(self):
+        for line in self.process.stdout:
+            if line.strip():
+                self._write(time.time_ns(), TEGRASTATS_TIME_PATTERN.sub('', line, count=1).rstrip())
+
+    def _poll_system(self):
+        _, times = sample_system({}, self.proc_root, self.sys_root)
+        while not self.stopped.wait(self.interval_ms / 1000):
+            line, times = sample_system(times, self.proc_root, self.sys_root)
+            self._write(time.time_ns(), line)
+
+
+def summarize(telemetry_file, start_ns, end_ns, reference_ns):
+    """
+    Mean and maximum of every telemetry field (e.g. EMC_FREQ, CPU_MHZ) between two times (nanoseconds
+    since the Unix epoch), with the number of samples. The log's midnight is the one before reference_ns
+    (the start of the sampler).
+    """
+    reference_us = int(trace_time_us([reference_ns], reference_ns)[0])
+    times, fields = load_tegrastats(telemetry_file, reference_us=reference_us)
+    start_us, end_us = trace_time_us([start_ns, end_ns], reference_ns)
+
+    summary = {}
+    for name, values in fields.items():
+        means, maxima, counts = window_stats(times, values, [start_us], [end_us])
+        if counts[0] > 0:
+            summary[name] = {'mean': float(means[0]), 'max': float(maxima[0]), 'samples': int(counts[0])}
+    return summary
+
+
+if __name__ == "__main__":
+    # Record telemetry until interrupted (e.g. to check the sampler or a tegrastats stand-in)
+    args = parser.parse_args()
+
+    sampler = TelemetrySampler(args.output, args.interval, args.tegrastats).start()
+    print(f"Sampling {sampler.source} every {args.interval} ms into {args.output}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sampler.stop()
+    print(f"{sampler.samples} samples")
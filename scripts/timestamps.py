@@ -0,0 +1,138 @@
+import numpy as np
+
+# Microseconds per day and half day (used to detect midnight rollovers)
+DAY_US = 24 * 60 * 60 * 1000000
+HALF_DAY_US = DAY_US // 2
+
+# Digit weights (in microseconds) of the fixed-width timestamp formats, keyed by string length, with 0
+# marking the colon separators: 'HH:MM:SS' (tegrastats), 'HH:MM:SS:ms' (older logs) and
+# 'HH:MM:SS:ms:us' (receiver/transmitter)
+DIGIT_WEIGHTS = {
+    8: [36000000000, 3600000000, 0, 600000000, 60000000, 0, 10000000, 1000000],
+    12: [36000000000, 3600000000, 0, 600000000, 60000000, 0, 10000000, 1000000, 0, 100000, 10000, 1000],
+    16: [36000000000, 3600000000, 0, 600000000, 60000000, 0, 10000000, 1000000, 0, 100000, 10000, 1000, 0, 100, 10, 1],
+}
+
+
+def unwrap_midnight(times_us, reference_us=None):
+    """
+    Undo midnight rollovers in an array of microseconds since midnight.
+
+    Every backwards jump of more than half a day is treated as a rollover (adding a day to the rest
+    of the array) and every forward jump of more than half a day as a rollover that happened before
+    the reference. The first element is compared against reference_us (default: itself), which lets
+    two logs recorded at the same time be put on the same time base.
+    """
+    times_us = np.asarray(times_us, dtype=np.int64)
+
+    if len(times_us) == 0:
+        return times_us
+
+    if reference_us is None:
+        reference_us = times_us[0]
+
+    deltas = np.diff(times_us, prepend=np.int64(reference_us))
+    days = np.cumsum((deltas < -HALF_DAY_US).astype(np.int64) - (deltas > HALF_DAY_US))
+
+    return times_us + days * DAY_US
+
+
+def parse_timestamps(time_strs, rollover=True, reference_us=None):
+    """
+    Parse a column of 'HH:MM:SS', 'HH:MM:SS:ms' or 'HH:MM:SS:ms:us' strings (e.g. '21:51:39:871:009')
+    into an int64 array of microseconds since midnight (or since the first midnight with rollover).
+
+    All strings in the column must share one format. The digits are converted in a single vectorized
+    pass over the raw bytes instead of calling strptime per line.
+    """
+    time_bytes = None
+    if isinstance(time_strs, (list, tuple)) and len(time_strs) > 0:
+        # Equal length strings are joined into one buffer, which avoids converting them one by one
+        joined = ''.join(time_strs).encode()
+        if len(joined) == len(time_strs) * len(time_strs[0]):
+            time_bytes = np.frombuffer(joined, dtype=f'S{len(time_strs[0])}')
+
+    if time_bytes is None:
+        time_bytes = np.asarray(time_strs, dtype=np.bytes_).reshape(-1)
+
+    if len(time_bytes) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    width = time_bytes.dtype.itemsize
+    if width not in DIGIT_WEIGHTS:
+        raise ValueError(f"Time string '{time_bytes[0].decode()}' is not in the expected format 'HH:MM:SS[:ms[:us]]'")
+
+    # One row of characters per timestamp (shorter strings are null padded and fail validation below)
+    weights = np.array(DIGIT_WEIGHTS[width], dtype=np.int64)
+    characters = np.frombuffer(time_bytes.tobytes(), dtype=np.uint8).reshape(-1, width)
+    digits = characters - np.uint8(ord('0'))
+
+    # Digits must be 0-9 (smaller characters wrap around) and separators must be colons
+    valid = np.all(np.where(weights > 0, digits <= 9, characters == ord(':')), axis=1)
+    if not valid.all():
+        invalid = time_bytes[np.argmin(valid)].decode(errors='replace')
+        raise ValueError(f"Time string '{invalid}' is not in the expected format 'HH:MM:SS[:ms[:us]]'")
+
+    times_us = digits.astype(np.int64) @ weights
+
+    if rollover:
+        times_us = unwrap_midnight(times_us, reference_us)
+
+    return times_us
+
+
+def parse_timestamp(time_str):
+    """
+    Parse one 'HH:MM:SS', 'HH:MM:SS:ms' or 'HH:MM:SS:ms:us' string into microseconds since midnight
+    (parse_timestamps for a single line, e.g. of a log that is read while it is written).
+    """
+    weights = DIGIT_WEIGHTS.get(len(time_str))
+    if weights is None or not all('0' <= character <= '9' if weight > 0 else character == ':' for character, weight in zip(time_str, weights)):
+        raise ValueError(f"Time string '{time_str}' is not in the expected format 'HH:MM:SS[:ms[:us]]'")
+    return sum((ord(character) - ord('0')) * weight for character, weight in zip(time_str, weights))
+
+
+class MidnightUnwrapper:
+    """
+    Undo midnight rollovers of a stream of times one at a time (unwrap_midnight for a single time).
+    The first time is compared against reference (default: itself). day is the length of a day in
+    the unit of the times (default: microseconds).
+    """
+
+    def __init__(self, reference=None, day=DAY_US):
+        self.previous = reference
+        self.day = day
+        self.days = 0
+
+    def __call__(self, time):
+        if self.previous is None:
+            self.previous = time
+        delta = time - self.previous
+        if delta < -self.day // 2:
+            self.days += 1
+        elif delta > self.day // 2:
+            self.days -= 1
+        self.previous = time
+        return time + self.days * self.day
+
+
+def parse_timestamp_chunks(chunks, reference_us=None):
+    """
+    Parse the time string columns of an iterable of (time strings, payload) chunks (e.g. the chunks
+    of a log that is streamed) with parse_timestamps, unwrapping midnight rollovers across the chunk
+    boundaries. Yields (times, payload) for every chunk.
+    """
+    days = 0
+    for time_strs, payload in chunks:
+        raw_times_us = parse_timestamps(time_strs, rollover=False)
+
+        if len(raw_times_us) == 0:
+            yield raw_times_us, payload
+            continue
+
+        # Each chunk continues from the last (raw) time of the previous chunk
+        times_us = unwrap_midnight(raw_times_us, reference_us) + days * DAY_US
+        reference_us = raw_times_us[-1]
+        days = (times_us[-1] - raw_times_us[-1]) // DAY_US
+
+        yield times_us, payload
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+import numpy as np
+
+# Layout of the binary traces written by ./build/receiver and ./build/transmitter (see src/lib/trace_writer.hpp)
+TRACE_MAGIC = b'MC3TRACE'
+TRACE_VERSION = 1
+TRACE_HEADER_DTYPE = np.dtype([('magic', 'S8'), ('version', '<u4'), ('record_size', '<u4')])
+TRACE_RECORD_DTYPE = np.dtype({
+    'names': ['time', 'bandwidth', 'type'],
+    'formats': ['<i8', '<f8', 'u1'],
+    'offsets': [0, 8, 16],
+    'itemsize': 24,
+})
+
+# Record types
+RECEIVER_WARMUP = 0
+RECEIVER_RUN = 1
+TRANSMITTER_LOW = 2
+TRANSMITTER_HIGH = 3
+
+
+def is_trace_file(path):
+    """Check whether a file is a binary trace (instead of a text log)."""
+    with open(path, 'rb') as file:
+        return file.read(len(TRACE_MAGIC)) == TRACE_MAGIC
+
+
+def read_trace(path):
+    """Memory-map the records of a binary trace (read only, nothing is copied)."""
+    header = np.fromfile(path, dtype=TRACE_HEADER_DTYPE, count=1)
+
+    if len(header) == 0 or header['magic'][0] != TRACE_MAGIC:
+        raise ValueError(f"{path} is not a binary trace")
+    if header['version'][0] != TRACE_VERSION or header['record_size'][0] != TRACE_RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} has an unsupported trace version {header['version'][0]} (record size {header['record_size'][0]})")
+
+    # A trace killed mid-write can end with a partial record, which is ignored
+    with open(path, 'rb') as file:
+        file.seek(0, 2)
+        record_count = (file.tell() - TRACE_HEADER_DTYPE.itemsize) // TRACE_RECORD_DTYPE.itemsize
+
+    if record_count == 0:
+        return np.zeros(0, dtype=TRACE_RECORD_DTYPE)
+
+    return np.memmap(path, dtype=TRACE_RECORD_DTYPE, mode='r', offset=TRACE_HEADER_DTYPE.itemsize, shape=(record_count,))
+
+
+def trace_time_us(times_ns, reference_ns=None):
+    """
+    Convert trace times (nanoseconds since the Unix epoch) to microseconds since the local midnight
+    before reference_ns (default: the first time), matching the timestamps of the text logs.
+    """
+    times_ns = np.asarray(times_ns, dtype=np.int64)
+
+    if len(times_ns) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if reference_ns is None:
+        reference_ns = int(times_ns[0])
+
+    # Local midnight of the reference day (in nanoseconds since the Unix epoch)
+    reference = datetime.fromtimestamp(reference_ns / 1e9).astimezone()
+    midnight = reference.replace(hour=0, minute=0, second=0, microsecond=0)
+    midnight_ns = int(midnight.timestamp()) * 1000000000
+
+    return (times_ns - midnight_ns) // 1000
+
+
+def format_time_us(time_us):
+    """Format microseconds since midnight like the text logs ('HH:MM:SS:ms:us')."""
+    time_us = int(time_us)
+    return f"{time_us // 3600000000 % 24:02d}:{time_us // 60000000 % 60:02d}:{time_us // 1000000 % 60:02d}:{time_us // 1000 % 1000:03d}:{time_us % 1000:03d}"
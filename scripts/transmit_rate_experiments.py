@@ -1,23 +1,20 @@
-import os
-import time
-from threading import Thread
 import argparse
 
+from orchestrator import run_experiment
+
 
 #Transfer rate (switch from high to low or vice versa)
 time_switch_list = [1000,500,250,125,100,50,25,20]
 receiver_values = [13107200] # 104857600, 52428800, 26214400, 13107200, 6553600, 3276800, 1638400]#, 1433600, 1228800, 1024000, 819200, 716800, 614400, 512000, 409600, 204800
 
 
-# Function to run receiver
-def run_receiver(receiver_size, receiver_iterations, receiver_buffer_size,log_dir,time_switch):
-    command = f"./build/receiver copy 0 {receiver_iterations} {receiver_buffer_size} {receiver_size} > {args.log_dir}/time_switch{time_switch}_receiver{receiver_size}_transmitter{transmitter_size}.log"
-    os.system(command)
+# Receiver command
+def receiver_command(receiver_size, receiver_iterations, receiver_buffer_size):
+    return f"./build/receiver copy 0 {receiver_iterations} {receiver_buffer_size} {receiver_size}"
 
-# Function to run transmitter. Modify the number of cores (taskset) if needed.
-def run_transmitter(transmitter_size,time_switch,receiver_size,log_dir):
-    command = f"taskset -c 0-1 ./build/transmitter copy 0 0 {transmitter_size} 'UUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUU' {time_switch} > {log_dir}/time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}_cores0-1.log"
-    os.system(command)
+# Transmitter command. Modify the number of cores (taskset) if needed.
+def transmitter_command(transmitter_size,time_switch):
+    return f"taskset -c 0-1 ./build/transmitter copy 0 0 {transmitter_size} 'UUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUUU' {time_switch}"
 
 count  = 0 
 
@@ -33,6 +30,9 @@ for receiver_size in receiver_values:
 
 		parser.add_argument("--transmitter_size", type=int, required=True, help="Transmitter buffer size.")
 		# parser.add_argument("--receiver_size", type=int, required=True, help="Receiver buffer size.")
+		parser.add_argument("--live", type=lambda x: (str(x).lower() == 'true'), default=False, help="Merge the receiver output while it runs (through a pipe) and only write the transmitter and merged logs. Default is False.")
+		parser.add_argument("--ready_timeout", type=float, default=60, help="Seconds the receiver may take for its warmup before the configuration is killed.")
+		parser.add_argument("--timeout", type=float, default=0, help="Seconds after which a configuration is killed (0 for no limit).")
 
 		# Parse the command-line arguments
 		args = parser.parse_args()
@@ -43,18 +43,21 @@ for receiver_size in receiver_values:
 		# Calculate the buffer size  for the receiver
 		buffer_size = 16384 * (1073741824 / receiver_size * time_switch / 1000  )
 
-		# Start the receiver in a separate thread
-		receiver_thread = Thread(target=run_receiver, args=(receiver_size, 32, buffer_size, args.log_dir, time_switch))
-		receiver_thread.start()
-
-		# Wait for 1 second before starting the transmitter
-		time.sleep(1)
-
-		# Start the transmitter
-		run_transmitter(transmitter_size,time_switch,receiver_size,args.log_dir)
-
-		# Wait for the receiver thread to finish before moving to the next iteration
-		receiver_thread.join()
+		transmitter_file = f"{args.log_dir}/time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}_cores0-1.log"
+		receiver_file = f"{args.log_dir}/time_switch{time_switch}_receiver{receiver_size}_transmitter{transmitter_size}.log"
+		merged_file = f"{args.log_dir}/merged_time_switch{time_switch}_transmitter{transmitter_size}_receiver{receiver_size}_cores0-1.log"
+
+		# Run the receiver and start the transmitter once the receiver is done with its warmup (with --live, the receiver output is merged instead of logged)
+		run = run_experiment(
+			receiver_command(receiver_size, 32, buffer_size),
+			transmitter_command(transmitter_size, time_switch),
+			transmitter_file,
+			receiver_file=None if args.live else receiver_file,
+			merged_file=merged_file if args.live else None,
+			ready_timeout=args.ready_timeout,
+			timeout=args.timeout or None,
+		)
+		print(f"{run['status']}: {transmitter_file}")
 
 		# exit()
 
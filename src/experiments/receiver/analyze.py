@@ -1,10 +1,13 @@
 #!/usr/bin/env python
 
+import argparse
 from os.path import dirname, join, realpath
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+from decoder import bits_to_ascii, bits_to_string, decode_signal, normalize_bandwidth, resample_bandwidth
+from plotting import decimate_min_max, load_pyplot
+
 """
 Normalized thresholding hysterisis threshold
 """
@@ -35,260 +38,146 @@ Graph view offset (seconds)
 """
 graph_view_offset = 0
 
+"""
+Graph width (inches, the height is 6 inches)
+"""
+graph_width = 10
+
+"""
+Maximum number of bit labels in the view (the labels are left out beyond it)
+"""
+graph_max_bit_labels = 1000
+
 # Get the directory of the script
 __dir__ = dirname(realpath(__file__))
 
-# Read the CSV file into a DataFrame
-df = pd.read_csv(join(__dir__, "bandwidth.csv"))
-df["time"] = pd.to_datetime(df["time"], unit="ns")
-df.set_index("time", inplace=True)
-
-# Filter out nan values
-df.dropna(inplace=True)
-
-# Filter out warmup runs
-df = df[df["type"] != "warmup"]
-df.drop(columns=["type"], inplace=True)
-
-# # Iterpolate the data to regular intervals
-df = df.resample("25ms").mean().interpolate()
-
-# Convert to numpy array
-raw_bandwidth = df["bandwidth"].values
-raw_bandwidth_x = (df.index - df.index[0]).total_seconds()
-
-# Normalize the signal to have a mean of 0
-normalized_bandwidth = (
-    (raw_bandwidth - np.mean(raw_bandwidth)) / np.max(np.abs(raw_bandwidth))
-    if rolling_average_window_size == 0
-    else (
-        raw_bandwidth
-        - np.convolve(
-            raw_bandwidth,
-            np.ones(rolling_average_window_size) / rolling_average_window_size,
-            mode="same",
-        )
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Decode a receiver capture (differential manchester) and plot the decoding.")
+parser.add_argument("--input", type=str, default=join(__dir__, "bandwidth.csv"), help="Receiver capture (CSV with type, bandwidth and time columns).")
+parser.add_argument("--bin_width_ms", type=float, default=25, help="Resampling interval (ms).")
+parser.add_argument("--graph", type=lambda x: (str(x).lower() == 'true'), default=True, help="Plot the decoding (matplotlib is only imported then). Default is True.")
+parser.add_argument("--output", type=str, default=join(__dir__, "graph.png"), help="Graph file.")
+parser.add_argument("--dpi", type=int, default=300, help="Graph resolution (dots per inch).")
+parser.add_argument("--decimate", type=lambda x: (str(x).lower() == 'true'), default=True, help="Only plot the first, last, minimum and maximum sample of every pixel column. Default is True.")
+
+
+def load_capture(path, bin_width_ns=25000000):
+    """Load a receiver capture and resample it to regular intervals (25 ms by default). Returns the sample times (seconds) and bandwidths."""
+    # Read the CSV file into a DataFrame
+    df = pd.read_csv(path, dtype={"type": "category"})
+
+    # Filter out nan values
+    df.dropna(inplace=True)
+
+    # Filter out warmup runs
+    measured = (df["type"] != "warmup").to_numpy()
+
+    # Average the data into regular intervals (interpolating the empty ones)
+    return resample_bandwidth(df["time"].to_numpy(np.int64)[measured], df["bandwidth"].to_numpy(np.float64)[measured], bin_width_ns)
+
+
+def plot_decoding(raw_bandwidth_x, normalized_bandwidth, decoded, output_file, dpi=300, decimate=True):
+    """Plot the normalized and thresholded signal with its edges and bit labels (decimated to the pixel columns of the graph)."""
+    plt = load_pyplot()
+
+    # Bit labels (in the middle of the edges of every bit)
+    bit_values = np.unpackbits(decoded["bits"])[:decoded["bit_count"]]
+    bits = [
+        {
+            "x": (raw_bandwidth_x[start] + raw_bandwidth_x[end]) / 2,
+            "bit": bit,
+        }
+        for bit, start, end in zip(bit_values.tolist(), decoded["bit_starts"], decoded["bit_ends"])
+    ]
+
+    # Skip the labels if there are too many to read
+    bits = [bit for bit in bits if bit["x"] >= graph_view_offset and (graph_view_size == 0 or bit["x"] <= graph_view_offset + graph_view_size)]
+    if len(bits) > graph_max_bit_labels:
+        bits = []
+
+    # Only the samples of the view, at most four per pixel column
+    raw_bandwidth_x = np.asarray(raw_bandwidth_x)
+    view = np.flatnonzero((raw_bandwidth_x >= graph_view_offset) & ((graph_view_size == 0) | (raw_bandwidth_x <= graph_view_offset + graph_view_size)))
+    columns = graph_width * dpi if decimate else 0
+    normalized_samples = view[decimate_min_max(raw_bandwidth_x[view], normalized_bandwidth[view], columns)]
+    thresholded_samples = view[decimate_min_max(raw_bandwidth_x[view], decoded["thresholded"][view], columns)]
+
+    # Prepare the data for plotting
+    normalized_bandwidth_x = raw_bandwidth_x[normalized_samples]
+    normalized_bandwidth_y = normalized_bandwidth[normalized_samples]
+
+    thresholded_bandwidth_x = raw_bandwidth_x[thresholded_samples]
+    thresholded_bandwidth_y = decoded["thresholded"][thresholded_samples]
+
+    edges_x = raw_bandwidth_x[decoded["edges"]]
+    edges_y = normalized_bandwidth[decoded["edges"]]
+
+    # Plot the data
+    plt.tight_layout()
+    fig, ax1 = plt.subplots(figsize=(graph_width, 6))
+
+    ax1.plot(
+        normalized_bandwidth_x,
+        normalized_bandwidth_y,
+        label="Normalized Bandwidth",
+        color="tab:red",
     )
-    / np.max(np.abs(raw_bandwidth))
-)
-
-# Threshold the signal with hysteresis
-thresholded_bandwidth = np.zeros(len(normalized_bandwidth))
-last = False
-for index, value in enumerate(normalized_bandwidth):
-    if value > hysteresis_threshold:
-        thresholded_bandwidth[index] = 1
-        last = True
-    elif value < -hysteresis_threshold:
-        thresholded_bandwidth[index] = -1
-        last = False
-    else:
-        thresholded_bandwidth[index] = 1 if last else -1
-
-# Take the derivative
-derived_bandwidth = np.diff(thresholded_bandwidth)
-
-# Find the edges that are above the thresholds
-edges = np.where(np.abs(derived_bandwidth))[0]
-
-# Combine the edges that are too close together
-edge_separation = 0
-while edge_separation < len(edges) - 1:
-    # Check if the edges are too close together
-    if edges[edge_separation + 1] - edges[edge_separation] <= edge_separation_samples:
-        # Combine the edges
-        edges[edge_separation] = (
-            edges[edge_separation] + edges[edge_separation + 1]
-        ) // 2
-
-        # Delete the next edge
-        edges = np.delete(edges, edge_separation + 1)
-    else:
-        # Advance to the next edge
-        edge_separation += 1
-
-# Extract the clock frequency (the frequency with the largest sum of the first and second harmonics)
-edge_frequencies = np.bincount(np.diff(edges))
-
-if len(edge_frequencies) < 2:
-    raise Exception("No edge frequencies detected!")
-
-clock_frequency = 0
-clock_frequency_harmonics_sum = edge_frequencies[0]
-
-for edge_frequency_index in range(0, len(edge_frequencies) // 2):
-    # Compute the current harmonics sum
-    current_clock_frequency_harmonics_sum = (
-        edge_frequencies[edge_frequency_index]
-        + edge_frequencies[edge_frequency_index * 2]
+    ax1.plot(
+        thresholded_bandwidth_x,
+        thresholded_bandwidth_y,
+        label="Thresholded Bandwidth",
+        color="tab:green",
     )
-
-    # Update the clock frequency if the current harmonics sum is larger
-    if current_clock_frequency_harmonics_sum > clock_frequency_harmonics_sum:
-        clock_frequency = edge_frequency_index
-        clock_frequency_harmonics_sum = current_clock_frequency_harmonics_sum
-
-# Decode the data using differential manchester encoding (0 is transition, 1 is no transition)
-bitstream = ""
-bits = []
-edge_index = 0
-while edge_index < len(edges) - 1:
-    # Compute the relative frequency mismatch of the number samples between the edges
-    relative_frequency_mismatch_a = (
-        abs(
-            (edges[edge_index + 1] - edges[edge_index] - 1)
-            - clock_frequency
-        )
-        / clock_frequency
-    )
-    relative_frequency_mismatch_b = (
-        abs(
-            (edges[edge_index + 2] - edges[edge_index + 1] - 1)
-            - clock_frequency
-        )
-        / clock_frequency
-        if edge_index < len(edges) - 2
-        else None
+    ax1.scatter(
+        edges_x,
+        edges_y,
+        label="Edges",
+        color="tab:purple",
+        s=50,
     )
 
-    # Check if the relative frequency mismatch is acceptable for a 0 bit (between 0 and edge_threshold)
-    if (
-        relative_frequency_mismatch_a <= edge_transition_threshold
-        and relative_frequency_mismatch_b is not None
-        and relative_frequency_mismatch_b <= edge_transition_threshold
-        and edge_index < len(edges) - 2
-    ):
-        # Update the bit stream
-        bitstream += "0"
-
-        # Update the bits
-        bits.append(
-            {
-                "x": (
-                    raw_bandwidth_x[edges[edge_index]]
-                    + raw_bandwidth_x[edges[edge_index + 2]]
-                )
-                / 2,
-                "bit": 0,
-            }
+    # Add the bit labels
+    for bit in bits:
+        ax1.text(
+            bit["x"],
+            0,
+            str(bit["bit"]),
+            horizontalalignment="center",
+            verticalalignment="center",
+            color="black",
+            fontsize=12,
         )
 
-        # Skip the next edge
-        edge_index += 2
-
-    # Check if the relative frequency mismatch is acceptable for a 1 (between 1 - edge_threshold and 1 + edge_threshold)
-    elif (
-        1 - edge_transition_threshold
-        <= relative_frequency_mismatch_a
-        <= 1 + edge_transition_threshold
-    ):
-        # Update the bit stream
-        bitstream += "1"
-
-        # Update the bits
-        bits.append(
-            {
-                "x": (
-                    raw_bandwidth_x[edges[edge_index]]
-                    + raw_bandwidth_x[edges[edge_index + 1]]
-                )
-                / 2,
-                "bit": 1,
-            }
-        )
+    # Set the graph limits
+    if graph_view_size != 0:
+      ax1.set_xlim(graph_view_offset, graph_view_offset + graph_view_size)
 
-        # Advance to the next edge
-        edge_index += 1
-
-    # Otherwise, the data is corrupted
-    else:
-        # Delete the edge
-        edges = np.delete(edges, edge_index)
-
-        # Advance to the next edge
-        edge_index += 1
-
-# Prepare the data for plotting
-normalized_bandwidth_x = raw_bandwidth_x
-normalized_bandwidth_y = normalized_bandwidth
-
-thresholded_bandwidth_x = raw_bandwidth_x
-thresholded_bandwidth_y = thresholded_bandwidth
-
-derived_bandwidth_x = raw_bandwidth_x[1:]
-derived_bandwidth_y = derived_bandwidth
-
-edges_x = raw_bandwidth_x[edges]
-edges_y = normalized_bandwidth_y[edges]
-
-# Plot the data
-plt.tight_layout()
-fig, ax1 = plt.subplots(figsize=(10, 6))
-
-ax1.plot(
-    normalized_bandwidth_x,
-    normalized_bandwidth_y,
-    label="Normalized Bandwidth",
-    color="tab:red",
-)
-ax1.plot(
-    thresholded_bandwidth_x,
-    thresholded_bandwidth_y,
-    label="Thresholded Bandwidth",
-    color="tab:green",
-)
-# ax1.plot(
-#     derived_bandwidth_x,
-#     derived_bandwidth_y,
-#     label="Derived Bandwidth",
-#     color="tab:blue",
-# )
-ax1.scatter(
-    edges_x,
-    edges_y,
-    label="Edges",
-    color="tab:purple",
-    s=50,
-)
-
-# Add the bit labels
-for bit in bits:
-    # Skip if the bit is not in the view
-    if bit["x"] < graph_view_offset or (graph_view_size != 0 and bit["x"] > graph_view_offset + graph_view_size):
-        continue
-
-    # Add the bit label
-    ax1.text(
-        bit["x"],
-        0,
-        str(bit["bit"]),
-        horizontalalignment="center",
-        verticalalignment="center",
-        color="black",
-        fontsize=12,
-    )
+    # Set the graph labels
+    ax1.set_xlabel("Time (s)")
+    ax1.set_ylabel("Normalized Bandwidth")
+
+    # Set the graph legend
+    ax1.legend(loc="upper left")
+
+    # Save the plot as a PNG file
+    plt.savefig(output_file, dpi=dpi)
+    plt.close(fig)
 
-# Set the graph limits
-if graph_view_size != 0:
-  ax1.set_xlim(graph_view_offset, graph_view_offset + graph_view_size)
 
-# Set the graph labels
-ax1.set_xlabel("Time (s)")
-ax1.set_ylabel("Normalized Bandwidth")
+if __name__ == "__main__":
+    args = parser.parse_args()
 
-# Set the graph legend
-ax1.legend(loc="upper left")
+    raw_bandwidth_x, raw_bandwidth = load_capture(args.input, int(args.bin_width_ms * 1000000))
 
-# Save the plot as a PNG file
-plt.savefig(join(__dir__, "graph.png"), dpi=300)
+    # Normalize the signal to have a mean of 0 and decode it
+    normalized_bandwidth = normalize_bandwidth(raw_bandwidth, rolling_average_window_size)
+    decoded = decode_signal(normalized_bandwidth, hysteresis_threshold, edge_separation_samples, edge_transition_threshold)
 
-# Print the bit stream
-print(f"Bits: {bitstream}")
+    if args.graph:
+        plot_decoding(raw_bandwidth_x, normalized_bandwidth, decoded, args.output, args.dpi, args.decimate)
 
-# Convert the bit stream to its ASCII representation
-ascii = ""
-for edge_index in range(0, len(bitstream), 8):
-    ascii += chr(int(bitstream[edge_index : edge_index + 8], 2))
+    # Print the bit stream
+    print(f"Bits: {bits_to_string(decoded['bits'], decoded['bit_count'])}")
 
-# Print the ASCII representation
-print(f"ASCII: {ascii}")
+    # Print the ASCII representation
+    print(f"ASCII: {bits_to_ascii(decoded['bits'], decoded['bit_count'])}")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+
+import argparse
+import csv
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from os.path import dirname, join, realpath
+
+import numpy as np
+
+from analyze import edge_separation_samples, edge_transition_threshold, hysteresis_threshold, load_capture, rolling_average_window_size
+from decoder import bits_to_ascii, bits_to_string, count_bit_errors, decode_signal, message_to_bits, normalize_bandwidth
+
+# The table printing is shared with the sweep analyzer
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", "..", "..", "scripts"))
+from sweep_analysis import print_table
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Decode many receiver captures on all cores and write one summary table.")
+parser.add_argument("inputs", nargs="+", help="Receiver captures: CSV files, directories (every *.csv in them) or glob patterns.")
+parser.add_argument("--message", type=str, default=None, help="Expected message, to calculate the bit error rate of every capture.")
+parser.add_argument("--bin_width_ms", type=float, default=25, help="Resampling interval (ms).")
+parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Number of worker processes (default: all cores).")
+parser.add_argument("--output", type=str, default=None, help="Optional CSV file for the summary table (with the bit streams).")
+
+# Columns of the summary table
+RESULT_COLUMNS = ['samples', 'edges', 'clock_samples', 'clock_period_ms', 'bits', 'bit_errors', 'bit_error_rate', 'offset', 'ascii', 'bitstream', 'error']
+
+# Columns that are printed (the bit streams are only written to the CSV file)
+PRINTED_COLUMNS = ['capture', 'samples', 'edges', 'clock_period_ms', 'bits', 'bit_errors', 'bit_error_rate', 'ascii', 'error']
+
+
+def find_captures(inputs):
+    """
+    The capture files of every input (a file, a directory's *.csv files or a glob pattern), sorted and
+    without duplicates, and the inputs that match no capture (e.g. a mistyped path).
+    """
+    captures = []
+    unmatched = []
+    for path in inputs:
+        if os.path.isdir(path):
+            matches = sorted(glob.glob(os.path.join(path, "*.csv")))
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            matches = sorted(glob.glob(path, recursive=True))
+
+        if not matches:
+            unmatched.append(path)
+        captures.extend(matches)
+    return list(dict.fromkeys(captures)), unmatched
+
+
+def failed_row(capture, error):
+    """Summary row of a capture that could not be decoded."""
+    row = {'capture': capture}
+    row.update({column: '' for column in RESULT_COLUMNS})
+    row['error'] = error
+    return row
+
+
+def decode_capture(capture, message, bin_width_ns):
+    """
+    Decode one receiver capture with the settings of analyze.py (runs in a worker process). Any error
+    (missing or corrupt capture) is reported in the error column instead of aborting the batch.
+    """
+    row = {'capture': capture}
+    row.update({column: '' for column in RESULT_COLUMNS})
+
+    try:
+        _, raw_bandwidth = load_capture(capture, bin_width_ns)
+        decoded = decode_signal(normalize_bandwidth(raw_bandwidth, rolling_average_window_size), hysteresis_threshold, edge_separation_samples, edge_transition_threshold)
+
+        row['samples'] = len(raw_bandwidth)
+        row['edges'] = len(decoded['edges'])
+        row['clock_samples'] = decoded['clock_frequency']
+        row['clock_period_ms'] = round(decoded['clock_frequency'] * bin_width_ns / 1e6, 3)
+        row['bits'] = decoded['bit_count']
+        row['ascii'] = bits_to_ascii(decoded['bits'], decoded['bit_count'])
+        row['bitstream'] = bits_to_string(decoded['bits'], decoded['bit_count'])
+
+        if message:
+            message_bits = message_to_bits(message)
+            errors, offset = count_bit_errors(np.unpackbits(decoded['bits'])[:decoded['bit_count']], message_bits)
+            row['bit_errors'] = errors
+            row['bit_error_rate'] = round(errors / len(message_bits), 6)
+            row['offset'] = offset
+    except Exception as e:
+        row['error'] = f"{type(e).__name__}: {e}"
+
+    return row
+
+
+def decode_batch(captures, message, bin_width_ns, jobs):
+    """Decode every capture on a pool of jobs processes and return the summary rows in capture order."""
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(decode_capture, capture, message, bin_width_ns) for capture in captures]
+
+        rows = []
+        for capture, future in zip(captures, futures):
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                # A worker that died (e.g. out of memory) only loses its own capture
+                rows.append(failed_row(capture, f"{type(e).__name__}: {e}"))
+
+    return rows
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    captures, unmatched = find_captures(args.inputs)
+
+    # Inputs that match no capture are reported as failed rows
+    rows = decode_batch(captures, args.message, int(args.bin_width_ms * 1000000), args.jobs) if captures else []
+    rows += [failed_row(path, "No receiver capture matches this input") for path in unmatched]
+
+    # Control characters of the recovered text are escaped
+    print_table([dict(row, ascii=ascii(row['ascii'])[1:-1]) for row in rows], PRINTED_COLUMNS, first_left=True)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as out_file:
+            writer = csv.DictWriter(out_file, fieldnames=['capture'] + RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+    failed = sum(1 for row in rows if row['error'])
+    if failed:
+        print(f"{failed} of {len(rows)} captures failed", file=sys.stderr)
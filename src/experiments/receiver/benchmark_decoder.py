@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+import argparse
+import sys
+import time
+from os.path import dirname, join, realpath
+
+import numpy as np
+import pandas as pd
+
+from decoder import bits_to_string, coalesce_edges, decode_differential_manchester, decode_signal, estimate_clock_frequency, threshold_hysteresis
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Check the thresholding and edge decoder against the original loops on bandwidth.csv and benchmark it on synthetic traces.")
+parser.add_argument("--sizes", type=str, default="10000,100000,1000000,10000000", help="Comma separated synthetic trace lengths (samples).")
+parser.add_argument("--legacy_max", type=int, default=1000000, help="Largest size that is also decoded with the original loops.")
+parser.add_argument("--benchmark", type=lambda x: (str(x).lower() == 'true'), default=True, help="Benchmark the synthetic traces after the bandwidth.csv check (False only runs the check). Default is True.")
+
+# Decoder settings of analyze.py
+hysteresis_threshold = 0.1
+edge_separation_samples = 7
+edge_transition_threshold = 0.5
+
+# Get the directory of the script
+__dir__ = dirname(realpath(__file__))
+
+
+def legacy_coalesce_edges(edges):
+    """Original analyze.py edge combination loop, kept as the reference."""
+    edge_separation = 0
+    while edge_separation < len(edges) - 1:
+        if edges[edge_separation + 1] - edges[edge_separation] <= edge_separation_samples:
+            edges[edge_separation] = (edges[edge_separation] + edges[edge_separation + 1]) // 2
+            edges = np.delete(edges, edge_separation + 1)
+        else:
+            edge_separation += 1
+    return edges
+
+
+def legacy_decode(edges, clock_frequency):
+    """Original analyze.py differential manchester loop, kept as the reference (returns the bit stream, the bit edges and the remaining edges)."""
+    bitstream = ""
+    bit_edges = []
+    edge_index = 0
+    while edge_index < len(edges) - 1:
+        relative_frequency_mismatch_a = abs((edges[edge_index + 1] - edges[edge_index] - 1) - clock_frequency) / clock_frequency
+        relative_frequency_mismatch_b = (
+            abs((edges[edge_index + 2] - edges[edge_index + 1] - 1) - clock_frequency) / clock_frequency
+            if edge_index < len(edges) - 2
+            else None
+        )
+
+        if (
+            relative_frequency_mismatch_a <= edge_transition_threshold
+            and relative_frequency_mismatch_b is not None
+            and relative_frequency_mismatch_b <= edge_transition_threshold
+            and edge_index < len(edges) - 2
+        ):
+            bitstream += "0"
+            bit_edges.append((edges[edge_index], edges[edge_index + 2]))
+            edge_index += 2
+        elif 1 - edge_transition_threshold <= relative_frequency_mismatch_a <= 1 + edge_transition_threshold:
+            bitstream += "1"
+            bit_edges.append((edges[edge_index], edges[edge_index + 1]))
+            edge_index += 1
+        else:
+            edges = np.delete(edges, edge_index)
+            edge_index += 1
+
+    return bitstream, bit_edges, edges
+
+
+def decode(edges, clock_frequency):
+    """Decode with decoder.py, in the same form as legacy_decode."""
+    bit_values, bit_starts, bit_ends, edges = decode_differential_manchester(edges, clock_frequency, edge_transition_threshold)
+    return "".join(str(bit) for bit in bit_values.tolist()), list(zip(bit_starts, bit_ends)), edges
+
+
+def legacy_clock_frequency(edges):
+    """Original analyze.py clock extraction (the frequency with the largest sum of the first and second harmonics)."""
+    edge_frequencies = np.bincount(np.diff(edges))
+    clock_frequency = 0
+    clock_frequency_harmonics_sum = edge_frequencies[0]
+    for edge_frequency_index in range(0, len(edge_frequencies) // 2):
+        current_clock_frequency_harmonics_sum = edge_frequencies[edge_frequency_index] + edge_frequencies[edge_frequency_index * 2]
+        if current_clock_frequency_harmonics_sum > clock_frequency_harmonics_sum:
+            clock_frequency = edge_frequency_index
+            clock_frequency_harmonics_sum = current_clock_frequency_harmonics_sum
+    return clock_frequency
+
+
+def legacy_threshold(normalized_bandwidth):
+    """Original analyze.py hysteresis thresholding loop, kept as the reference."""
+    thresholded_bandwidth = np.zeros(len(normalized_bandwidth))
+    last = False
+    for index, value in enumerate(normalized_bandwidth):
+        if value > hysteresis_threshold:
+            thresholded_bandwidth[index] = 1
+            last = True
+        elif value < -hysteresis_threshold:
+            thresholded_bandwidth[index] = -1
+            last = False
+        else:
+            thresholded_bandwidth[index] = 1 if last else -1
+    return thresholded_bandwidth
+
+
+def bandwidth_csv_signal():
+    """The normalized signal of the bundled bandwidth.csv (the steps of analyze.py before the thresholding)."""
+    df = pd.read_csv(join(__dir__, "bandwidth.csv"))
+    df["time"] = pd.to_datetime(df["time"], unit="ns")
+    df.set_index("time", inplace=True)
+    df.dropna(inplace=True)
+    df = df[df["type"] != "warmup"]
+    df.drop(columns=["type"], inplace=True)
+    df = df.resample("25ms").mean().interpolate()
+
+    raw_bandwidth = df["bandwidth"].values
+    return (raw_bandwidth - np.mean(raw_bandwidth)) / np.max(np.abs(raw_bandwidth))
+
+
+def synthetic_edges(samples, rng, clock_frequency=10, glitch_rate=0.2):
+    """Edges of a random differential manchester square wave (clock_frequency samples per half bit) with short glitches."""
+    bits = rng.integers(0, 2, samples // (2 * clock_frequency) + 1)
+
+    # A 1 bit is one level for a whole bit, a 0 bit switches in the middle (every bit starts with a switch)
+    half_bit_switches = np.stack([np.ones(len(bits), dtype=np.int64), 1 - bits], axis=1).reshape(-1)
+    levels = np.repeat(np.cumsum(half_bit_switches) % 2, clock_frequency)[:samples]
+
+    # Glitches flip one to three samples
+    for glitch in np.flatnonzero(rng.random(samples) < glitch_rate / clock_frequency):
+        levels[glitch:glitch + rng.integers(1, 4)] ^= 1
+
+    return np.where(np.diff(levels))[0]
+
+
+def check_bandwidth_csv():
+    """Decode the bundled bandwidth.csv with decoder.py and the original loops and compare every stage (returns the number of bits and whether all stages match)."""
+    normalized_bandwidth = bandwidth_csv_signal()
+    legacy_thresholded = legacy_threshold(normalized_bandwidth)
+    thresholded = threshold_hysteresis(normalized_bandwidth, hysteresis_threshold)
+    edges = np.where(np.abs(np.diff(legacy_thresholded)))[0]
+    legacy_edges = legacy_coalesce_edges(edges.copy())
+    combined_edges = coalesce_edges(edges, edge_separation_samples)
+    clock_frequency = legacy_clock_frequency(legacy_edges)
+    legacy_result = legacy_decode(legacy_edges, clock_frequency)
+    result = decode(combined_edges, clock_frequency)
+    decoded = decode_signal(normalized_bandwidth, hysteresis_threshold, edge_separation_samples, edge_transition_threshold)
+    identical = (
+        np.array_equal(legacy_thresholded, thresholded)
+        and np.array_equal(legacy_edges, combined_edges)
+        and clock_frequency == estimate_clock_frequency(combined_edges)
+        and legacy_result[0] == result[0]
+        and legacy_result[1] == result[1]
+        and np.array_equal(legacy_result[2], result[2])
+        and legacy_result[0] == bits_to_string(decoded["bits"], decoded["bit_count"])
+    )
+    return len(result[0]), identical
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    # Regression check on the bundled capture (a mismatch fails the run)
+    bits, identical = check_bandwidth_csv()
+    print(f"bandwidth.csv: {bits} bits, identical: {identical}")
+    if not identical:
+        sys.exit(1)
+
+    if not args.benchmark:
+        sys.exit(0)
+
+    # Scaling of the thresholding on synthetic signals (25 ms samples, up to about 70 hours)
+    rng = np.random.default_rng(0)
+    print(f"{'samples':>10} {'threshold (s)':>14} {'legacy (s)':>11} {'identical':>10}")
+    for samples in [int(size) for size in args.sizes.split(',')]:
+        signal = np.clip(np.repeat(rng.choice([-0.3, 0.3], samples // 20 + 1), 20)[:samples] + rng.normal(0, 0.15, samples), -1, 1)
+
+        start = time.perf_counter()
+        thresholded = threshold_hysteresis(signal, hysteresis_threshold)
+        elapsed = time.perf_counter() - start
+
+        if samples <= args.legacy_max:
+            start = time.perf_counter()
+            legacy_thresholded = legacy_threshold(signal)
+            legacy_elapsed = f"{time.perf_counter() - start:.3f}"
+            identical = str(np.array_equal(legacy_thresholded, thresholded))
+        else:
+            legacy_elapsed = identical = "-"
+
+        print(f"{samples:>10} {elapsed:>14.3f} {legacy_elapsed:>11} {identical:>10}")
+
+    # Scaling of the edge decoding on synthetic traces
+    print(f"{'samples':>10} {'edges':>9} {'decoder (s)':>12} {'legacy (s)':>11} {'identical':>10}")
+    for samples in [int(size) for size in args.sizes.split(',')]:
+        edges = synthetic_edges(samples, rng)
+
+        start = time.perf_counter()
+        combined_edges = coalesce_edges(edges, edge_separation_samples)
+        clock_frequency = estimate_clock_frequency(combined_edges)
+        result = decode(combined_edges, clock_frequency)
+        elapsed = time.perf_counter() - start
+
+        if samples <= args.legacy_max:
+            start = time.perf_counter()
+            legacy_edges = legacy_coalesce_edges(edges.copy())
+            legacy_clock = legacy_clock_frequency(legacy_edges)
+            legacy_result = legacy_decode(legacy_edges, legacy_clock)
+            legacy_elapsed = f"{time.perf_counter() - start:.3f}"
+            identical = str(np.array_equal(legacy_edges, combined_edges) and legacy_clock == clock_frequency and legacy_result[0] == result[0] and np.array_equal(legacy_result[2], result[2]))
+        else:
+            legacy_elapsed = identical = "-"
+
+        print(f"{samples:>10} {len(edges):>9} {elapsed:>12.3f} {legacy_elapsed:>11} {identical:>10}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+import argparse
+import sys
+import time
+import tracemalloc
+from os.path import dirname, join, realpath
+
+import numpy as np
+import pandas as pd
+
+from analyze import load_capture
+from decoder import resample_bandwidth
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Check the NumPy resampler against the pandas resample of the original analyze.py and benchmark both.")
+parser.add_argument("--sizes", type=str, default="100000,1000000,10000000", help="Comma separated synthetic capture lengths (samples).")
+parser.add_argument("--bin_width_ms", type=float, default=25, help="Resampling interval (ms).")
+parser.add_argument("--benchmark", type=lambda x: (str(x).lower() == 'true'), default=True, help="Benchmark the synthetic captures after the bandwidth.csv check (False only runs the check). Default is True.")
+
+# Get the directory of the script
+__dir__ = dirname(realpath(__file__))
+
+
+def pandas_resample(times_ns, bandwidths, bin_width_ns):
+    """Original analyze.py resampling with pandas, kept as the reference."""
+    df = pd.DataFrame({"bandwidth": bandwidths}, index=pd.to_datetime(times_ns, unit="ns"))
+    df = df.resample(f"{bin_width_ns}ns").mean().interpolate()
+    return (df.index - df.index[0]).total_seconds(), df["bandwidth"].values
+
+
+def legacy_load_capture(path):
+    """Original analyze.py capture loading, kept as the reference."""
+    df = pd.read_csv(path)
+    df["time"] = pd.to_datetime(df["time"], unit="ns")
+    df.set_index("time", inplace=True)
+    df.dropna(inplace=True)
+    df = df[df["type"] != "warmup"]
+    df.drop(columns=["type"], inplace=True)
+    df = df.resample("25ms").mean().interpolate()
+    return (df.index - df.index[0]).total_seconds(), df["bandwidth"].values
+
+
+def measure(function, *args):
+    """Run a function and return its result, wall time (seconds) and peak of the traced allocations (MB)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def same_resample(expected, result):
+    """Whether two resampled signals have the same times and bandwidths (within float tolerance)."""
+    return len(expected[1]) == len(result[1]) and np.allclose(np.asarray(expected[0]), result[0]) and np.allclose(expected[1], result[1])
+
+
+def synthetic_capture(samples, rng):
+    """Receiver sample times (ns, about 27 ms apart with jitter and a few long gaps) and bandwidths."""
+    gaps = rng.normal(27e6, 3e6, samples).clip(1e6) + (rng.random(samples) < 0.001) * 1e9
+    return 695655702865955 + np.cumsum(gaps).astype(np.int64), rng.normal(90, 10, samples)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    bin_width_ns = int(args.bin_width_ms * 1000000)
+
+    # Regression check on the bundled capture (a mismatch fails the run)
+    identical = same_resample(legacy_load_capture(join(__dir__, "bandwidth.csv")), load_capture(join(__dir__, "bandwidth.csv")))
+    print(f"bandwidth.csv: identical: {identical}")
+    if not identical:
+        sys.exit(1)
+
+    if not args.benchmark:
+        sys.exit(0)
+
+    # Synthetic captures
+    rng = np.random.default_rng(0)
+    print(f"{'samples':>10} {'bins':>10} {'numpy (s)':>10} {'numpy (MB)':>11} {'pandas (s)':>11} {'pandas (MB)':>12} {'identical':>10}")
+    for samples in [int(size) for size in args.sizes.split(',')]:
+        times_ns, bandwidths = synthetic_capture(samples, rng)
+
+        result, elapsed, peak = measure(resample_bandwidth, times_ns, bandwidths, bin_width_ns)
+        expected, pandas_elapsed, pandas_peak = measure(pandas_resample, times_ns, bandwidths, bin_width_ns)
+
+        print(f"{samples:>10} {len(result[1]):>10} {elapsed:>10.3f} {peak:>11.1f} {pandas_elapsed:>11.3f} {pandas_peak:>12.1f} {str(same_resample(expected, result)):>10}")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+import argparse
+import importlib.util
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from os.path import dirname, join, realpath
+
+import numpy as np
+
+from plotting import decimate_min_max
+
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Benchmark the startup of analyze.py with and without the graph and the min/max decimation of long traces.")
+parser.add_argument("--runs", type=int, default=5, help="Runs of every command (the median is reported).")
+parser.add_argument("--sizes", type=str, default="100000,1000000,10000000", help="Comma separated synthetic trace lengths (samples).")
+parser.add_argument("--columns", type=int, default=3000, help="Pixel columns of the decimation (graph width times dpi).")
+
+# Get the directory of the script
+__dir__ = dirname(realpath(__file__))
+
+
+def time_command(command, runs):
+    """Median wall time of a command (seconds)."""
+    elapsed = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, cwd=__dir__)
+        elapsed.append(time.perf_counter() - start)
+    return statistics.median(elapsed)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    has_matplotlib = importlib.util.find_spec("matplotlib") is not None
+
+    # Importing analyze.py must not import matplotlib
+    imported = subprocess.run([sys.executable, "-c", "import sys, analyze; print('matplotlib' in sys.modules)"], check=True, capture_output=True, text=True, cwd=__dir__).stdout.strip()
+    print(f"matplotlib imported with analyze.py: {imported}")
+
+    # Startup and decoding of bandwidth.csv
+    output = join(tempfile.mkdtemp(), "graph.png")
+    commands = [
+        ("python", [sys.executable, "-c", "pass"], True),
+        ("import matplotlib.pyplot", [sys.executable, "-c", "import matplotlib.pyplot"], has_matplotlib),
+        ("analyze.py --graph False", [sys.executable, "analyze.py", "--graph", "False"], True),
+        ("analyze.py", [sys.executable, "analyze.py", "--output", output], has_matplotlib),
+        ("analyze.py --decimate False", [sys.executable, "analyze.py", "--output", output, "--decimate", "False"], has_matplotlib),
+    ]
+    print(f"{'command':<30} {'time (s)':>9}")
+    for name, command, available in commands:
+        elapsed = f"{time_command(command, args.runs):.3f}" if available else "-"
+        print(f"{name:<30} {elapsed:>9}")
+
+    # Decimation of synthetic traces (25 ms samples)
+    rng = np.random.default_rng(0)
+    print(f"{'samples':>10} {'kept':>7} {'decimate (s)':>13}")
+    for samples in [int(size) for size in args.sizes.split(',')]:
+        x = np.arange(samples) * 0.025
+        y = np.repeat(rng.choice([-0.3, 0.3], samples // 20 + 1), 20)[:samples] + rng.normal(0, 0.15, samples)
+
+        start = time.perf_counter()
+        kept = decimate_min_max(x, y, args.columns)
+        elapsed = time.perf_counter() - start
+
+        print(f"{samples:>10} {len(kept):>7} {elapsed:>13.3f}")
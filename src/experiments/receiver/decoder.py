@@ -0,0 +1,250 @@
+import numpy as np
+
+
+def threshold_hysteresis(values, hysteresis_threshold):
+    """
+    Threshold a normalized signal with hysteresis: 1 above hysteresis_threshold, -1 below
+    -hysteresis_threshold and the previous level in between (-1 before the first crossing).
+
+    The crossings are marked at once and the last crossing before every sample is forward filled
+    with a cumulative maximum over the crossing positions.
+    """
+    values = np.asarray(values)
+
+    # Levels set by the crossings (above wins if both apply to a negative threshold)
+    high = values > hysteresis_threshold
+    crossing = high | (values < -hysteresis_threshold)
+
+    last_crossing = np.maximum.accumulate(np.where(crossing, np.arange(len(values)), -1))
+    return np.where((last_crossing >= 0) & high[np.maximum(last_crossing, 0)], 1.0, -1.0)
+
+
+def coalesce_edges(edges, edge_separation_samples):
+    """
+    Combine the edges that are too close together (at most edge_separation_samples apart).
+
+    An edge is combined with the next one by replacing it with their (floored) midpoint, which is then
+    compared with the edge after that, and so on. Combining only moves an edge backwards, so edges can
+    only be combined within runs of originally close edges. The isolated edges are kept as they are and
+    every run is walked once, which keeps the pass linear.
+    """
+    edges = np.asarray(edges)
+    combined = edges.copy()
+
+    if len(edges) < 2:
+        return combined
+
+    close = np.diff(edges) <= edge_separation_samples
+    if not close.any():
+        return combined
+
+    keep = np.ones(len(edges), dtype=bool)
+
+    # Runs of close gaps (the gaps start to end - 1 connect the edges start to end)
+    boundaries = np.flatnonzero(np.diff(np.concatenate([[False], close, [False]]).astype(np.int8)))
+    for start, end in zip(boundaries[0::2].tolist(), boundaries[1::2].tolist()):
+        run = edges[start:end + 1].tolist()
+        current, value = start, run[0]
+        for offset, edge in enumerate(run[1:], start + 1):
+            if edge - value <= edge_separation_samples:
+                # Combine the edges
+                value = (value + edge) // 2
+                keep[offset] = False
+            else:
+                combined[current] = value
+                current, value = offset, edge
+        combined[current] = value
+
+    return combined[keep]
+
+
+def estimate_clock_frequency(edges):
+    """
+    Extract the clock frequency (the number of samples between edges with the largest sum of the first
+    and second harmonics). The harmonic sums of all frequencies are added at once and the first largest
+    one wins, as long as it beats the count of edges zero samples apart.
+    """
+    edge_frequencies = np.bincount(np.diff(edges))
+
+    if len(edge_frequencies) < 2:
+        raise Exception("No edge frequencies detected!")
+
+    # Sum of the first and second harmonics of every frequency up to half the largest spacing
+    candidates = len(edge_frequencies) // 2
+    harmonics_sums = edge_frequencies[:candidates] + edge_frequencies[0:2 * candidates:2]
+
+    clock_frequency = int(np.argmax(harmonics_sums))
+    return clock_frequency if harmonics_sums[clock_frequency] > edge_frequencies[0] else 0
+
+
+def decode_differential_manchester(edges, clock_frequency, edge_transition_threshold):
+    """
+    Decode the edges using differential manchester encoding (0 is transition, 1 is no transition).
+
+    Returns the bits, the edges every bit starts and ends at, and the edges without the corrupted ones.
+    Every edge the decoder visits decides on its own where the decoder goes next: two clock periods are
+    a 0 (skipping the middle edge), one double period is a 1 and anything else deletes the edge (and
+    skips the one after it). The visited edges are therefore the path of next edges from the first one,
+    which is marked with pointer doubling (the path up to 2^(k+1) steps is the path up to 2^k steps and
+    its 2^k step jumps) instead of walking the edges one by one.
+    """
+    edges = np.asarray(edges)
+    edge_count = len(edges)
+    last = max(edge_count - 1, 0)
+
+    # Relative frequency mismatch of the number of samples between every edge and the next one
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mismatches = np.abs((np.diff(edges) - 1) - clock_frequency) / clock_frequency
+
+    # Acceptable for half of a 0 bit (between 0 and edge_threshold) or a 1 bit (between 1 - edge_threshold and 1 + edge_threshold)
+    half_zero = mismatches <= edge_transition_threshold
+    one = (1 - edge_transition_threshold <= mismatches) & (mismatches <= 1 + edge_transition_threshold)
+
+    # What happens at every edge that has a next edge (a 0 needs the two spacings after it)
+    zero = half_zero & np.append(half_zero[1:], False)
+    one &= ~zero
+    corrupted = ~(zero | one)
+
+    # Next edge of every edge (the decoder stops at the last edge)
+    indexes = np.arange(last)
+    next_edges = np.append(np.minimum(np.where(one, indexes + 1, indexes + 2), last), last)
+
+    # Mark the path from the first edge
+    visited = np.zeros(last + 1, dtype=bool)
+    visited[0] = True
+    jumps = next_edges
+    for _ in range(max(last, 1).bit_length() + 1):
+        visited[jumps[visited]] = True
+        jumps = jumps[jumps]
+    visited = visited[:last]
+
+    starts = np.flatnonzero(visited & ~corrupted)
+    keep = np.ones(edge_count, dtype=bool)
+    keep[:last] = ~(visited & corrupted)
+
+    return (
+        one[starts].astype(np.int8),
+        edges[starts],
+        edges[starts + np.where(one[starts], 1, 2)],
+        edges[keep],
+    )
+
+
+def pack_bits(bits):
+    """Pack decoded bits (one per element) into bytes, most significant bit first (the last byte is padded with zeros)."""
+    return np.packbits(np.asarray(bits, dtype=np.uint8))
+
+
+def bits_to_ascii(packed_bits, bit_count):
+    """
+    Convert packed bits to their ASCII representation (8 bits per character). Like the original
+    analyze.py conversion, a final partial byte is read as the number its bits form.
+    """
+    full_bytes, remainder = divmod(bit_count, 8)
+    ascii = "".join(chr(byte) for byte in packed_bits[:full_bytes].tolist())
+    if remainder:
+        ascii += chr(int(packed_bits[full_bytes]) >> (8 - remainder))
+    return ascii
+
+
+def bits_to_string(packed_bits, bit_count):
+    """The bit stream of packed bits as a string of 0s and 1s."""
+    return "".join("01"[bit] for bit in np.unpackbits(packed_bits)[:bit_count].tolist())
+
+
+def message_to_bits(message):
+    """The bits of an ASCII message (8 per character, most significant first) as a uint8 array."""
+    return np.unpackbits(np.frombuffer(message.encode("latin-1"), dtype=np.uint8))
+
+
+def count_bit_errors(bits, expected_bits):
+    """
+    Align the expected bits with a decoded bit stream where they match best and count the errors there
+    (flipped bits and expected bits that fall outside the stream, which may start late or end early).
+    The matches of every alignment are counted with two correlations, one for the 1s and one for the 0s.
+    Returns the errors and the offset of the expected bits in the stream (negative if they start before it).
+    """
+    bits = np.asarray(bits, dtype=np.int64)
+    expected_bits = np.asarray(expected_bits, dtype=np.int64)
+
+    if len(expected_bits) == 0:
+        return 0, 0
+
+    # Every overlap of the two (the padding matches neither a 1 nor a 0)
+    padding = np.zeros(len(expected_bits) - 1, dtype=np.int64)
+    ones = np.concatenate([padding, bits, padding])
+    zeros = np.concatenate([padding, 1 - bits, padding])
+    matches = np.correlate(ones, expected_bits, "valid") + np.correlate(zeros, 1 - expected_bits, "valid")
+
+    best = int(np.argmax(matches))
+    return len(expected_bits) - int(matches[best]), best - len(padding)
+
+
+def resample_bandwidth(times_ns, bandwidths, bin_width_ns=25000000):
+    """
+    Average samples into bins of bin_width_ns (aligned to multiples of the width, like the pandas
+    resample of the original analyze.py) from the first to the last bin with a sample, and fill the
+    empty bins by linear interpolation. The means come from two bincounts over the bin of every sample.
+    Returns the seconds since the first bin and the bandwidth of every bin.
+    """
+    times_ns = np.asarray(times_ns, dtype=np.int64)
+    bandwidths = np.asarray(bandwidths, dtype=np.float64)
+
+    if len(times_ns) == 0:
+        return np.zeros(0), np.zeros(0)
+
+    # Bin of every sample relative to the first bin
+    bins = times_ns // bin_width_ns
+    bins -= bins.min()
+
+    # Mean of every bin (in place of the sums)
+    means = np.bincount(bins, weights=bandwidths)
+    counts = np.bincount(bins)
+    del bins
+    np.divide(means, counts, out=means, where=counts > 0)
+
+    # Linear interpolation of the empty bins (between the bins with samples around them)
+    empty = counts == 0
+    if empty.any():
+        filled = np.flatnonzero(~empty)
+        means[empty] = np.interp(np.flatnonzero(empty), filled, means[filled])
+
+    return np.arange(len(means)) * (bin_width_ns / 1e9), means
+
+
+def normalize_bandwidth(raw_bandwidth, rolling_average_window_size=0):
+    """Normalize a bandwidth signal to a mean of 0 (over a rolling window or, with 0, globally), scaled by its largest magnitude."""
+    raw_bandwidth = np.asarray(raw_bandwidth, dtype=np.float64)
+    if rolling_average_window_size == 0:
+        average = np.mean(raw_bandwidth)
+    else:
+        average = np.convolve(raw_bandwidth, np.ones(rolling_average_window_size) / rolling_average_window_size, mode="same")
+    return (raw_bandwidth - average) / np.max(np.abs(raw_bandwidth))
+
+
+def decode_signal(normalized_bandwidth, hysteresis_threshold=0.1, edge_separation_samples=7, edge_transition_threshold=0.5):
+    """
+    Decode a normalized bandwidth signal: threshold it with hysteresis, find and combine its edges,
+    extract the clock frequency and decode the differential manchester bits. Returns a dict with the
+    packed bits ('bits') and their number ('bit_count'), the clock frequency, the thresholded signal,
+    the remaining edges and the sample indexes every bit starts and ends at.
+    """
+    # Threshold the signal with hysteresis
+    thresholded = threshold_hysteresis(normalized_bandwidth, hysteresis_threshold)
+
+    # Find the edges and combine the edges that are too close together
+    edges = coalesce_edges(np.flatnonzero(np.diff(thresholded)), edge_separation_samples)
+
+    # Extract the clock frequency and decode the bits (deleting the corrupted edges)
+    clock_frequency = estimate_clock_frequency(edges)
+    bit_values, bit_starts, bit_ends, edges = decode_differential_manchester(edges, clock_frequency, edge_transition_threshold)
+
+    return {
+        "bits": pack_bits(bit_values),
+        "bit_count": len(bit_values),
+        "clock_frequency": clock_frequency,
+        "thresholded": thresholded,
+        "edges": edges,
+        "bit_starts": bit_starts,
+        "bit_ends": bit_ends,
+    }
@@ -1,6 +1,7 @@
 /**
  * @file Standalone receiver
- * @details Run with `./build/receiver <mode (one of read, write, or copy)> <parallelism (0 for all cores)> <warmup iterations> <run iterations> <buffer size in bytes>` (e.g.: copy mode, all cores, 32 warmup iterations, 64 run iterations, and 1 GiB buffer: `./build/receiver copy 0 32 64 1073741824`)
+ * @details Run with `./build/receiver <mode (one of read, write, or copy)> <parallelism (0 for all cores)> <warmup iterations> <run iterations> <buffer size in bytes> [binary trace file]` (e.g.: copy mode, all cores, 32 warmup iterations, 64 run iterations, and 1 GiB buffer: `./build/receiver copy 0 32 64 1073741824`)
+ * If a binary trace file is given, the samples are written to it (see trace_writer.hpp) instead of being printed
  */
 
 #include <chrono>
@@ -8,16 +9,18 @@
 #include <cstddef>
 #include <cstdint>
 #include <iostream>
+#include <memory>
 #include <omp.h>
 
 #include "contention_generator.hpp"
+#include "trace_writer.hpp"
 
 int main(int argc, char **argv)
 {
   // Print usage
-  if (argc != 6)
+  if (argc != 6 && argc != 7)
   {
-    std::cerr << "Usage: " << argv[0] << " <mode (one of read, write, or copy)> <parallelism (0 for all cores)> <warmup iterations> <run iterations> <buffer size in bytes>" << std::endl;
+    std::cerr << "Usage: " << argv[0] << " <mode (one of read, write, or copy)> <parallelism (0 for all cores)> <warmup iterations> <run iterations> <buffer size in bytes> [binary trace file]" << std::endl;
     return 1;
   }
 
@@ -44,8 +47,18 @@ int main(int argc, char **argv)
   // Initialize the contention generator
   covert_channel::contention_generator generator(parallelism, bufferSize);
 
+  // Initialize the trace writer (binary output mode)
+  std::unique_ptr<covert_channel::trace_writer> trace;
+  if (argc == 7)
+  {
+    trace = std::make_unique<covert_channel::trace_writer>(argv[6]);
+  }
+
   // Print the header
-  std::cout << "type,bandwidth,time" << std::endl;
+  if (!trace)
+  {
+    std::cout << "type,bandwidth,time" << std::endl;
+  }
 
   // Warm up
   for (std::size_t iteration = 0; iteration < warmupIterations; iteration++)
@@ -56,7 +69,13 @@ int main(int argc, char **argv)
     // Run
     double bandwidth = generator.run(mode);
 
-    // Print the result
+    // Save or print the result
+    if (trace)
+    {
+      trace->write(std::chrono::duration_cast<std::chrono::nanoseconds>(std::chrono::system_clock::now().time_since_epoch()).count(), bandwidth, covert_channel::RECEIVER_WARMUP);
+      continue;
+    }
+
     std::cout << "warmup," << bandwidth << "," << time << std::endl;
   }
 
@@ -76,6 +95,14 @@ int main(int argc, char **argv)
     
     // Get the current time with microsecond precision
     auto endTime = std::chrono::system_clock::now();
+
+    // Save the sample to the trace (binary output mode)
+    if (trace)
+    {
+      trace->write(std::chrono::duration_cast<std::chrono::nanoseconds>(endTime.time_since_epoch()).count(), bandwidth, covert_channel::RECEIVER_RUN);
+      continue;
+    }
+
     auto end_time_t = std::chrono::system_clock::to_time_t(endTime);
     std::tm *ltm = std::localtime(&end_time_t);
 
@@ -95,6 +122,12 @@ int main(int argc, char **argv)
               << "    &   " << bandwidth << std::endl;
   }
 
+  // Write the remaining samples
+  if (trace)
+  {
+    trace->flush();
+  }
+
   // Compute statistics
   double mean = 0;
   double min = bandwidths[0];
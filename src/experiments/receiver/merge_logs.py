@@ -1,3 +1,5 @@
+from itertools import zip_longest
+
 def merge_logs(transmitter_num, receiver_num):
     for i in range(1, transmitter_num + 1):
         # Define file names
@@ -7,19 +9,13 @@ def merge_logs(transmitter_num, receiver_num):
         
         # Open files
         with open(transmitter_file, 'r') as t_file, open(receiver_file, 'r') as r_file, open(output_file, 'w') as out_file:
-            # Read lines from both files
-            transmitter_lines = t_file.readlines()
-            receiver_lines = r_file.readlines()
-            
-            # Get the max length to ensure all lines are processed
-            max_len = max(len(transmitter_lines), len(receiver_lines))
-            
-            for j in range(max_len):
-                if j < len(transmitter_lines):
-                    out_file.write(transmitter_lines[j])
+            # Stream lines from both files until both are exhausted (only one line of each is held in memory)
+            for transmitter_line, receiver_line in zip_longest(t_file, r_file):
+                if transmitter_line is not None:
+                    out_file.write(transmitter_line)
                 out_file.write("\n")  # Empty line to indicate switch
-                if j < len(receiver_lines):
-                    out_file.write(receiver_lines[j])
+                if receiver_line is not None:
+                    out_file.write(receiver_line)
                     
     print(f"Merged logs created for {transmitter_num} files.")
 
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def load_pyplot():
+    """Import matplotlib (headless) only when a graph is drawn, so that the decoding alone does not pay for it."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+def decimate_min_max(x, y, columns):
+    """
+    Reduce a trace (x sorted) to at most four samples per pixel column: the first, last, minimum and
+    maximum of the samples in every one of columns equal x ranges. The line drawn through them looks
+    the same as the line through every sample. Returns the indexes of the kept samples (in order).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y)
+
+    if columns <= 0 or len(x) <= 4 * columns:
+        return np.arange(len(x))
+
+    # Column of every sample (the columns are contiguous since x is sorted)
+    span = x[-1] - x[0]
+    column = np.minimum(((x - x[0]) * (columns / span)).astype(np.int64), columns - 1) if span > 0 else np.zeros(len(x), dtype=np.int64)
+    starts = np.flatnonzero(np.concatenate([[True], column[1:] != column[:-1]]))
+    ends = np.append(starts[1:], len(x)) - 1
+
+    # First sample that reaches the minimum and the maximum of its column
+    sample_column = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, len(x))))
+    minima = np.flatnonzero(y == np.minimum.reduceat(y, starts)[sample_column])
+    maxima = np.flatnonzero(y == np.maximum.reduceat(y, starts)[sample_column])
+    minima = minima[np.unique(sample_column[minima], return_index=True)[1]]
+    maxima = maxima[np.unique(sample_column[maxima], return_index=True)[1]]
+
+    return np.unique(np.concatenate([starts, ends, minima, maxima]))
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+
+import argparse
+import math
+import re
+import sys
+import time
+from collections import deque
+from os.path import dirname, join, realpath
+
+import numpy as np
+
+from decoder import estimate_clock_frequency
+
+# The timestamp parsing is shared with the analysis scripts
+sys.path.insert(0, join(dirname(realpath(__file__)), "..", "..", "..", "scripts"))
+from timestamps import DAY_US, MidnightUnwrapper, parse_timestamp
+
+# Receiver output lines: 'run,<bandwidth>,<time in ns>' (CSV) or '<HH:MM:SS:ms:us>    &   <bandwidth>'
+CSV_LINE_PATTERN = re.compile(r"^(\w+),([^,]+),(\d+)\s*$")
+
+
+def parse_receiver_line(line):
+    """Parse a receiver output line into (time in ns, bandwidth), or None for warmup, header and summary lines."""
+    match = CSV_LINE_PATTERN.match(line)
+    if match:
+        if match.group(1) == "warmup":
+            return None
+        try:
+            return int(match.group(3)), float(match.group(2))
+        except ValueError:
+            return None
+
+    fields = line.split()
+    if len(fields) == 3 and fields[1] == "&":
+        try:
+            return parse_timestamp(fields[0]) * 1000, float(fields[2])
+        except ValueError:
+            return None
+
+    return None
+
+
+class StreamingDecoder:
+    """
+    Decode the receiver bandwidth samples while they arrive (same stages as analyze.py).
+
+    Samples are averaged into bins of bin_width_ns (with linear interpolation of empty bins), normalized
+    by the mean and maximum of the last normalization_window bins, thresholded with hysteresis, turned
+    into edges (combining the edges that are at most edge_separation_samples apart) and decoded with
+    differential manchester encoding. The clock frequency is estimated from the first calibration_edges
+    edges unless it is given. Only the normalization window and a few edges are kept in memory.
+
+    feed() and finish() return the bits decoded so far as dicts with the bit, its time ("x", seconds since
+    the first bin, like analyze.py) and its latency (seconds of samples between the end of the bit and
+    the sample it was decoded at).
+    """
+
+    def __init__(
+        self,
+        bin_width_ns=25000000,
+        normalization_window=400,
+        hysteresis_threshold=0.1,
+        edge_separation_samples=7,
+        edge_transition_threshold=0.5,
+        clock_frequency=None,
+        calibration_edges=64,
+    ):
+        self.bin_width_ns = bin_width_ns
+        self.normalization_window = normalization_window
+        self.hysteresis_threshold = hysteresis_threshold
+        self.edge_separation_samples = edge_separation_samples
+        self.edge_transition_threshold = edge_transition_threshold
+        self.clock_frequency = clock_frequency
+        self.calibration_edges = calibration_edges
+
+        # Resampling (current bin and the last emitted bin)
+        self.first_bin = None
+        self.current_bin = None
+        self.bin_sum = 0.0
+        self.bin_count = 0
+        self.last_value = None
+        self.unwrap_midnight = MidnightUnwrapper(day=DAY_US * 1000)
+
+        # Normalization window (running sum and a monotonic deque of the window maximum)
+        self.window = deque()
+        self.window_sum = 0.0
+        self.window_max = deque()
+
+        # Thresholding and edges
+        self.sample_index = -1
+        self.last = False
+        self.level = None
+        self.pending_edge = None
+        self.edges = deque()
+
+        self.bit_count = 0
+
+    def feed(self, time_ns, bandwidth):
+        """Add one receiver sample (time in ns, bandwidth) and return the newly decoded bits."""
+        # Filter out nan values
+        if math.isnan(bandwidth):
+            return []
+
+        # Time of day samples roll over at midnight
+        time_ns = self.unwrap_midnight(time_ns)
+
+        time_bin = time_ns // self.bin_width_ns
+        if self.current_bin is None:
+            self.first_bin = self.current_bin = time_bin
+
+        bits = []
+        if time_bin > self.current_bin:
+            bits = self._close_bin()
+            self.current_bin = time_bin
+
+        self.bin_sum += bandwidth
+        self.bin_count += 1
+
+        return bits
+
+    def feed_line(self, line):
+        """Parse one receiver output line and return the newly decoded bits."""
+        sample = parse_receiver_line(line)
+        return self.feed(*sample) if sample is not None else []
+
+    def finish(self):
+        """Decode the remaining samples and edges at the end of the stream."""
+        bits = self._close_bin() if self.bin_count > 0 else []
+
+        if self.pending_edge is not None:
+            self.edges.append(self.pending_edge)
+            self.pending_edge = None
+
+        return bits + self._decode_edges(final=True)
+
+    def _close_bin(self):
+        """Emit the mean of the current bin (and the interpolated empty bins before it)."""
+        value = self.bin_sum / self.bin_count
+        index = self.current_bin - self.first_bin
+        self.bin_sum = 0.0
+        self.bin_count = 0
+
+        bits = []
+        if self.last_value is not None:
+            gap = index - self.sample_index
+            for step in range(1, gap):
+                bits += self._add_sample(self.last_value + (value - self.last_value) * step / gap)
+        bits += self._add_sample(value)
+        self.last_value = value
+
+        return bits
+
+    def _add_sample(self, value):
+        """Normalize and threshold one resampled value and look for an edge."""
+        self.sample_index += 1
+        index = self.sample_index
+
+        # Rolling normalization window
+        self.window.append(value)
+        self.window_sum += value
+        while self.window_max and self.window_max[-1][1] <= abs(value):
+            self.window_max.pop()
+        self.window_max.append((index, abs(value)))
+        if len(self.window) > self.normalization_window:
+            self.window_sum -= self.window.popleft()
+        while self.window_max[0][0] <= index - len(self.window):
+            self.window_max.popleft()
+
+        maximum = self.window_max[0][1]
+        normalized = (value - self.window_sum / len(self.window)) / maximum if maximum > 0 else 0.0
+
+        # Threshold the signal with hysteresis
+        if normalized > self.hysteresis_threshold:
+            self.last = True
+        elif normalized < -self.hysteresis_threshold:
+            self.last = False
+        level = 1 if self.last else -1
+
+        # An edge is at the sample before the level changes
+        if self.level is not None and level != self.level:
+            self._add_edge(index - 1)
+        self.level = level
+
+        # The pending edge is final once no later edge can be close enough to combine with it
+        if self.pending_edge is not None and index - self.pending_edge > self.edge_separation_samples:
+            self.edges.append(self.pending_edge)
+            self.pending_edge = None
+
+        return self._decode_edges()
+
+    def _add_edge(self, edge):
+        """Combine the edge with the pending edge if they are too close together."""
+        if self.pending_edge is not None and edge - self.pending_edge <= self.edge_separation_samples:
+            self.pending_edge = (self.pending_edge + edge) // 2
+            return
+
+        if self.pending_edge is not None:
+            self.edges.append(self.pending_edge)
+        self.pending_edge = edge
+
+    def _mismatch(self, start, end):
+        """Relative frequency mismatch of the number of samples between two edges (every spacing mismatches a 0 clock frequency)."""
+        if self.clock_frequency <= 0:
+            return math.inf
+        return abs((end - start - 1) - self.clock_frequency) / self.clock_frequency
+
+    def _decode_edges(self, final=False):
+        """Decode the final edges (waiting for the edge after a possible 0 bit unless the stream ended)."""
+        if self.clock_frequency is None:
+            if len(self.edges) < self.calibration_edges and not (final and len(self.edges) > 2):
+                return []
+            self.clock_frequency = estimate_clock_frequency(np.array(self.edges))
+
+        edges = self.edges
+        threshold = self.edge_transition_threshold
+        bits = []
+        while len(edges) >= 2:
+            mismatch_a = self._mismatch(edges[0], edges[1])
+
+            # A 0 bit needs the next two edge spacings
+            if mismatch_a <= threshold and len(edges) < 3 and not final:
+                break
+
+            if mismatch_a <= threshold and len(edges) >= 3 and self._mismatch(edges[1], edges[2]) <= threshold:
+                bits.append(self._bit(0, edges[0], edges[2]))
+                edges.popleft()
+                edges.popleft()
+            elif 1 - threshold <= mismatch_a <= 1 + threshold:
+                bits.append(self._bit(1, edges[0], edges[1]))
+                edges.popleft()
+            else:
+                # The data is corrupted, delete the edge and skip the next one
+                edges.popleft()
+                edges.popleft()
+
+        return bits
+
+    def _bit(self, bit, start, end):
+        """Describe a decoded bit (times in seconds since the first bin)."""
+        self.bit_count += 1
+        seconds = self.bin_width_ns / 1e9
+        return {
+            "bit": bit,
+            "x": (start + end) / 2 * seconds,
+            "latency": (self.sample_index - end) * seconds,
+        }
+
+
+def follow(file, poll_interval, idle_timeout):
+    """Yield the lines of a growing file, stopping after idle_timeout seconds without new data."""
+    idle_since = time.monotonic()
+    buffer = ""
+    while True:
+        chunk = file.readline()
+        if chunk:
+            buffer += chunk
+            if buffer.endswith("\n"):
+                yield buffer
+                buffer = ""
+            idle_since = time.monotonic()
+        elif time.monotonic() - idle_since > idle_timeout:
+            if buffer:
+                yield buffer
+            return
+        else:
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    # Set up command-line argument parsing
+    parser = argparse.ArgumentParser(description="Decode the receiver output while the receiver is running (e.g. ./build/receiver ... | stream_decoder.py).")
+    parser.add_argument("file", nargs="?", default=None, help="Receiver output file (default: standard input).")
+    parser.add_argument("--follow", action="store_true", help="Keep reading the file while it grows (like tail -f).")
+    parser.add_argument("--idle_timeout", type=float, default=5.0, help="Seconds without new data after which --follow stops.")
+    parser.add_argument("--bin_width_ms", type=float, default=25, help="Resampling interval (ms).")
+    parser.add_argument("--normalization_window", type=int, default=400, help="Number of resampled values the signal is normalized over.")
+    parser.add_argument("--clock_frequency", type=int, default=None, help="Samples per clock period (default: estimated from the first edges).")
+    parser.add_argument("--calibration_edges", type=int, default=64, help="Number of edges the clock frequency is estimated from.")
+    parser.add_argument("--message", type=str, default=None, help="Expected message, decoding stops as soon as it is recovered.")
+    args = parser.parse_args()
+
+    decoder = StreamingDecoder(
+        bin_width_ns=int(args.bin_width_ms * 1000000),
+        normalization_window=args.normalization_window,
+        clock_frequency=args.clock_frequency,
+        calibration_edges=args.calibration_edges,
+    )
+
+    message_bits = "".join(f"{ord(character):08b}" for character in args.message) if args.message else None
+    recent_bits = deque(maxlen=len(message_bits) if message_bits else 0)
+    start = time.monotonic()
+    latency_sum, latency_count = 0.0, 0
+    recovered = False
+
+    file = open(args.file, "r") if args.file else sys.stdin
+    lines = follow(file, 0.05, args.idle_timeout) if args.follow else file
+
+    def handle(bits):
+        """Print the decoded bits and check whether the message is recovered."""
+        global latency_sum, latency_count
+        for bit in bits:
+            print(bit["bit"], end="", flush=True)
+            latency_sum += bit["latency"]
+            latency_count += 1
+            recent_bits.append(str(bit["bit"]))
+        return message_bits is not None and "".join(recent_bits) == message_bits
+
+    for line in lines:
+        if handle(decoder.feed_line(line)):
+            recovered = True
+            break
+    else:
+        recovered = handle(decoder.finish())
+
+    print()
+    print(f"Bits: {decoder.bit_count}, clock frequency: {decoder.clock_frequency}, mean latency: {latency_sum / latency_count if latency_count else 0:.3f} s")
+    if message_bits is not None:
+        print(f"Message recovered: {recovered} after {time.monotonic() - start:.3f} s")
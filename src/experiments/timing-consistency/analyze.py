@@ -1,27 +1,61 @@
 #!/usr/bin/env python
 
+import argparse
+import sys
 from os.path import dirname, join, realpath
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
 # Get the directory of the script
 __dir__ = dirname(realpath(__file__))
 
-# Read the CSV file into a DataFrame
-df = pd.read_csv(join(__dir__, "error.csv"))
+# The plotting helpers are shared with the receiver experiment
+sys.path.insert(0, join(__dir__, "..", "receiver"))
+from plotting import decimate_min_max, load_pyplot
 
-# Plot the data
-plt.tight_layout()
-fig, ax1 = plt.subplots(figsize=(10, 6))
+# Set up command-line argument parsing
+parser = argparse.ArgumentParser(description="Summarize the timing error of a timing consistency run and plot it.")
+parser.add_argument("--input", type=str, default=join(__dir__, "error.csv"), help="Benchmark output (CSV with iteration and error columns).")
+parser.add_argument("--graph", type=lambda x: (str(x).lower() == 'true'), default=True, help="Plot the error (matplotlib is only imported then). Default is True.")
+parser.add_argument("--output", type=str, default=join(__dir__, "graph.png"), help="Graph file.")
+parser.add_argument("--dpi", type=int, default=300, help="Graph resolution (dots per inch).")
+parser.add_argument("--decimate", type=lambda x: (str(x).lower() == 'true'), default=True, help="Only plot the first, last, minimum and maximum iteration of every pixel column. Default is True.")
 
-ax1.plot(
-    df["iteration"],
-    df["error"],
-)
 
-# Set the graph labels
-ax1.set_xlabel("Iteration")
-ax1.set_ylabel("Error (ns)")
+def plot_error(df, output_file, dpi=300, decimate=True):
+    """Plot the error of every iteration (decimated to the pixel columns of the graph)."""
+    plt = load_pyplot()
 
-# Save the plot as a PNG file
-plt.savefig(join(__dir__, "graph.png"), dpi=300)
+    samples = decimate_min_max(df["iteration"].values, df["error"].values, 10 * dpi if decimate else 0)
+
+    # Plot the data
+    plt.tight_layout()
+    fig, ax1 = plt.subplots(figsize=(10, 6))
+
+    ax1.plot(
+        df["iteration"].values[samples],
+        df["error"].values[samples],
+    )
+
+    # Set the graph labels
+    ax1.set_xlabel("Iteration")
+    ax1.set_ylabel("Error (ns)")
+
+    # Save the plot as a PNG file
+    plt.savefig(output_file, dpi=dpi)
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+
+    # Read the CSV file into a DataFrame
+    df = pd.read_csv(args.input)
+
+    if args.graph:
+        plot_error(df, args.output, args.dpi, args.decimate)
+
+    # Print the error statistics
+    error = df["error"].values
+    print(f"Iterations: {len(error)}")
+    print(f"Error (ns): mean {np.mean(error):.1f}, std {np.std(error):.1f}, min {np.min(error)}, max {np.max(error)}")
@@ -1,25 +1,29 @@
 /**
  * @file Standalone transmitter
- * @details Run with `./build/transmitter <mode (one of read, write, or copy)> <parallelism (0 for all cores)> <warmup iterations> <buffer size in bytes> <message>` (e.g.: copy mode, all cores, 32 warmup iterations, 1 GiB buffer, and "Hello, world": `./build/transmitter copy 0 32 1073741824 "Hello, world"`)
+ * @details Run with `./build/transmitter <mode (one of read, write, or copy)> <parallelism (0 for all cores)> <warmup iterations> <buffer size in bytes> <message> <transfer_rate> <sleep time when high> [binary trace file]` (e.g.: copy mode, all cores, 32 warmup iterations, 1 GiB buffer, and "Hello, world": `./build/transmitter copy 0 32 1073741824 "Hello, world" 10 0`)
+ * If a binary trace file is given, the bits are written to it (see trace_writer.hpp) instead of being printed
  */
 
 #include <chrono>
 #include <cstddef>
 #include <cstdint>
 #include <iostream>
+#include <limits>
+#include <memory>
 #include <omp.h>
 #include <string>
 #include <thread>
 #include <vector>
 
 #include "contention_generator.hpp"
+#include "trace_writer.hpp"
 
 int main(int argc, char **argv)
 {
   // Print usage
-  if (argc != 8)
+  if (argc != 8 && argc != 9)
   {
-    std::cerr << "Usage: " << argv[0] << " <mode (one of read, write, or copy)> <parallelism (0 for all cores)> <warmup iterations> <buffer size in bytes> <message> <transfer_rate> <sleep time when high>" << std::endl;
+    std::cerr << "Usage: " << argv[0] << " <mode (one of read, write, or copy)> <parallelism (0 for all cores)> <warmup iterations> <buffer size in bytes> <message> <transfer_rate> <sleep time when high> [binary trace file]" << std::endl;
     return 1;
   }
 
@@ -105,6 +109,13 @@ int main(int argc, char **argv)
   // Initialize the contention generator
   covert_channel::contention_generator generator(parallelism, bufferSize);
 
+  // Initialize the trace writer (binary output mode)
+  std::unique_ptr<covert_channel::trace_writer> trace;
+  if (argc == 9)
+  {
+    trace = std::make_unique<covert_channel::trace_writer>(argv[8]);
+  }
+
   // Warm up
   double averageBandwidth = 0.0;
 
@@ -126,6 +137,9 @@ int main(int argc, char **argv)
     // std::cout << "run_duration" << run_duration << std::endl;
     auto startTime = std::chrono::system_clock::now();
 
+    // Average bandwidth of the contention runs (NaN when transmitting low)
+    double bitBandwidth = std::numeric_limits<double>::quiet_NaN();
+
 
     
     
@@ -135,12 +149,16 @@ int main(int argc, char **argv)
     {
       //generator.run(mode);
       auto start_time = std::chrono::steady_clock::now();
+      double bandwidthSum = 0.0;
+      std::size_t runs = 0;
       do
       {
-        generator.run(mode);
+        bandwidthSum += generator.run(mode);
+        runs++;
         // std::cout << "Transmitter runs" << std::endl;
         // Iterate this code until X millisecond is completed. Note that this takes more than X millisecond due to last iteration.
       } while (std::chrono::duration_cast<std::chrono::milliseconds>(std::chrono::steady_clock::now() - start_time).count() < run_duration);
+      bitBandwidth = bandwidthSum / static_cast<double>(runs);
       // Sleep for Y time after running for (X - Y) time
 
       // auto endTime2 = std::chrono::system_clock::now();
@@ -180,6 +198,14 @@ int main(int argc, char **argv)
     sleepDuration = std::chrono::duration_cast<std::chrono::nanoseconds>(t1 - t0).count();
 
     auto endTime = std::chrono::system_clock::now();
+
+    // Save the bit to the trace (binary output mode)
+    if (trace)
+    {
+      trace->write(std::chrono::duration_cast<std::chrono::nanoseconds>(endTime.time_since_epoch()).count(), bitBandwidth, high ? covert_channel::TRANSMITTER_HIGH : covert_channel::TRANSMITTER_LOW);
+      continue;
+    }
+
     auto end_time_t = std::chrono::system_clock::to_time_t(endTime);
     // Convert to local time and format
     std::tm *ltm = std::localtime(&end_time_t);
@@ -0,0 +1,57 @@
+/**
+ * @file Binary trace writer implementation
+ */
+
+#include <cstring>
+#include <stdexcept>
+
+#include "trace_writer.hpp"
+
+covert_channel::trace_writer::trace_writer(const std::string &path) : file(path, std::ios::binary | std::ios::trunc)
+{
+  // Validate the file
+  if (!this->file)
+  {
+    throw std::runtime_error("Failed to open trace file");
+  }
+
+  // Write the header
+  trace_header header = {};
+  std::memcpy(header.magic, TRACE_WRITER_MAGIC, sizeof(header.magic));
+  header.version = TRACE_WRITER_VERSION;
+  header.recordSize = sizeof(trace_record);
+
+  this->file.write(reinterpret_cast<const char *>(&header), sizeof(header));
+
+  // Reserve the buffer
+  this->records.reserve(TRACE_WRITER_BUFFER_RECORDS);
+}
+
+void covert_channel::trace_writer::write(int64_t time, double bandwidth, trace_record_type type)
+{
+  // Buffer the record (zero initialized so the padding is deterministic)
+  trace_record record = {};
+  record.time = time;
+  record.bandwidth = bandwidth;
+  record.type = type;
+
+  this->records.push_back(record);
+
+  // Write the buffer once it is full
+  if (this->records.size() >= TRACE_WRITER_BUFFER_RECORDS)
+  {
+    this->flush();
+  }
+}
+
+void covert_channel::trace_writer::flush()
+{
+  this->file.write(reinterpret_cast<const char *>(this->records.data()), static_cast<std::streamsize>(this->records.size() * sizeof(trace_record)));
+  this->file.flush();
+  this->records.clear();
+}
+
+covert_channel::trace_writer::~trace_writer()
+{
+  this->flush();
+}
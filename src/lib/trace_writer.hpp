@@ -0,0 +1,149 @@
+/**
+ * @file Binary trace writer definition
+ */
+
+#pragma once
+
+#include <cstddef>
+#include <cstdint>
+#include <fstream>
+#include <string>
+#include <vector>
+
+/**
+ * @brief Trace file magic (first 8 bytes of every trace file)
+ */
+#define TRACE_WRITER_MAGIC "MC3TRACE"
+
+/**
+ * @brief Trace file format version
+ */
+#define TRACE_WRITER_VERSION 1
+
+/**
+ * @brief Number of records buffered before they are written to the file
+ *
+ * @details Records are only written in batches so that the measurement loops
+ * don't pay for a write (or a flush) per sample.
+ */
+#define TRACE_WRITER_BUFFER_RECORDS 4096
+
+/**
+ * @brief Covert channel namespace
+ */
+namespace covert_channel
+{
+  /**
+   * @brief Trace record type
+   */
+  enum trace_record_type : uint8_t
+  {
+    /**
+     * @brief Receiver warmup sample
+     */
+    RECEIVER_WARMUP = 0,
+
+    /**
+     * @brief Receiver sample
+     */
+    RECEIVER_RUN = 1,
+
+    /**
+     * @brief Transmitter low bit
+     */
+    TRANSMITTER_LOW = 2,
+
+    /**
+     * @brief Transmitter high bit
+     */
+    TRANSMITTER_HIGH = 3
+  };
+
+  /**
+   * @brief Trace file header (16 bytes)
+   */
+  struct trace_header
+  {
+    /**
+     * @brief Magic (TRACE_WRITER_MAGIC without the null terminator)
+     */
+    char magic[8];
+
+    /**
+     * @brief Format version
+     */
+    uint32_t version;
+
+    /**
+     * @brief Size of a record (in bytes)
+     */
+    uint32_t recordSize;
+  };
+
+  /**
+   * @brief Trace record (24 bytes, the last 7 are padding)
+   */
+  struct trace_record
+  {
+    /**
+     * @brief Wall clock time (nanoseconds since the Unix epoch)
+     */
+    int64_t time;
+
+    /**
+     * @brief Bandwidth (GB/s; NaN if there is none)
+     */
+    double bandwidth;
+
+    /**
+     * @brief Record type
+     */
+    trace_record_type type;
+  };
+
+  static_assert(sizeof(trace_header) == 16, "Unexpected trace header layout");
+  static_assert(sizeof(trace_record) == 24, "Unexpected trace record layout");
+
+  /**
+   * @brief Binary trace writer class
+   */
+  class trace_writer
+  {
+  private:
+    /**
+     * @brief Output file
+     */
+    std::ofstream file;
+
+    /**
+     * @brief Buffered records
+     */
+    std::vector<trace_record> records;
+
+  public:
+    /**
+     * @brief Construct a new trace writer object (and write the header)
+     * @param path Trace file path
+     * @throws std::runtime_error Trace file could not be opened
+     */
+    trace_writer(const std::string &path);
+
+    /**
+     * @brief Append a record
+     * @param time Wall clock time (nanoseconds since the Unix epoch)
+     * @param bandwidth Bandwidth (GB/s; NaN if there is none)
+     * @param type Record type
+     */
+    void write(int64_t time, double bandwidth, trace_record_type type);
+
+    /**
+     * @brief Write the buffered records to the file
+     */
+    void flush();
+
+    /**
+     * @brief Destroy the trace writer object (flushing the buffered records)
+     */
+    ~trace_writer();
+  };
+} // namespace covert_channel